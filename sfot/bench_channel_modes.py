@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: emblem and right-edge matching on BGR vs single-channel frames
+
+Runs EmblemDetector and RightEdgeDetector in every channel mode ("bgr",
+"luma", "b", "g", "r") over a labeled set of frames and reports time per
+frame, rank accuracy against the labels, and how close the runner-up rank
+comes (the margin a threshold has to sit in). Right-edge positions are
+compared against the first mode's on the emblem frames, the only ones the
+pipeline runs it on.
+
+Labels are a JSON object of timestamp (seconds) -> rank, null for frames
+without an emblem:
+
+    {"100": "bronze", "240": "silver", "300": null}
+
+    python bench_channel_modes.py test_data/<vod>/480p.mp4 labels.json --resolution 480p
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from detection_context import CHANNEL_MODES, DetectionContext
+from emblem_detector import EmblemDetector
+from right_edge_detector import RightEdgeDetector
+
+# Profile crop region (fractions of the frame)
+CROP_PERCENT = [0.005859375, 0.5208333333333334, 0.2802734375, 0.20833333333333334]
+
+
+def labeled_crops(path: str, labels: dict):
+    """(timestamp, rank, crop) per label, cropped like SFOTProcessor.percent_to_pixels"""
+    cap = cv2.VideoCapture(path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    x_pct, y_pct, w_pct, h_pct = CROP_PERCENT
+    x, y = math.floor(x_pct * width), math.floor(y_pct * height)
+    w, h = min(math.ceil(w_pct * width), width - x), min(math.ceil(h_pct * height), height - y)
+
+    crops = []
+    for timestamp, rank in sorted(labels.items(), key=lambda item: float(item[0])):
+        cap.set(cv2.CAP_PROP_POS_MSEC, float(timestamp) * 1000)
+        ok, frame = cap.read()
+        if not ok:
+            print(f"Could not read frame at {timestamp}s, skipped")
+            continue
+        crops.append((float(timestamp), rank, np.ascontiguousarray(frame[y:y + h, x:x + w])))
+    cap.release()
+    return crops
+
+
+def run_mode(channels: str, crops, args):
+    """Detect every crop in one channel mode; returns timings and per-frame results"""
+    emblems = EmblemDetector(args.templates_dir, resolution=args.resolution, matcher=args.matcher,
+                             pyramid_scale=args.pyramid_scale, channels=channels)
+    right_edge = RightEdgeDetector(args.templates_dir, resolution=args.resolution, channels=channels)
+    # Warm up (FFT template spectra are built on the first frame)
+    emblems.detect_emblem(crops[0][2], args.threshold, context=DetectionContext(crops[0][2].shape))
+
+    results = []
+    emblem_time = right_edge_time = 0.0
+    for _ in range(args.repeat):
+        results = []
+        for _, _, crop in crops:
+            # One context per frame, so the frame is converted once for both detectors
+            context = DetectionContext(crop.shape)
+            start = time.perf_counter()
+            rank, _, confidence = emblems.detect_emblem(crop, args.threshold, context=context)
+            middle = time.perf_counter()
+            edge_x, _ = right_edge.detect_right_edge(crop, args.right_edge_threshold, context)
+            emblem_time += middle - start
+            right_edge_time += time.perf_counter() - middle
+            results.append((rank, confidence, context.rank_matches, edge_x))
+
+    runs = args.repeat * len(crops)
+    return emblem_time / runs * 1000, right_edge_time / runs * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare BGR and single-channel template matching')
+    parser.add_argument('video', help='Local video file (e.g. test_data/<vod>/480p.mp4)')
+    parser.add_argument('labels', help='JSON object of timestamp -> rank (null = no emblem)')
+    parser.add_argument('--resolution', default='480p', help='Template set (360p, 480p, 720p, 1080p)')
+    parser.add_argument('--templates-dir', default=os.path.join(os.path.dirname(__file__), 'templates'))
+    parser.add_argument('--matcher', default='fft', choices=['fft', 'opencv'])
+    parser.add_argument('--pyramid-scale', type=float, default=None, help='Coarse-to-fine scale (default: exhaustive)')
+    parser.add_argument('--threshold', type=float, default=0.5, help='Emblem threshold')
+    parser.add_argument('--right-edge-threshold', type=float, default=0.7)
+    parser.add_argument('--modes', nargs='+', default=list(CHANNEL_MODES), choices=CHANNEL_MODES)
+    parser.add_argument('--repeat', type=int, default=5, help='Timing passes over the frame set')
+    args = parser.parse_args()
+
+    with open(args.labels) as f:
+        labels = json.load(f)
+    crops = labeled_crops(args.video, labels)
+    if not crops:
+        print(f"No labeled frames read from {args.video}")
+        return
+
+    emblem_frames = sum(1 for _, rank, _ in crops if rank)
+    print(f"{args.video}: {len(crops)} labeled crops ({emblem_frames} with an emblem), "
+          f"{args.resolution} templates, matcher={args.matcher}, pyramid={args.pyramid_scale}")
+    print(f"{'mode':<6} {'emblem ms':>9} {'edge ms':>8} {'correct':>8} {'min conf':>9} "
+          f"{'max other':>10} {'edge agree':>11} {'edge |dx|':>9}")
+    print("-" * 78)
+
+    reference_edges = None
+    for channels in args.modes:
+        emblem_ms, edge_ms, results = run_mode(channels, crops, args)
+        correct = 0
+        min_confidence = 1.0  # Weakest true detection
+        max_other = -1.0  # Strongest wrong rank, on any frame
+        edges = [edge_x for (_, label, _), (_, _, _, edge_x) in zip(crops, results) if label]
+        for (timestamp, label, _), (rank, confidence, rank_matches, _) in zip(crops, results):
+            if rank == label:
+                correct += 1
+            else:
+                print(f"  {channels}: {timestamp:g}s labeled {label}, detected {rank} ({confidence:.2f})")
+            if label:
+                min_confidence = min(min_confidence, rank_matches[label].confidence if label in rank_matches else 0.0)
+            others = [match.confidence for other, match in rank_matches.items() if other != label]
+            max_other = max([max_other] + others)
+
+        if reference_edges is None:
+            reference_edges = edges
+        agree = sum((a is None) == (b is None) for a, b in zip(edges, reference_edges))
+        shifts = [abs(a - b) for a, b in zip(edges, reference_edges) if a is not None and b is not None]
+        print(f"{channels:<6} {emblem_ms:>9.2f} {edge_ms:>8.2f} {correct:>4}/{len(crops):<3} "
+              f"{min_confidence if emblem_frames else float('nan'):>9.3f} {max_other:>10.3f} "
+              f"{agree:>7}/{len(edges):<3} {max(shifts, default=0):>9}")
+    print(f"min conf: weakest labeled rank's confidence; max other: best score of any other rank "
+          f"(must stay below the threshold, {args.threshold}); edge: vs the first mode ({args.modes[0]}) "
+          f"on emblem frames")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JPEGStreamDemuxer vs the original 4 KB image2pipe reader loop
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from frame_reader import JPEGStreamDemuxer
+
+# Full frame sizes per rendition; the nameplate crop is roughly 28% x 21% of these
+RESOLUTIONS = {
+    '360p': (640, 360),
+    '480p': (854, 480),
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+}
+
+
+def make_frame(width: int, height: int, seed: int) -> np.ndarray:
+    """Synthetic frame with smooth gradients, noise and text so JPEG sizes look realistic"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([x + y * 0.3, y + x * 0.2, (x + y) * 0.5], axis=-1) % 256
+    noise = rng.normal(0, 12, (height, width, 3))
+    frame = np.clip(base + noise, 0, 255).astype(np.uint8)
+    cv2.putText(frame, f"player_{seed:04d}", (width // 10, height // 2),
+                cv2.FONT_HERSHEY_SIMPLEX, height / 200, (255, 255, 255), 2)
+    return frame
+
+
+def build_stream(width: int, height: int, frames: int) -> bytes:
+    """Concatenate JPEG frames the way FFmpeg's image2pipe muxer does"""
+    encoded = []
+    for i in range(frames):
+        ok, jpg = cv2.imencode('.jpg', make_frame(width, height, i), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        encoded.append(jpg.tobytes())
+    return b''.join(encoded)
+
+
+def legacy_reader(stream) -> int:
+    """The original ffmpeg_worker loop: 4 KB reads, bytes concat, rescan from 0"""
+    frame_buffer = b''
+    frames = 0
+    while True:
+        chunk = stream.read(4096)
+        if not chunk:
+            break
+        frame_buffer += chunk
+        while True:
+            start = frame_buffer.find(b'\xff\xd8')
+            if start == -1:
+                break
+            end = frame_buffer.find(b'\xff\xd9', start)
+            if end == -1:
+                break
+            frame_data = frame_buffer[start:end+2]
+            frame_buffer = frame_buffer[end+2:]
+            frames += 1
+    return frames
+
+
+def demuxer_reader(stream) -> int:
+    """New demuxer"""
+    frames = 0
+    for _ in JPEGStreamDemuxer(stream):
+        frames += 1
+    return frames
+
+
+def time_reader(reader, data: bytes, repeats: int) -> float:
+    """Best-of-N wall time for one pass over the stream"""
+    best = float('inf')
+    for _ in range(repeats):
+        stream = io.BufferedReader(io.BytesIO(data), buffer_size=65536)
+        start = time.perf_counter()
+        reader(stream)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MJPEG pipe demuxing')
+    parser.add_argument('--frames', type=int, default=60, help='Frames per stream')
+    parser.add_argument('--repeats', type=int, default=5, help='Timing repeats (best of N)')
+    parser.add_argument('--full-frame', action='store_true',
+                        help='Use full frames instead of the nameplate crop')
+    args = parser.parse_args()
+
+    print(f"{'quality':<8} {'frame':>11} {'avg jpeg':>10} {'legacy':>10} {'demuxer':>10} {'speedup':>8}")
+    print("-" * 62)
+
+    for quality, (width, height) in RESOLUTIONS.items():
+        if not args.full_frame:
+            width, height = int(width * 0.28), int(height * 0.21)
+
+        data = build_stream(width, height, args.frames)
+
+        # Both readers must agree before timing means anything
+        legacy_count = legacy_reader(io.BufferedReader(io.BytesIO(data)))
+        demuxer_count = demuxer_reader(io.BufferedReader(io.BytesIO(data)))
+        assert legacy_count == demuxer_count == args.frames, (legacy_count, demuxer_count)
+
+        legacy_s = time_reader(legacy_reader, data, args.repeats)
+        demuxer_s = time_reader(demuxer_reader, data, args.repeats)
+
+        print(f"{quality:<8} {f'{width}x{height}':>11} {len(data) / args.frames / 1024:>8.1f}KB "
+              f"{legacy_s * 1000:>8.2f}ms {demuxer_s * 1000:>8.2f}ms {legacy_s / demuxer_s:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: matchup prefilter recall on clean and occluded matchup frames
+
+Scores the matchup template (the nameplate's right-edge ornament) the way
+FrameProcessor._matchup_prefilter does, on a labeled set of frames, then again
+with a streamer cam pasted over the right side of each crop - the case where
+process_frame still records the matchup (no_right_edge) but the prefilter
+would already have dropped the frame. Reports, per overlay width, the weakest
+emblem frame's score, how many emblem frames still pass the threshold, and the
+best score of a frame without an emblem.
+
+Labels are a JSON object of timestamp (seconds) -> rank, null for frames
+without an emblem (same format as bench_channel_modes.py):
+
+    {"100": "bronze", "240": "silver", "300": null}
+
+    python bench_prefilter.py test_data/<vod>/480p.mp4 labels.json
+"""
+
+import argparse
+import json
+import os
+
+import cv2
+import numpy as np
+
+from bench_channel_modes import labeled_crops
+
+MATCHUP_TEMPLATE_HEIGHT = 480  # Video height matchup_template.png was cut at (see frame_processor.py)
+
+
+def prefilter_score(crop: np.ndarray, template: np.ndarray, scale: float) -> float:
+    """Best matchup template score, as in FrameProcessor._matchup_prefilter"""
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    if scale < 1:
+        gray = cv2.resize(gray, (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale))),
+                          interpolation=cv2.INTER_AREA)
+    elif scale > 1:
+        h, w = template.shape[:2]
+        template = cv2.resize(template, (max(1, round(w / scale)), max(1, round(h / scale))),
+                              interpolation=cv2.INTER_AREA)
+    if template.shape[0] > gray.shape[0] or template.shape[1] > gray.shape[1]:
+        return 1.0
+    result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+    return float(np.nan_to_num(result, nan=-1.0, posinf=-1.0, neginf=-1.0).max())
+
+
+def cam_overlay(crop: np.ndarray, cover: float, style: str, rng: np.random.Generator) -> np.ndarray:
+    """Crop with its right `cover` fraction hidden under a cam-like overlay"""
+    out = crop.copy()
+    x = int(round(crop.shape[1] * (1 - cover)))
+    if style == 'dark':
+        out[:, x:] = 24
+    elif style == 'noise':
+        out[:, x:] = rng.integers(0, 256, out[:, x:].shape, dtype=np.uint8)
+    else:  # 'border': a cam frame edge - a light 3px border along the overlay's left side
+        out[:, x:] = cv2.GaussianBlur(rng.integers(40, 200, out[:, x:].shape, dtype=np.uint8), (9, 9), 0)
+        out[:, x:x + 3] = 230
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Matchup prefilter recall under cam occlusion')
+    parser.add_argument('video', help='Local video file (e.g. test_data/<vod>/480p.mp4)')
+    parser.add_argument('labels', help='JSON object of timestamp -> rank (null = no emblem)')
+    parser.add_argument('--template', default=os.path.join(os.path.dirname(__file__), 'templates', 'matchup_template.png'))
+    parser.add_argument('--threshold', type=float, default=0.78, help='detection.threshold')
+    parser.add_argument('--cover', type=float, nargs='+', default=[0.02, 0.05, 0.1, 0.2, 0.4],
+                        help='Fractions of the crop width hidden on the right')
+    parser.add_argument('--styles', nargs='+', default=['dark', 'noise', 'border'], choices=['dark', 'noise', 'border'])
+    args = parser.parse_args()
+
+    with open(args.labels) as f:
+        labels = json.load(f)
+    crops = labeled_crops(args.video, labels)
+    template = cv2.imread(args.template, cv2.IMREAD_GRAYSCALE)
+    if not crops or template is None:
+        print(f"Nothing to score (crops: {len(crops)}, template: {args.template})")
+        return
+
+    cap = cv2.VideoCapture(args.video)
+    scale = MATCHUP_TEMPLATE_HEIGHT / int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    emblem = [crop for _, rank, crop in crops if rank]
+    empty = [crop for _, rank, crop in crops if not rank]
+    max_empty = max((prefilter_score(crop, template, scale) for crop in empty), default=float('nan'))
+    print(f"{args.video}: {len(emblem)} emblem / {len(empty)} empty frames, threshold {args.threshold}, "
+          f"best empty-frame score {max_empty:.3f}")
+    print(f"{'overlay':<8} {'cover':>6} {'min score':>10} {'pass':>8}")
+    print("-" * 36)
+
+    rng = np.random.default_rng(0)
+    runs = [('none', 0.0)] + [(style, cover) for style in args.styles for cover in args.cover if cover > 0]
+    for style, cover in runs:
+        scores = [prefilter_score(cam_overlay(crop, cover, style, rng) if cover else crop, template, scale)
+                  for crop in emblem]
+        passed = sum(score >= args.threshold for score in scores)
+        print(f"{style:<8} {cover:>6.2f} {min(scores):>10.3f} {passed:>4}/{len(scores):<3}")
+    print("pass: emblem frames the prefilter lets through to the emblem scan; the rest are dropped for good")
+
+
+if __name__ == '__main__':
+    main()
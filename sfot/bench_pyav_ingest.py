@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark: in-process PyAV ingestion vs the FFmpeg subprocess pipe
+
+Both paths decode the nameplate crop of one range of a local video and keep
+frames with KeyframeSampler, the way SFOTProcessor's pyav_worker and
+ffmpeg_worker do. The subprocess path is timed without ffmpeg_worker's startup
+sleeps (2s for streamlink, 0.5s for FFmpeg), so its numbers are a lower bound.
+
+    python bench_pyav_ingest.py test_data/<vod>/480p.mp4 --start 0 --end 600
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import cv2
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from frame_reader import RawFrameReader, JPEGStreamDemuxer, ShowinfoPTSReader, KeyframeSampler
+from pyav_decoder import PyAVDecoder
+
+# Profile crop region (fractions of the frame)
+CROP_PERCENT = [0.005859375, 0.5208333333333334, 0.2802734375, 0.20833333333333334]
+
+
+def crop_pixels(width: int, height: int):
+    """(w, h, x, y) like SFOTProcessor.percent_to_pixels"""
+    x_pct, y_pct, w_pct, h_pct = CROP_PERCENT
+    return int(w_pct * width), int(h_pct * height), int(x_pct * width), int(y_pct * height)
+
+
+def cpu_seconds() -> float:
+    """User + system CPU of this process and its finished children"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run_subprocess(path: str, crop, start: float, end: float, frame_rate: float, keyframes_only: bool,
+                   output_format: str):
+    """ffmpeg_worker's pipeline: FFmpeg crops and pipes frames, showinfo supplies timestamps"""
+    w, h, x, y = crop
+    sampler = KeyframeSampler(frame_rate)
+    filters = []
+    if not keyframes_only:
+        filters.append(f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{sampler.interval - 0.001:.3f})'")
+    filters += [f'crop={w}:{h}:{x}:{y}:exact=1', 'showinfo=checksum=0']
+    output_args = ['-f', 'rawvideo', '-pix_fmt', 'bgr24'] if output_format == 'rawvideo' else \
+        ['-f', 'image2pipe', '-vcodec', 'mjpeg']
+    cmd = ['ffmpeg', *(['-skip_frame', 'nokey'] if keyframes_only else []),
+           '-ss', str(start), '-i', path, '-t', str(end - start),
+           '-vf', ','.join(filters), '-fps_mode', 'passthrough', *output_args,
+           '-loglevel', 'level+info', 'pipe:1']
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=65536)
+    pts_reader = ShowinfoPTSReader(proc.stderr).start()
+    reader = RawFrameReader(proc.stdout, w, h, pool_size=4) if output_format == 'rawvideo' else \
+        JPEGStreamDemuxer(proc.stdout)
+
+    kept = []
+    while reader.read_frame() is not None:
+        entry = pts_reader.next_pts()
+        if entry is None or entry[0] is None:
+            continue
+        # -ss before -i: PTS count from start, the first keyframe may come a GOP later
+        timestamp = start + entry[0]
+        if sampler.accept(timestamp):
+            kept.append(round(timestamp, 2))
+    proc.wait()
+    return kept, reader.frames_read
+
+
+def run_pyav(path: str, crop, start: float, end: float, frame_rate: float, keyframes_only: bool):
+    """pyav_worker's pipeline: sampler decides on packet timestamps, only kept frames are decoded
+
+    Kept timestamps are those of frames that actually came out of the decoder
+    (including the ones only the final flush releases), not of admitted packets.
+    """
+    sampler = KeyframeSampler(frame_rate) if keyframes_only else \
+        KeyframeSampler(frame_rate, tolerance=0.001 * frame_rate)
+    decoder = PyAVDecoder(path, crop, keyframes_only=keyframes_only)
+    decoder.seek(start)
+    admitted, kept = [], []
+
+    def keep(frames):
+        for frame_time, frame in frames:
+            decoder.crop(frame)
+            kept.append(round(frame_time, 2))
+
+    for timestamp, packet in decoder.packets():
+        if timestamp >= end:
+            break
+        if keyframes_only:
+            if timestamp < start or not sampler.accept(timestamp):
+                decoder.skip()
+                continue
+            admitted.append(round(timestamp, 2))
+            keep(decoder.decode(packet))
+        else:
+            keep((t, f) for t, f in decoder.decode(packet) if start <= t < end and sampler.accept(t))
+    keep((t, f) for t, f in decoder.flush() if keyframes_only or (start <= t < end and sampler.accept(t)))
+    decoder.close()
+
+    if keyframes_only and sorted(kept) != admitted:
+        print(f"  WARNING: {len(admitted)} keyframes admitted, {len(kept)} decoded")
+    return sorted(kept), decoder.frames_decoded
+
+
+def measure(fn, *args):
+    wall, cpu = time.perf_counter(), cpu_seconds()
+    result = fn(*args)
+    return result, time.perf_counter() - wall, cpu_seconds() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PyAV ingestion against the FFmpeg subprocess pipe')
+    parser.add_argument('video', help='Local video file (e.g. test_data/<vod>/480p.mp4)')
+    parser.add_argument('--start', type=float, default=0)
+    parser.add_argument('--end', type=float, default=600)
+    parser.add_argument('--frame-rate', type=float, default=0.5, help='Sampled frames per second')
+    parser.add_argument('--all-frames', action='store_true', help='Decode every frame, not only keyframes')
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    crop = crop_pixels(width, height)
+    keyframes_only = not args.all_frames
+
+    print(f"{args.video}: {width}x{height}, crop {crop[0]}x{crop[1]}, [{args.start:g}-{args.end:g}]s, "
+          f"{args.frame_rate:g} fps, {'keyframes only' if keyframes_only else 'all frames'}")
+    print(f"{'path':<22} {'wall':>8} {'cpu':>8} {'frames':>8} {'kept':>6}   (frames: out of the pipe / decoder)")
+    print("-" * 56)
+
+    runs = [
+        ('ffmpeg pipe rawvideo', run_subprocess, 'rawvideo'),
+        ('ffmpeg pipe mjpeg', run_subprocess, 'mjpeg'),
+        ('pyav in-process', run_pyav, None),
+    ]
+    reference = None
+    for name, fn, output_format in runs:
+        extra = (output_format,) if output_format else ()
+        (kept, decoded), wall, cpu = measure(fn, args.video, crop, args.start, args.end, args.frame_rate,
+                                             keyframes_only, *extra)
+        print(f"{name:<22} {wall:>7.2f}s {cpu:>7.2f}s {decoded:>8} {len(kept):>6}")
+        if reference is None:
+            reference = kept
+        elif kept != reference:
+            print(f"  WARNING: kept timestamps differ from the first path "
+                  f"({len(set(kept) ^ set(reference))} mismatches)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FFTTemplateMatcher vs the per-template cv2.matchTemplate loop
+
+Samples nameplate crops from a local video and scores every rank emblem
+template (and the right-edge template, with its TM_SQDIFF) both ways,
+reporting time per frame and how far the FFT scores stray from OpenCV's.
+Only positions that could matter are compared: confidence >= 0.3 for the
+normalized methods. Below that are near-flat windows, where OpenCV's float32
+sums lose most of their precision (the FFT matcher works in float64) and
+OpenCV reports inf/nan or 0 where the FFT matcher reports the worst score.
+
+    python bench_template_matcher.py test_data/<vod>/480p.mp4 --resolution 480p
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from emblem_detector import EmblemDetector
+from fft_matcher import FFTTemplateMatcher
+from right_edge_detector import RightEdgeDetector
+
+MIN_CONFIDENCE = 0.3  # Scores compared (normalized methods)
+
+# Profile crop region (fractions of the frame)
+CROP_PERCENT = [0.005859375, 0.5208333333333334, 0.2802734375, 0.20833333333333334]
+
+
+def sample_crops(path: str, start: float, end: float, interval: float):
+    """Nameplate crops every `interval` seconds, cropped like SFOTProcessor.percent_to_pixels"""
+    cap = cv2.VideoCapture(path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    x_pct, y_pct, w_pct, h_pct = CROP_PERCENT
+    x, y = math.floor(x_pct * width), math.floor(y_pct * height)
+    w, h = min(math.ceil(w_pct * width), width - x), min(math.ceil(h_pct * height), height - y)
+
+    crops = []
+    position = start
+    while position < end:
+        cap.set(cv2.CAP_PROP_POS_MSEC, position * 1000)
+        ok, frame = cap.read()
+        if not ok:
+            break
+        crops.append(np.ascontiguousarray(frame[y:y + h, x:x + w]))
+        position += interval
+    cap.release()
+    return crops
+
+
+def opencv_loop(frame: np.ndarray, templates, method: int):
+    results = {}
+    for name, (template, mask) in templates.items():
+        if mask is not None:
+            results[name] = cv2.matchTemplate(frame, template, method, mask=mask)
+        else:
+            results[name] = cv2.matchTemplate(frame, template, method)
+    return results
+
+
+def compare(label: str, crops, templates, method: int):
+    """Time both paths over crops and report the largest score difference where it matters"""
+    matcher = FFTTemplateMatcher(templates, method)
+    matcher.match_all(crops[0])  # Build the cached template spectra outside the timing
+
+    start = time.perf_counter()
+    reference = [opencv_loop(crop, templates, method) for crop in crops]
+    opencv_ms = (time.perf_counter() - start) / len(crops) * 1000
+
+    start = time.perf_counter()
+    fft = [matcher.match_all(crop) for crop in crops]
+    fft_ms = (time.perf_counter() - start) / len(crops) * 1000
+
+    worst = 0.0
+    best_moved = 0
+    pick = np.argmin if matcher.lower_better else np.argmax
+    for ref_maps, fft_maps in zip(reference, fft):
+        for name, ref in ref_maps.items():
+            scores = fft_maps[name]
+            compared = np.isfinite(ref) & (scores != matcher.worst)
+            if method != cv2.TM_SQDIFF:
+                confidence = 1.0 - ref if matcher.lower_better else ref
+                compared &= confidence >= MIN_CONFIDENCE
+            if not compared.any():
+                continue
+            # Unnormalized SQDIFF is compared relative to its largest value
+            scale = max(float(np.abs(ref[compared]).max()), 1.0) if method == cv2.TM_SQDIFF else 1.0
+            worst = max(worst, float(np.abs(ref[compared] - scores[compared]).max()) / scale)
+            # A different best position only counts if OpenCV itself scores it differently (not a tie)
+            ref_best = np.where(compared, ref, matcher.worst).ravel()
+            if abs(ref_best[pick(ref_best)] - ref_best[pick(scores)]) / scale > 1e-4:
+                best_moved += 1
+
+    print(f"{label:<28} {opencv_ms:>9.2f} {fft_ms:>9.2f} {opencv_ms / fft_ms:>7.1f}x {worst:>11.2e} {best_moved:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the FFT template matcher against cv2.matchTemplate')
+    parser.add_argument('video', help='Local video file (e.g. test_data/<vod>/480p.mp4)')
+    parser.add_argument('--resolution', default='480p', help='Template set (360p, 480p, 720p, 1080p)')
+    parser.add_argument('--templates-dir', default=os.path.join(os.path.dirname(__file__), 'templates'))
+    parser.add_argument('--start', type=float, default=0)
+    parser.add_argument('--end', type=float, default=600)
+    parser.add_argument('--interval', type=float, default=5, help='Seconds between sampled frames')
+    args = parser.parse_args()
+
+    crops = sample_crops(args.video, args.start, args.end, args.interval)
+    if not crops:
+        print(f"No frames read from {args.video}")
+        return
+    detector = EmblemDetector(args.templates_dir, resolution=args.resolution)
+    emblems = {rank: (template, detector.template_masks.get(rank)) for rank, template in detector.templates.items()}
+    coarse = detector._get_coarse_templates(0.5)
+    gray_crops = [cv2.resize(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), None, fx=0.5, fy=0.5,
+                             interpolation=cv2.INTER_AREA) for crop in crops]
+    right_edge = RightEdgeDetector(args.templates_dir, resolution=args.resolution)
+
+    print(f"{args.video}: {len(crops)} crops of {crops[0].shape[1]}x{crops[0].shape[0]}, {args.resolution} templates")
+    print(f"{'bank':<28} {'opencv ms':>9} {'fft ms':>9} {'speedup':>8} {'max |diff|':>11} {'moved':>6}")
+    print("-" * 76)
+    compare('5 ranks, CCOEFF_NORMED', crops, emblems, cv2.TM_CCOEFF_NORMED)
+    compare('5 ranks, SQDIFF_NORMED', crops, emblems, cv2.TM_SQDIFF_NORMED)
+    compare('5 ranks gray @0.5 (pyramid)', gray_crops, coarse, cv2.TM_CCOEFF_NORMED)
+    if right_edge.template is not None:
+        compare('right edge, SQDIFF', crops, {'right_edge': (right_edge.template, right_edge.mask)}, cv2.TM_SQDIFF)
+    print("moved: result maps where the FFT's best position scores worse under OpenCV (ties don't count)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Local live HLS server for testing live mode: replays a VOD HLS directory as a
+live stream, appending one segment to a sliding-window playlist as each
+segment's duration elapses
+
+Make the VOD playlist with e.g.
+    ffmpeg -i test_data/<vod>/480p.mp4 -c copy -f hls -hls_time 2 \
+        -hls_playlist_type vod -hls_segment_type fmp4 /tmp/hls/v.m3u8
+then run
+    python live_hls_server.py /tmp/hls --start 90
+    LIVE_MODE=true HLS_PLAYLIST_URL=http://localhost:8770/live.m3u8 python src/sfot.py <chunk_id>
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from hls_fetcher import parse_media_playlist
+
+
+class LivePlaylist:
+    """The sliding window of segments released by `now`"""
+
+    def __init__(self, playlist_path: Path, start: float, window: int, speed: float, end: bool):
+        segments, self.target_duration, _ = parse_media_playlist(playlist_path.read_text(), '')
+        self.segments = [s for s in segments if s.start + s.duration > start]
+        self.init_uri = self.segments[0].init_uri if self.segments else None
+        self.window = window
+        self.speed = speed
+        self.end = end
+        self.started = time.time()
+        self.offset = self.segments[0].start if self.segments else 0.0
+
+    def render(self) -> str:
+        elapsed = (time.time() - self.started) * self.speed
+        # A segment is published once it has fully "aired"; always show at least one
+        released = [s for s in self.segments if s.start + s.duration - self.offset <= elapsed] or self.segments[:1]
+        visible = released[-self.window:]
+        finished = self.end and len(released) == len(self.segments)
+
+        lines = [
+            '#EXTM3U',
+            '#EXT-X-VERSION:7',
+            f'#EXT-X-TARGETDURATION:{int(round(self.target_duration))}',
+            f'#EXT-X-MEDIA-SEQUENCE:{visible[0].index if visible else 0}',
+        ]
+        if self.init_uri:
+            lines.append(f'#EXT-X-MAP:URI="{self.init_uri}"')
+        for segment in visible:
+            aired = self.started + (segment.start - self.offset) / self.speed
+            lines.append(f'#EXT-X-PROGRAM-DATE-TIME:{datetime.fromtimestamp(aired, timezone.utc).isoformat(timespec="milliseconds")}')
+            lines.append(f'#EXTINF:{segment.duration:.3f},')
+            lines.append(segment.uri)
+        if finished:
+            lines.append('#EXT-X-ENDLIST')
+        return '\n'.join(lines) + '\n'
+
+
+class LiveHandler(SimpleHTTPRequestHandler):
+    """Serves live.m3u8 from LivePlaylist and everything else from the HLS directory"""
+
+    def __init__(self, *args, live: LivePlaylist, **kwargs):
+        self.live = live
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] == '/live.m3u8':
+            body = self.live.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a VOD HLS directory as a live stream')
+    parser.add_argument('directory', help='Directory with the VOD media playlist and its segments')
+    parser.add_argument('--playlist', default='v.m3u8', help='VOD playlist file name')
+    parser.add_argument('--port', type=int, default=8770)
+    parser.add_argument('--start', type=float, default=0.0, help='VOD position (seconds) the stream starts at')
+    parser.add_argument('--window', type=int, default=6, help='Segments listed in the live playlist')
+    parser.add_argument('--speed', type=float, default=1.0, help='Playback speed (2 = segments arrive twice as fast)')
+    parser.add_argument('--end', action='store_true', help='Add EXT-X-ENDLIST once every segment is out')
+    args = parser.parse_args()
+
+    directory = Path(args.directory)
+    live = LivePlaylist(directory / args.playlist, args.start, args.window, args.speed, args.end)
+    if not live.segments:
+        print(f"No segments after {args.start}s in {directory / args.playlist}")
+        return
+
+    handler = partial(LiveHandler, live=live, directory=str(directory))
+    server = ThreadingHTTPServer(('', args.port), handler)
+    print(f"Live playlist: http://localhost:{args.port}/live.m3u8 "
+          f"({len(live.segments)} segments from {args.start:g}s, {args.speed:g}x)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Detection context - what each detection stage found in one frame
+
+FrameProcessor creates one per frame and hands it to the detectors, which
+record their best matches, scores and score maps as they go. Debug
+visualizations and later stages read it instead of running the same
+template matches again.
+"""
+
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# What template matching runs on: all of BGR, luma, or one colour channel
+CHANNEL_MODES = ('bgr', 'luma', 'b', 'g', 'r')
+
+
+def to_channels(image: np.ndarray, channels: str) -> np.ndarray:
+    """
+    Convert a BGR image (frame or template) to the matching channel mode
+
+    Args:
+        image: BGR image; single-channel images are returned as they are
+        channels: One of CHANNEL_MODES
+
+    Returns:
+        image itself for "bgr", otherwise a contiguous single-channel uint8 image
+    """
+    if channels == 'bgr' or image.ndim == 2:
+        return image
+    if channels == 'luma':
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return np.ascontiguousarray(image[:, :, 'bgr'.index(channels)])
+
+
+class EmblemMatch(NamedTuple):
+    """Best position of one rank template (or the detected emblem)"""
+    rank: Optional[str]
+    bbox: Optional[Tuple[int, int, int, int]]  # (x, y, w, h) in frame pixels
+    confidence: float
+
+
+class RightEdgeMatch(NamedTuple):
+    """Best position of the right-edge template"""
+    x: Optional[int]  # Right edge x, None if below threshold
+    location: Tuple[int, int]  # Template top-left (x, y) in frame pixels
+    size: Tuple[int, int]  # Template (w, h)
+    confidence: float
+
+
+class ScoreMap(NamedTuple):
+    """A matchTemplate result map and the frame pixel its (0, 0) corresponds to"""
+    origin: Tuple[int, int]
+    scores: np.ndarray
+
+
+class DetectionContext:
+    """Per-frame record of every detection stage's matches"""
+
+    def __init__(self, frame_shape: Tuple[int, ...]):
+        """
+        Args:
+            frame_shape: Shape of the frame the stages run on
+        """
+        self.frame_shape = frame_shape
+        self.prefilter_score: Optional[float] = None
+        self.emblem: Optional[EmblemMatch] = None  # Final emblem decision
+        self.emblem_search: Optional[str] = None  # "track", "full", "roi" or "fallback"
+        self.track: Optional[str] = None  # Tracking-mode window check: "hit" or "lost" (then searched again)
+        self.rank_matches: Dict[str, EmblemMatch] = {}  # Best position per rank (last search)
+        self.rank_maps: Dict[str, ScoreMap] = {}  # Full-resolution score maps per rank (last search)
+        self.right_edge: Optional[RightEdgeMatch] = None
+        self.right_edge_map: Optional[ScoreMap] = None
+        self._planes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # channels -> (source frame, converted)
+
+    def plane(self, frame: np.ndarray, channels: str) -> np.ndarray:
+        """to_channels(frame, channels), converted once per frame for all stages"""
+        cached = self._planes.get(channels)
+        if cached is None or cached[0] is not frame:
+            cached = (frame, to_channels(frame, channels))
+            self._planes[channels] = cached
+        return cached[1]
+
+    def clear_ranks(self):
+        """Forget per-rank results before a new emblem search over the same frame"""
+        self.rank_matches = {}
+        self.rank_maps = {}
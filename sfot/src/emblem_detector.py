@@ -5,30 +5,158 @@ Uses template matching for emblem detection
 """
 
 import cv2
+import json
+import os
 import numpy as np
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import logging
 
+from detection_context import CHANNEL_MODES, DetectionContext, EmblemMatch, ScoreMap, to_channels
+from fft_matcher import FFTTemplateMatcher
+from template_bank import TemplateBank, resolution_height
+
+
+class EmblemLocationPrior:
+    """Where the emblem has been found for one SFOT profile and streamer
+
+    For a given profile the emblem sits in nearly the same place in every
+    matchup, so once a few detections agree, detect_emblem only needs to
+    search a window around them. Positions are kept as bbox centres in
+    fractions of the cropped frame, so a prior learned at one rendition (or
+    with the small templates) carries over to every other. With a path the
+    prior is saved after each detection and loaded by later chunks.
+    """
+
+    MAX_POSITIONS = 50  # Most recent detections kept; older outliers age out
+
+    def __init__(self, path: Optional[str] = None, min_hits: int = 3):
+        """Initialize prior
+
+        Args:
+            path: JSON file to load from and save to (None = this process only)
+            min_hits: Detections needed before roi() narrows the search
+        """
+        self.path = Path(path) if path else None
+        self.min_hits = min_hits
+        self.positions: List[Tuple[float, float]] = []
+        self.logger = logging.getLogger(__name__)
+
+        if self.path and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+                self.positions = [tuple(p) for p in data['positions']][-self.MAX_POSITIONS:]
+                self.logger.info(f"Loaded emblem location prior ({len(self.positions)} detections) from {self.path}")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"Ignoring unreadable emblem prior {self.path}: {e}")
+
+    @property
+    def trusted(self) -> bool:
+        return len(self.positions) >= self.min_hits
+
+    def observe(self, bbox: Tuple[int, int, int, int], frame_shape: Tuple[int, ...]):
+        """Record a detection (bbox in pixels of a frame of frame_shape)"""
+        x, y, w, h = bbox
+        frame_h, frame_w = frame_shape[:2]
+        self.positions.append((round((x + w / 2) / frame_w, 4), round((y + h / 2) / frame_h, 4)))
+        del self.positions[:-self.MAX_POSITIONS]
+        self.save()
+
+    def roi(self, frame_shape: Tuple[int, ...], template_size: Tuple[int, int],
+            margin: float = 0.5) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Search window covering every recorded position
+
+        Args:
+            frame_shape: Shape of the frame to search
+            template_size: (w, h) of the largest template
+            margin: Extra padding on each side, in template sizes
+
+        Returns:
+            (x0, y0, x1, y1) in pixels, or None until the prior is trusted
+        """
+        if not self.trusted:
+            return None
+        frame_h, frame_w = frame_shape[:2]
+        template_w, template_h = template_size
+        xs = [fx * frame_w for fx, _ in self.positions]
+        ys = [fy * frame_h for _, fy in self.positions]
+        pad_x = template_w * (0.5 + margin)
+        pad_y = template_h * (0.5 + margin)
+        x0, x1 = max(0, int(min(xs) - pad_x)), min(frame_w, int(max(xs) + pad_x) + 1)
+        y0, y1 = max(0, int(min(ys) - pad_y)), min(frame_h, int(max(ys) + pad_y) + 1)
+        if x1 - x0 < template_w or y1 - y0 < template_h:
+            return None
+        return x0, y0, x1, y1
+
+    def save(self):
+        """Write the prior atomically (no-op without a path)"""
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps({
+                'positions': self.positions,
+                'updated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            }))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not save emblem prior {self.path}: {e}")
+
+
 class EmblemDetector:
     """Detect and remove rank emblems using template matching"""
 
     RANKS = ['bronze', 'silver', 'gold', 'diamond', 'legend']
 
     def __init__(self, templates_dir: str = "templates", resolution: str = "480p",
-                 old_templates: bool = False, template_method: str = 'TM_CCOEFF_NORMED'):
+                 old_templates: bool = False, template_method: str = 'TM_CCOEFF_NORMED',
+                 pyramid_scale: Optional[float] = None, pyramid_radius: int = 2, matcher: str = 'opencv',
+                 track_margin: Optional[float] = None, track_min_ratio: float = 0.9, channels: str = 'bgr',
+                 template_bank: Optional[TemplateBank] = None):
         """Initialize with emblem templates
 
         Args:
             templates_dir: Directory containing emblem templates
-            resolution: Resolution to use for templates (360p, 480p, 720p, 1080p)
+            resolution: Resolution to use for templates (360p, 480p, 720p, 1080p;
+                any other height, e.g. 936p, needs template_bank)
             old_templates: Use underscore-prefixed templates for older VODs
             template_method: OpenCV template matching method
+            pyramid_scale: Match coarse-to-fine: locate each template on the frame
+                downscaled by this factor, then verify at full resolution around
+                that spot only (None = full-resolution search everywhere)
+            pyramid_radius: Slack around the coarse location, in coarse pixels
+            matcher: "opencv" (one cv2.matchTemplate per rank) or "fft" (all ranks
+                from shared frame spectra, see FFTTemplateMatcher) for whole-frame
+                and coarse searches; pyramid verification windows always use OpenCV
+            track_margin: Tracking mode: after a detection, the next frame is only
+                checked for the same rank in a window this many template sizes
+                around it (None = every frame is searched from scratch)
+            track_min_ratio: Keep tracking while the confidence stays at or above
+                this fraction of the one the track was acquired with
+            channels: Match on "bgr", "luma" or one colour channel ("b", "g", "r");
+                templates are converted once here, frames once per frame
+            template_bank: Take templates from this bank (hand-cut or derived for
+                the resolution's height) instead of {rank}_{resolution}.png only
         """
+        if channels not in CHANNEL_MODES:
+            raise ValueError(f"Unknown emblem matching channels: {channels}")
         self.templates_dir = Path(templates_dir)
         self.resolution = resolution
         self.old_templates = old_templates
         self.template_method = template_method
+        self.pyramid_scale = pyramid_scale if pyramid_scale and 0 < pyramid_scale < 1 else None
+        self.pyramid_radius = max(1, int(pyramid_radius))
+        self.matcher = matcher
+        self.channels = channels
+        self.template_bank = template_bank
+        self.track_margin = track_margin
+        self.track_min_ratio = track_min_ratio
+        self._track: Optional[EmblemMatch] = None  # Last emblem, with its confidence at acquisition
+        self._track_shape: Optional[Tuple[int, ...]] = None
+        self.track_stats = {'acquired': 0, 'tracked': 0, 'lost': 0}
         self.logger = logging.getLogger(__name__)
 
         # Configure template matching method
@@ -48,12 +176,25 @@ class EmblemDetector:
         # Storage for templates
         self.templates = {}
         self.template_masks = {}
+        self._coarse_templates = {}  # scale -> {rank: (gray template, mask)}
+        self._fft_matchers = {}  # scale (None = full resolution) -> FFTTemplateMatcher
 
         self._load_templates()
 
     def _load_templates(self):
         """Load all rank emblem templates"""
+        frame_height = resolution_height(self.resolution)
         for rank in self.RANKS:
+            if self.template_bank is not None and frame_height and not self.old_templates:
+                loaded = self.template_bank.get(rank, frame_height)
+                if loaded is None:
+                    self.logger.warning(f"No {rank} template for {self.resolution}")
+                    continue
+                self.templates[rank] = to_channels(loaded.image, self.channels)
+                self.template_masks[rank] = loaded.mask
+                self.logger.info(f"Loaded {rank} emblem template ({self.channels}) from {loaded.source}")
+                continue
+
             if self.old_templates:
                 template_path = self.templates_dir / f"_{rank}_{self.resolution}.png"
             else:
@@ -71,73 +212,337 @@ class EmblemDetector:
                         template = template_bgra
                         self.template_masks[rank] = None
 
-                    self.templates[rank] = template
+                    self.templates[rank] = to_channels(template, self.channels)
                     mask_info = "with mask" if self.template_masks[rank] is not None else "without mask"
-                    self.logger.info(f"Loaded {rank} emblem template {mask_info} from {template_path.name}")
+                    self.logger.info(f"Loaded {rank} emblem template {mask_info} ({self.channels}) from {template_path.name}")
                 else:
                     self.logger.warning(f"Failed to load {rank} template")
             else:
                 self.logger.warning(f"Template not found: {template_path}")
 
-    def detect_emblem(self, frame: np.ndarray, threshold: float = 0.5) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
+    @property
+    def max_template_size(self) -> Tuple[int, int]:
+        """(w, h) covering every loaded template"""
+        if not self.templates:
+            return 0, 0
+        return (max(t.shape[1] for t in self.templates.values()),
+                max(t.shape[0] for t in self.templates.values()))
+
+    def detect_emblem(self, frame: np.ndarray, threshold: float = 0.5,
+                      roi: Optional[Tuple[int, int, int, int]] = None,
+                      context: Optional[DetectionContext] = None) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
         """
         Detect which emblem is present using template matching
 
         Args:
-            frame: Input frame (color BGR)
+            frame: Input frame (color BGR, converted to the matching channels here)
             threshold: Matching confidence threshold (0-1)
+            roi: Optional (x0, y0, x1, y1) window to search instead of the whole
+                frame (see EmblemLocationPrior); the bbox is still in frame pixels
+            context: Optional per-frame context; gets every rank's best match and
+                full-resolution score map (replacing those of an earlier search)
+
+        In tracking mode (track_margin set) a frame following a detection is
+        first checked around the tracked emblem only; see _follow_track.
 
         Returns:
             (rank_name, (x, y, w, h), confidence) or (None, None, 0.0) if no match
         """
+        frame = context.plane(frame, self.channels) if context is not None else to_channels(frame, self.channels)
+        if context is not None:
+            context.clear_ranks()
+        if self._track is not None:
+            tracked = self._follow_track(frame, threshold, context)
+            if tracked is not None:
+                return tracked
+
+        rank, bbox, confidence = self._search(frame, threshold, roi, context)
+        if self.track_margin is not None and rank is not None:
+            self._track = EmblemMatch(rank, bbox, confidence)
+            self._track_shape = frame.shape
+            self.track_stats['acquired'] += 1
+        return rank, bbox, confidence
+
+    def _follow_track(self, frame: np.ndarray, threshold: float,
+                      context: Optional[DetectionContext] = None) -> Optional[Tuple[str, Tuple[int, int, int, int], float]]:
+        """
+        Look for the tracked emblem around its last position, with its own rank only
+
+        Matchup screens span several sampled frames, so the emblem found in
+        the previous one is almost always in the same place. The track is
+        dropped (and the caller does a full search) once the confidence falls
+        below threshold or track_min_ratio of the acquiring detection -
+        another rank's template can reach ~0.55 on a neighbouring emblem.
+
+        Returns:
+            (rank, bbox, confidence), or None when the track was lost
+        """
+        rank, (x, y, w, h), acquired = self._track
+        if frame.shape == self._track_shape:
+            frame_h, frame_w = frame.shape[:2]
+            pad = max(1, round(max(w, h) * self.track_margin))
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(frame_w, x + w + pad), min(frame_h, y + h + pad)
+            result = self._match_map(frame[y0:y1, x0:x1], rank)
+            match = self._best(result) if result is not None else None
+            if match is not None and match[2] >= threshold and match[2] >= self.track_min_ratio * acquired:
+                _, loc, confidence = match
+                bbox = (loc[0] + x0, loc[1] + y0, w, h)
+                self._track = EmblemMatch(rank, bbox, acquired)
+                self.track_stats['tracked'] += 1
+                if context is not None:
+                    context.rank_matches[rank] = EmblemMatch(rank, bbox, confidence)
+                    context.rank_maps[rank] = ScoreMap((x0, y0), result)
+                    context.track = 'hit'
+                return rank, bbox, confidence
+
+        self._track = None
+        self.track_stats['lost'] += 1
+        if context is not None:
+            context.track = 'lost'
+        return None
+
+    def reset_track(self):
+        """Forget the tracked emblem (e.g. when frames stop being consecutive)"""
+        self._track = None
+
+    def _search(self, frame: np.ndarray, threshold: float, roi: Optional[Tuple[int, int, int, int]] = None,
+                context: Optional[DetectionContext] = None) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
+        """Untracked detect_emblem: every rank over roi (or the whole frame)"""
+        origin = (0, 0)
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            frame = frame[y0:y1, x0:x1]
+            origin = (x0, y0)
+
+        if self.pyramid_scale is not None:
+            return self._detect_pyramid(frame, threshold, origin, context)
+
         best_rank = None
         best_bbox = None
         best_score = -999 if not self.lower_better else 999
         best_confidence = 0.0
 
+        results = self._match_all(frame)
         for rank in self.RANKS:
-            if rank not in self.templates:
+            if rank not in results:
                 continue
 
             template = self.templates[rank]
-            mask = self.template_masks.get(rank)
-
-            if template.shape[0] > frame.shape[0] or template.shape[1] > frame.shape[1]:
+            match = self._best(results[rank])
+            if match is None:
                 continue
+            score, loc, confidence = match
+            h, w = template.shape[:2]
+            bbox = (loc[0] + origin[0], loc[1] + origin[1], w, h)
+            if context is not None:
+                context.rank_matches[rank] = EmblemMatch(rank, bbox, confidence)
+                context.rank_maps[rank] = ScoreMap(origin, results[rank])
+
+            is_better = (not self.lower_better and score > best_score) or \
+                       (self.lower_better and score < best_score)
+
+            if is_better and confidence >= threshold:
+                best_score = score
+                best_confidence = confidence
+                best_rank = rank
+                best_bbox = bbox
+
+        return best_rank, best_bbox, best_confidence
+
+    def _match_all(self, image: np.ndarray, scale: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Result maps of every rank template that fits in image
+
+        Args:
+            image: Frame to search (in the matching channels at full resolution,
+                the coarse plane when scale is set)
+            scale: Use the coarse templates shrunk by this factor (None = full resolution)
+
+        Returns:
+            rank -> cv2.matchTemplate-style result map
+        """
+        templates = self._get_coarse_templates(scale) if scale is not None else \
+            {rank: (template, self.template_masks.get(rank)) for rank, template in self.templates.items()}
 
+        if self.matcher == 'fft':
+            if scale not in self._fft_matchers:
+                self._fft_matchers[scale] = FFTTemplateMatcher(templates, self.cv_method)
+            return self._fft_matchers[scale].match_all(image)
+
+        results = {}
+        for rank, (template, mask) in templates.items():
+            if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+                continue
             try:
                 if mask is not None:
-                    result = cv2.matchTemplate(frame, template, self.cv_method, mask=mask)
+                    results[rank] = cv2.matchTemplate(image, template, self.cv_method, mask=mask)
                 else:
-                    result = cv2.matchTemplate(frame, template, self.cv_method)
+                    results[rank] = cv2.matchTemplate(image, template, self.cv_method)
+            except Exception as e:
+                self.logger.error(f"Template matching error for {rank}: {e}")
+        return results
+
+    def _match_map(self, image: np.ndarray, rank: str) -> Optional[np.ndarray]:
+        """
+        Full-resolution cv2.matchTemplate of one rank's template over image
 
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        Returns:
+            Result map, or None on error
+        """
+        template = self.templates[rank]
+        mask = self.template_masks.get(rank)
+        try:
+            if mask is not None:
+                return cv2.matchTemplate(image, template, self.cv_method, mask=mask)
+            return cv2.matchTemplate(image, template, self.cv_method)
+        except Exception as e:
+            self.logger.error(f"Template matching error for {rank}: {e}")
+            return None
+
+    def _best(self, result: np.ndarray) -> Optional[Tuple[float, Tuple[int, int], float]]:
+        """
+        Best position of a result map
 
-                if self.lower_better:
-                    score = min_val
-                    loc = min_loc
-                    confidence = 1.0 - min_val
-                else:
-                    score = max_val
-                    loc = max_loc
-                    confidence = max_val
+        Returns:
+            (score, (x, y), confidence), or None if no position has a finite score
+        """
+        if not self._drop_non_finite(result):
+            return None
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+        if self.lower_better:
+            return min_val, min_loc, 1.0 - min_val
+        return max_val, max_loc, max_val
+
+    def _drop_non_finite(self, result: np.ndarray) -> bool:
+        """
+        Overwrite inf/nan scores with the worst possible one, in place
 
-                is_better = (not self.lower_better and score > best_score) or \
-                           (self.lower_better and score < best_score)
+        Masked matching divides by ~0 over flat areas of the frame; left in,
+        those positions beat every real emblem with "infinite" confidence.
 
-                if is_better and confidence >= threshold:
-                    best_score = score
-                    best_confidence = confidence
-                    best_rank = rank
-                    h, w = template.shape[:2]
-                    best_bbox = (loc[0], loc[1], w, h)
+        Returns:
+            False if no position has a finite score
+        """
+        finite = np.isfinite(result)
+        if finite.all():
+            return True
+        if not finite.any():
+            return False
+        result[~finite] = 1.0 if self.lower_better else -1.0
+        return True
+
+    def _detect_pyramid(self, frame: np.ndarray, threshold: float, origin: Tuple[int, int] = (0, 0),
+                        context: Optional[DetectionContext] = None) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
+        """
+        Coarse-to-fine detect_emblem
+
+        Each rank's grayscale (or single-channel) template is matched once over
+        the downscaled frame; its best position there is then re-matched at full
+        resolution within pyramid_radius coarse pixels of it. Rank choice and
+        confidence come from the full-resolution pass, so thresholds mean the
+        same as in the exhaustive search. frame may be a window of the real
+        frame starting at origin; bboxes (and context entries) are offset by it.
+        """
+        scale = self.pyramid_scale
+        gray = self._coarse_plane(frame)
+        small = cv2.resize(gray, (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale))),
+                           interpolation=cv2.INTER_AREA)
+        frame_h, frame_w = frame.shape[:2]
+        pad = int(np.ceil(self.pyramid_radius / scale))
 
-            except Exception as e:
-                self.logger.error(f"Template matching error for {rank}: {e}")
+        best_rank = None
+        best_bbox = None
+        best_score = -999 if not self.lower_better else 999
+        best_confidence = 0.0
+
+        for rank, result in self._match_all(small, scale).items():
+            h, w = self.templates[rank].shape[:2]
+            coarse = self._best(result)
+            if h > frame_h or w > frame_w or coarse is None:
+                continue
+            coarse_x, coarse_y = coarse[1]
+
+            # Full-resolution window: every top-left position within pad of the coarse hit
+            x0 = min(max(0, round(coarse_x / scale) - pad), frame_w - w)
+            y0 = min(max(0, round(coarse_y / scale) - pad), frame_h - h)
+            x1 = min(frame_w, x0 + w + 2 * pad)
+            y1 = min(frame_h, y0 + h + 2 * pad)
+            result = self._match_map(frame[y0:y1, x0:x1], rank)
+            match = self._best(result) if result is not None else None
+            if match is None:
                 continue
+            score, loc, confidence = match
+            bbox = (loc[0] + x0 + origin[0], loc[1] + y0 + origin[1], w, h)
+            if context is not None:
+                context.rank_matches[rank] = EmblemMatch(rank, bbox, confidence)
+                context.rank_maps[rank] = ScoreMap((x0 + origin[0], y0 + origin[1]), result)
+
+            is_better = (not self.lower_better and score > best_score) or \
+                       (self.lower_better and score < best_score)
+            if is_better and confidence >= threshold:
+                best_score = score
+                best_confidence = confidence
+                best_rank = rank
+                best_bbox = bbox
 
         return best_rank, best_bbox, best_confidence
 
+    def detect_emblem_coarse(self, frame: np.ndarray, scale: float, threshold: float = 0.4) -> Tuple[Optional[str], float]:
+        """
+        Cheap emblem presence check on a downscaled frame (first pass of two-pass mode)
+
+        Matches grayscale templates shrunk by the same factor as the frame, so
+        each scan costs roughly scale^4 / 3 of a full-resolution one. Only says
+        whether an emblem is likely there - use detect_emblem for the bbox.
+
+        Args:
+            frame: Input frame (BGR or grayscale), already downscaled by `scale`
+            scale: Factor the frame was downscaled by (e.g. 0.5)
+            threshold: Matching confidence threshold (0-1), normally looser than
+                the full-resolution one so the coarse pass errs towards recall
+
+        Returns:
+            (rank_name, confidence) or (None, best_confidence) if no match
+        """
+        gray = self._coarse_plane(frame)
+
+        best_rank = None
+        best_confidence = 0.0
+        for rank, result in self._match_all(gray, scale).items():
+            match = self._best(result)
+            if match is None:
+                continue
+            confidence = match[2]
+            if confidence > best_confidence:
+                best_confidence = confidence
+                best_rank = rank
+
+        if best_confidence < threshold:
+            return None, best_confidence
+        return best_rank, best_confidence
+
+    def _coarse_plane(self, image: np.ndarray) -> np.ndarray:
+        """Single-channel image for coarse matching: grayscale in "bgr" mode, else the matching channel"""
+        if len(image.shape) == 2:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if self.channels == 'bgr' else to_channels(image, self.channels)
+
+    def _get_coarse_templates(self, scale: float):
+        """Coarse-plane templates (and masks) resized by `scale`, built once per scale"""
+        if scale not in self._coarse_templates:
+            scaled = {}
+            for rank, template in self.templates.items():
+                h, w = template.shape[:2]
+                size = (max(1, round(w * scale)), max(1, round(h * scale)))
+                gray = cv2.resize(self._coarse_plane(template), size, interpolation=cv2.INTER_AREA)
+                mask = self.template_masks.get(rank)
+                if mask is not None:
+                    mask = cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST)
+                scaled[rank] = (gray, mask)
+            self._coarse_templates[scale] = scaled
+        return self._coarse_templates[scale]
+
     def remove_emblem(self, frame: np.ndarray, threshold: float = 0.5, fill_value: int = 0) -> Tuple[np.ndarray, Optional[str]]:
         """
         Detect and remove emblem from frame by masking it out
@@ -170,13 +575,16 @@ class EmblemDetector:
 
         return result, rank
 
-    def create_debug_visualization(self, frame: np.ndarray, threshold: float = 0.5) -> np.ndarray:
+    def create_debug_visualization(self, frame: np.ndarray, threshold: float = 0.5,
+                                   context: Optional[DetectionContext] = None) -> np.ndarray:
         """
         Create a visualization showing detected emblem bounding box
 
         Args:
             frame: Input frame
             threshold: Detection threshold
+            context: Detection context of this frame; its emblem is drawn
+                instead of detecting again
 
         Returns:
             Visualization frame with bbox overlay
@@ -186,7 +594,10 @@ class EmblemDetector:
         else:
             vis = frame.copy()
 
-        rank, bbox, confidence = self.detect_emblem(frame, threshold)
+        if context is not None and context.emblem is not None:
+            rank, bbox, confidence = context.emblem
+        else:
+            rank, bbox, confidence = self.detect_emblem(frame, threshold)
 
         if bbox:
             x, y, w, h = bbox
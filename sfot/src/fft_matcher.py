@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+FFT template matcher - masked matchTemplate scores for a bank of templates at once
+
+cv2.matchTemplate with a mask falls back to a slow general path, and
+EmblemDetector runs it once per rank on every frame. The masked scores are
+all built from a few cross-correlations, so they can come from the
+frequency domain instead:
+
+    num(x)   = sum_c corr(I_c, W_c)      W = M*T (minus the masked mean for CCOEFF)
+    S1_c(x)  = corr(I_c, M)              masked window sum per channel
+    S2(x)    = corr(sum_c I_c^2, M)      masked window sum of squares
+
+The frame is transformed once (one DFT per channel plus one of the squared
+sum) and shared by every template; each template's W and M spectra are
+computed once per frame size and cached, so a frame costs 4 forward and
+3-5 inverse DFTs per template instead of OpenCV's per-template passes.
+
+Scores follow OpenCV's masked definitions for a binary mask, so results
+agree with cv2.matchTemplate(..., mask=...) to float rounding - except
+where OpenCV divides by a zero variance (flat areas) and returns inf/nan,
+which are reported here as the worst score instead.
+"""
+
+import logging
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+SUPPORTED_METHODS = (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED, cv2.TM_CCORR_NORMED, cv2.TM_CCOEFF_NORMED)
+
+
+class FFTTemplateMatcher:
+    """Masked template matching for several templates over the same frame"""
+
+    def __init__(self, templates: Dict[str, Tuple[np.ndarray, Optional[np.ndarray]]],
+                 method: int = cv2.TM_CCOEFF_NORMED):
+        """Prepare the template bank
+
+        Args:
+            templates: name -> (template, mask or None); all with the same
+                channel count (BGR or grayscale), masks binary
+            method: cv2.TM_SQDIFF, TM_SQDIFF_NORMED, TM_CCORR_NORMED or TM_CCOEFF_NORMED
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"Unsupported template matching method for the FFT matcher: {method}")
+        self.method = method
+        self.lower_better = method in (cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED)
+        self.worst = np.inf if method == cv2.TM_SQDIFF else (1.0 if self.lower_better else -1.0)
+        self.logger = logging.getLogger('sfot.fft_matcher')
+
+        self.names = list(templates)
+        self.sizes = []       # (h, w) per template
+        self.weights = []     # HxWxC float64: M*T, mean-removed under the mask for CCOEFF
+        self.masks = []       # HxW float64
+        self.pixels = []      # Mask pixel count
+        self.weight_energy = []  # sum(W^2) - the template side of the normalization
+        self.template_energy = []  # sum(M*T^2) - for SQDIFF and CCORR
+        channels = None
+        for name, (template, mask) in templates.items():
+            t = template.astype(np.float64)
+            if t.ndim == 2:
+                t = t[:, :, None]
+            if channels is None:
+                channels = t.shape[2]
+            elif t.shape[2] != channels:
+                raise ValueError(f"Template {name} has {t.shape[2]} channels, expected {channels}")
+            m = np.ones(t.shape[:2]) if mask is None else (mask > 0).astype(np.float64)
+            n = m.sum()
+            if method == cv2.TM_CCOEFF_NORMED:
+                means = (t * m[:, :, None]).sum(axis=(0, 1)) / max(n, 1.0)
+                w = (t - means) * m[:, :, None]
+            else:
+                w = t * m[:, :, None]
+            self.sizes.append(t.shape[:2])
+            self.weights.append(w)
+            self.masks.append(m)
+            self.pixels.append(n)
+            self.weight_energy.append(float((w * w).sum()))
+            self.template_energy.append(float((t * t * m[:, :, None]).sum()))
+        self.channels = channels or 1
+
+        self._spectra: Dict[Tuple[int, int], list] = {}
+
+    def _template_spectra(self, shape: Tuple[int, int]) -> list:
+        """Per template: ([weight spectrum per channel], mask spectrum) at one DFT size, cached"""
+        if shape not in self._spectra:
+            spectra = []
+            for w, m in zip(self.weights, self.masks):
+                h, wd = m.shape
+                padded = np.zeros(shape)
+                channels = []
+                for c in range(self.channels):
+                    padded[:h, :wd] = w[:, :, c]
+                    channels.append(cv2.dft(padded, nonzeroRows=h))
+                padded[:h, :wd] = m
+                spectra.append((channels, cv2.dft(padded, nonzeroRows=h)))
+            self._spectra[shape] = spectra
+            self.logger.debug(f"Cached template spectra for DFT size {shape}")
+        return self._spectra[shape]
+
+    def _correlate(self, frame_spectrum: np.ndarray, template_spectrum: np.ndarray, rows: int) -> np.ndarray:
+        """Cross-correlation from two spectra (first `rows` rows are valid)"""
+        return cv2.idft(cv2.mulSpectrums(frame_spectrum, template_spectrum, 0, conjB=True),
+                        flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE, nonzeroRows=rows)
+
+    def match_all(self, image: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score every template at every position of image
+
+        Args:
+            image: Frame with the templates' channel count
+
+        Returns:
+            name -> result map shaped like cv2.matchTemplate's ((H-h+1) x (W-w+1),
+            float32); templates larger than the image are left out
+        """
+        frame = image.astype(np.float64)
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        height, width = frame.shape[:2]
+
+        # Positions up to (H-h, W-w) never wrap around, so padding to the frame size is enough
+        shape = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+        padded = np.zeros(shape)
+        channel_spectra = []
+        for c in range(self.channels):
+            padded[:height, :width] = frame[:, :, c]
+            channel_spectra.append(cv2.dft(padded, nonzeroRows=height))
+        padded[:height, :width] = (frame * frame).sum(axis=2)
+        square_spectrum = cv2.dft(padded, nonzeroRows=height)
+
+        results = {}
+        for i, (weight_spectra, mask_spectrum) in enumerate(self._template_spectra(shape)):
+            h, w = self.sizes[i]
+            if h > height or w > width:
+                continue
+            rows, cols = height - h + 1, width - w + 1
+
+            num = sum(cv2.mulSpectrums(f, t, 0, conjB=True) for f, t in zip(channel_spectra, weight_spectra))
+            num = cv2.idft(num, flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE, nonzeroRows=rows)[:rows, :cols]
+            s2 = self._correlate(square_spectrum, mask_spectrum, rows)[:rows, :cols]
+
+            if self.method == cv2.TM_SQDIFF:
+                results[self.names[i]] = np.maximum(self.template_energy[i] - 2 * num + s2, 0).astype(np.float32)
+                continue
+
+            if self.method == cv2.TM_CCOEFF_NORMED:
+                frame_energy = s2
+                for f in channel_spectra:
+                    s1 = self._correlate(f, mask_spectrum, rows)[:rows, :cols]
+                    frame_energy = frame_energy - s1 * s1 / self.pixels[i]
+                template_energy = self.weight_energy[i]
+            else:
+                frame_energy = s2
+                template_energy = self.template_energy[i]
+            denominator = np.sqrt(np.maximum(frame_energy, 0) * template_energy)
+            # Zero variance under the mask: OpenCV divides by ~0 there
+            valid = denominator > 1e-6 * max(template_energy, 1.0)
+            if self.method == cv2.TM_SQDIFF_NORMED:
+                score = (self.template_energy[i] - 2 * num + s2) / np.where(valid, denominator, 1.0)
+            else:
+                score = num / np.where(valid, denominator, 1.0)
+            results[self.names[i]] = np.where(valid, score, self.worst).astype(np.float32)
+        return results
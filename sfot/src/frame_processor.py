@@ -5,14 +5,23 @@ import os
 import cv2
 import numpy as np
 from paddleocr import PaddleOCR
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, Union, Callable
 import logging
 import base64
+import bisect
 from PIL import Image
 import io
-from emblem_detector import EmblemDetector
+import re
+from detection_context import DetectionContext, EmblemMatch
+from emblem_detector import EmblemDetector, EmblemLocationPrior
 from right_edge_detector import RightEdgeDetector
+from template_bank import TemplateBank, resolution_height
+from ui_detector import UIPresenceDetector
 from telemetry import create_span, record_histogram, record_counter
+
+MATCHUP_TEMPLATE_HEIGHT = 480  # Video height matchup_template.png was cut at
+
+
 class FrameProcessor:
     """Process frames for matchup detection and OCR"""
     
@@ -51,6 +60,8 @@ class FrameProcessor:
         if 'template_path' in config['detection']:
             try:
                 self.matchup_template = cv2.imread(config['detection']['template_path'], 0)
+                if self.matchup_template is None:
+                    raise FileNotFoundError(config['detection']['template_path'])
                 self.logger.info(f"Loaded matchup template: {config['detection']['template_path']}")
             except Exception as e:
                 self.logger.warning(f"Could not load matchup template: {e}")
@@ -64,6 +75,34 @@ class FrameProcessor:
             '1080p60': '1080p'  # Use 1080p templates for 1080p60 too
         }
         template_resolution = resolution_map.get(quality, '480p')
+        # Template bank: hand-cut templates where they exist, derived from the masters
+        # for any other height - renditions outside the map (936p, 160p, 720p60) get
+        # templates for their own height instead of the 480p ones
+        self.template_bank_config = config.get('template_bank', {})
+        if self.template_bank_config.get('enabled', False) and quality not in resolution_map and resolution_height(quality):
+            template_resolution = f"{resolution_height(quality)}p"
+
+        # Matchup-screen prefilter: the matchup template (the nameplate's right-edge
+        # ornament, cut from a 480p frame) is matched on the grayscale frame scaled to
+        # 480p before any emblem scan. Skipped for profiles whose right edge can be
+        # covered (opaque or custom edge) - a rejected frame is never looked at again.
+        # Off by default: a cam over the ornament on any other profile loses the
+        # matchup that process_frame would record as no_right_edge (bench_prefilter.py).
+        self.prefilter_enabled = (config['detection'].get('prefilter', False) and self.matchup_template is not None
+                                  and not self.opaque_edge and self.custom_edge_percent is None)
+        self.prefilter_scale = MATCHUP_TEMPLATE_HEIGHT / int(template_resolution[:-1])
+        self._prefilter_template = self.matchup_template
+        if self.matchup_template is not None and self.prefilter_scale > 1:
+            # Lower than 480p: shrink the template instead of enlarging the frame
+            h, w = self.matchup_template.shape[:2]
+            self._prefilter_template = cv2.resize(
+                self.matchup_template,
+                (max(1, round(w / self.prefilter_scale)), max(1, round(h / self.prefilter_scale))),
+                interpolation=cv2.INTER_AREA)
+        # Frames dropped at each stage before OCR (plus how many came in)
+        self.stage_rejects = {'frames': 0, 'prefilter': 0, 'emblem': 0, 'interval': 0}
+        if self.prefilter_enabled:
+            self.logger.info(f"Matchup prefilter on (threshold={self.threshold}, scale={min(self.prefilter_scale, 1):.3f})")
 
         # Initialize emblem detector
         self.emblem_detector = None
@@ -73,15 +112,26 @@ class FrameProcessor:
                 templates_dir = emblem_config.get('templates_dir', 'templates/')
                 template_method = emblem_config.get('template_method', 'TM_CCOEFF_NORMED')
                 self.emblem_threshold = emblem_config.get('template_threshold', 0.5)
+                pyramid_config = emblem_config.get('pyramid', {})
+                tracking_config = emblem_config.get('tracking', {})
 
                 self.emblem_detector = EmblemDetector(
                     templates_dir,
                     resolution=template_resolution,
                     old_templates=self.old_templates,
-                    template_method=template_method
+                    template_method=template_method,
+                    pyramid_scale=pyramid_config.get('scale', 0.5) if pyramid_config.get('enabled', False) else None,
+                    pyramid_radius=pyramid_config.get('radius', 2),
+                    matcher=emblem_config.get('matcher', 'opencv'),
+                    track_margin=tracking_config.get('margin', 0.1) if tracking_config.get('enabled', False) else None,
+                    track_min_ratio=tracking_config.get('min_ratio', 0.9),
+                    channels=emblem_config.get('channels', 'bgr'),
+                    template_bank=self._template_bank(templates_dir)
                 )
 
                 self.logger.info(f"Initialized emblem detector with {template_resolution} templates (threshold={self.emblem_threshold})")
+                if self.emblem_detector.pyramid_scale is not None:
+                    self.logger.info(f"Coarse-to-fine emblem matching at scale {self.emblem_detector.pyramid_scale}")
 
                 # Log template dimensions for debugging
                 if hasattr(self.emblem_detector, 'templates'):
@@ -93,21 +143,57 @@ class FrameProcessor:
             except Exception as e:
                 self.logger.warning(f"Could not initialize emblem detector: {e}")
 
+        # Emblem tracking follows consecutive samples only: a frame more than 1.5
+        # sample intervals after the last tracked one (or before it) resets the track
+        frame_rate = config.get('processing', {}).get('frame_rate', 0.5)
+        self.track_max_gap = 1.5 / frame_rate if frame_rate > 0 else float('inf')
+        self._track_time: Optional[float] = None  # Time of the last frame the tracker saw
+
+        # Emblem location prior: search a small window where this profile's emblem
+        # has been before, full frame only while learning, on a periodic fallback, or
+        # when the frame shows the nameplate's right edge but the ROI has no emblem
+        self.emblem_prior = None
+        roi_config = config.get('emblem_detection', {}).get('roi', {})
+        self.roi_margin = roi_config.get('margin', 0.5)
+        self.roi_fallback_every = max(1, int(roi_config.get('fallback_every', 10)))
+        self.roi_fallback_on_edge = roi_config.get('fallback_on_edge', True) and self.matchup_template is not None
+        self._roi_misses_since_fallback = 0
+        self.roi_stats = {'roi_hits': 0, 'roi_misses': 0, 'fallbacks': 0, 'fallback_hits': 0, 'full_searches': 0}
+        if self.emblem_detector is not None and roi_config.get('enabled', False):
+            prior_path = None
+            prior_dir = roi_config.get('prior_dir')
+            if prior_dir:
+                key = f"{self.profile.get('profile_name', 'default')}__{self.streamer}"
+                prior_path = os.path.join(prior_dir, re.sub(r'[^A-Za-z0-9_.-]', '_', key) + '.json')
+            self.emblem_prior = EmblemLocationPrior(prior_path, min_hits=roi_config.get('min_hits', 3))
+
         # Initialize right edge detector
         self.right_edge_detector = None
         self.right_edge_crop_margin = 0.0
+        self.right_edge_band_margin = None  # Search only the emblem's row band when set
         if config.get('right_edge_detection', {}).get('enabled', True):
             try:
                 templates_dir = config.get('right_edge_detection', {}).get('templates_dir',
                                           config.get('emblem_detection', {}).get('templates_dir', 'templates/'))
-                self.right_edge_detector = RightEdgeDetector(templates_dir, resolution=template_resolution)
+                self.right_edge_detector = RightEdgeDetector(
+                    templates_dir, resolution=template_resolution,
+                    channels=config.get('right_edge_detection', {}).get('channels', 'bgr'),
+                    template_bank=self._template_bank(templates_dir))
                 self.right_edge_threshold = config.get('right_edge_detection', {}).get('threshold', 0.7)
+                band_config = config.get('right_edge_detection', {}).get('emblem_band', {})
+                self.right_edge_band_margin = band_config.get('margin', 0.25) if band_config.get('enabled', False) else None
                 # Crop margin: crop this % more to avoid edge artifacts (e.g., 10% = crop at x=90 if edge at x=100)
                 self.right_edge_crop_margin = config.get('right_edge_detection', {}).get('crop_margin_percent', 10) / 100.0
                 self.logger.info(f"Initialized right edge detector with {template_resolution} template (crop margin: {self.right_edge_crop_margin*100:.0f}%)")
             except Exception as e:
                 self.logger.warning(f"Could not initialize right edge detector: {e}")
 
+        # UI presence check for sparse probing (only when references are configured)
+        self.ui_detector = None
+        references_dir = config.get('sparse_probe', {}).get('reference_dir')
+        if references_dir:
+            self.ui_detector = UIPresenceDetector(references_dir)
+
         # Initialize PaddleOCR with mobile models (smallest footprint)
         self.ocr_confidence_threshold = 0.5
         try:
@@ -124,19 +210,28 @@ class FrameProcessor:
             self.logger.error(f"Failed to initialize PaddleOCR: {e}")
             raise
 
-        # Cache for performance
-        self.last_matchup_time = 0
+        # Accepted matchup timestamps (sorted). Frames can arrive out of order when
+        # sub-ranges are ingested in parallel, so the interval check looks both ways.
+        self.matchup_times = []
         self.min_matchup_interval = 10  # Minimum seconds between matchups
+
+        # Dual-rendition mode: called with a confirmed matchup's timestamp, returns the
+        # same keyframe from a higher rendition (same crop) to OCR, or None to use ours
+        self.ocr_frame_source: Optional[Callable[[float], Optional[np.ndarray]]] = None
     
-    def process_frame(self, frame_data: bytes, timestamp: int, vod_id: str, chunk_id: str) -> Optional[Dict[str, Any]]:
+    def process_frame(self, frame_data: Union[bytes, np.ndarray], timestamp: int, vod_id: str, chunk_id: str,
+                      frame_time: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Process a single frame for matchup detection
 
         Args:
-            frame_data: JPEG frame data
+            frame_data: JPEG frame data, or an already decoded BGR frame (rawvideo mode).
+                Decoded frames may be pooled buffers and are never retained past this call
             timestamp: Timestamp in seconds
             vod_id: VOD identifier
             chunk_id: Chunk uuid
+            frame_time: Exact frame PTS in seconds, used to find the keyframe in the
+                OCR rendition (defaults to timestamp)
 
         Returns:
             Detection result or None
@@ -147,12 +242,23 @@ class FrameProcessor:
             if frame is None:
                 return None
 
-            # Emblem detection first (5 template scans)
-            detected_rank, emblem_bbox, emblem_confidence = self._detect_emblem(frame)
+            self.stage_rejects['frames'] += 1
+            # Every stage's matches for this frame, so nothing below matches twice
+            context = DetectionContext(frame.shape)
+
+            # Cheap layout check first: no nameplate edge, no matchup screen
+            if self.prefilter_enabled and not self._matchup_prefilter(frame, context):
+                self._record_reject('prefilter')
+                return None
+
+            # Emblem detection (5 template scans)
+            self._continue_track(timestamp if frame_time is None else frame_time)
+            detected_rank, emblem_bbox, emblem_confidence = self._detect_emblem(frame, context)
 
             if detected_rank is None:
                 # No emblem found, no matchup
                 record_counter("emblem_not_found", 1, {"streamer": self.streamer, "quality": self.quality})
+                self._record_reject('emblem')
                 return None
 
             # Reject if bbox is None (detection without valid bounding box)
@@ -161,10 +267,11 @@ class FrameProcessor:
                 return None
 
             # Check minimum interval
-            if timestamp - self.last_matchup_time < self.min_matchup_interval:
+            if self._near_previous_matchup(timestamp):
+                self._record_reject('interval')
                 return None
 
-            self.last_matchup_time = timestamp
+            bisect.insort(self.matchup_times, timestamp)
 
             # Calculate emblem right boundary for cropping (needed for multi-crop OCR)
             emblem_right_x = None
@@ -186,9 +293,14 @@ class FrameProcessor:
 
             elif self.right_edge_detector:
                 # Case 2: Try right edge detection
-                right_edge_x, right_conf = self.right_edge_detector.detect_right_edge(
-                    frame, self.right_edge_threshold
-                )
+                if self.right_edge_band_margin is not None and emblem_bbox:
+                    right_edge_x, right_conf = self.right_edge_detector.detect_right_edge_beside(
+                        frame, emblem_bbox, self.right_edge_threshold, context, self.right_edge_band_margin
+                    )
+                else:
+                    right_edge_x, right_conf = self.right_edge_detector.detect_right_edge(
+                        frame, self.right_edge_threshold, context
+                    )
 
                 if right_edge_x is None:
                     # No right edge detected
@@ -213,11 +325,23 @@ class FrameProcessor:
                     # Record right edge confidence metric
                     record_histogram("right_edge_confidence", right_conf, {"streamer": self.streamer, "quality": self.quality})
 
+            # Dual-rendition: OCR the same keyframe from the higher rendition if we can get it,
+            # with the emblem bbox scaled to its size. Everything else stays in our frame's pixels.
+            ocr_frame, ocr_bbox = frame, emblem_bbox
+            if self.ocr_frame_source is not None:
+                hires_frame = self.ocr_frame_source(timestamp if frame_time is None else frame_time)
+                if hires_frame is not None:
+                    sx = hires_frame.shape[1] / frame.shape[1]
+                    sy = hires_frame.shape[0] / frame.shape[0]
+                    x, y, w, h = emblem_bbox
+                    ocr_frame = hires_frame
+                    ocr_bbox = (int(x * sx), int(y * sy), int(round(w * sx)), int(round(h * sy)))
+
             # Remove emblem from frame for better OCR
-            processed_frame = frame.copy()
+            processed_frame = ocr_frame.copy()
 
             # Simple top/bottom cropping and emblem removal
-            cropped_frame = self._crop(processed_frame, emblem_bbox)
+            cropped_frame = self._crop(processed_frame, ocr_bbox)
 
             # Extract username via OCR using BGR frame (PaddleOCR expects 3-channel images)
             # PaddleOCR will handle any necessary preprocessing internally
@@ -240,7 +364,8 @@ class FrameProcessor:
                     # Create visualization with emblem bounding box on original frame
                     boxes_vis = self.emblem_detector.create_debug_visualization(
                         frame,
-                        threshold=self.emblem_threshold
+                        threshold=self.emblem_threshold,
+                        context=context
                     )
 
                     # Add right edge visualization if detected
@@ -253,19 +378,11 @@ class FrameProcessor:
                         cv2.line(boxes_vis, (crop_position, 0), (crop_position, boxes_vis.shape[0]),
                                 (255, 255, 0), 2)  # Cyan color - shows where crop will happen
 
-                        # Draw right edge bounding box if we can find the match location
-                        if self.right_edge_detector.template is not None:
-                            # Re-run detection to get match location (cached by template matching)
-                            template = self.right_edge_detector.template
-                            mask = self.right_edge_detector.mask
-
-                            if mask is not None:
-                                result = cv2.matchTemplate(frame, template, cv2.TM_SQDIFF, mask=mask)
-                            else:
-                                result = cv2.matchTemplate(frame, template, cv2.TM_SQDIFF)
-                            _, _, min_loc, _ = cv2.minMaxLoc(result)
-
-                            template_h, template_w = template.shape[:2]
+                        # Draw right edge bounding box at the match location found above
+                        # (none in opaque-edge mode, where the template is never matched)
+                        if context.right_edge is not None:
+                            min_loc = context.right_edge.location
+                            template_w, template_h = context.right_edge.size
                             template_x = right_edge_x - template_w
 
                             # Draw bounding box around detected template (cyan)
@@ -298,6 +415,7 @@ class FrameProcessor:
                 'right_edge_x': right_edge_x,
                 'no_right_edge': no_right_edge,
                 'truncated': truncated,
+                'ocr_resolution': f"{ocr_frame.shape[1]}x{ocr_frame.shape[0]}",
                 'frame_base64': base64.b64encode(frame_jpeg).decode('utf-8') if frame_jpeg else None,
                 'ocr_debug_frame': base64.b64encode(debug_jpeg).decode('utf-8') if debug_jpeg else None
             }
@@ -313,8 +431,86 @@ class FrameProcessor:
             self.logger.error(f"Frame processing error: {e}")
             return None
     
-    def _decode_frame(self, frame_data: bytes) -> Optional[np.ndarray]:
-        """Decode JPEG frame data to numpy array"""
+    def detect_candidate(self, frame_data: Union[bytes, np.ndarray], scale: float, threshold: float) -> Tuple[bool, float]:
+        """
+        Coarse-pass check: could this downscaled frame contain a matchup?
+
+        Args:
+            frame_data: JPEG frame data or decoded frame, downscaled by `scale`
+            scale: Factor the frame was downscaled by
+            threshold: Coarse emblem confidence threshold
+
+        Returns:
+            (is_candidate, confidence)
+        """
+        if self.emblem_detector is None:
+            return False, 0.0
+        if isinstance(frame_data, np.ndarray):
+            frame = frame_data
+        else:
+            # Grayscale straight out of the JPEG decoder - the coarse matcher only needs luma
+            frame = cv2.imdecode(np.frombuffer(frame_data, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if frame is None:
+                return False, 0.0
+        rank, confidence = self.emblem_detector.detect_emblem_coarse(frame, scale, threshold)
+        return rank is not None, confidence
+
+    def detect_bazaar_ui(self, frame_data: Union[bytes, np.ndarray], threshold: float) -> Tuple[bool, float]:
+        """
+        Sparse-probe check: is the Bazaar UI on screen in this (downscaled) frame?
+
+        Args:
+            frame_data: JPEG frame data or decoded frame
+            threshold: UI reference correlation threshold
+
+        Returns:
+            (is_present, score); always present without UI references
+        """
+        if self.ui_detector is None:
+            return True, 1.0
+        frame = self._decode_frame(frame_data)
+        if frame is None:
+            return True, 0.0  # Can't tell - don't skip
+        return self.ui_detector.detect(frame, threshold)
+
+    def matchup_gate_end(self, timestamp: float) -> Optional[int]:
+        """
+        Pre-decode gate: if `timestamp` falls inside the min_matchup_interval of
+        an accepted matchup, return where that blocked window ends
+
+        process_frame would reject such a frame anyway (after decoding it and
+        running every emblem scan), so callers can drop it - or seek to the
+        returned position - before spending anything on it.
+
+        Returns:
+            End (seconds) of the blocked window, or None if the frame is allowed
+        """
+        timestamp = int(timestamp)
+        if not self._near_previous_matchup(timestamp):
+            return None
+        # Every frame from here up to interval past the latest nearby matchup is blocked
+        i = bisect.bisect_right(self.matchup_times, timestamp + self.min_matchup_interval - 1)
+        return self.matchup_times[i - 1] + self.min_matchup_interval
+
+    def _near_previous_matchup(self, timestamp: int) -> bool:
+        """True if an accepted matchup lies within min_matchup_interval of timestamp (either side)"""
+        i = bisect.bisect_left(self.matchup_times, timestamp)
+        if i < len(self.matchup_times) and self.matchup_times[i] - timestamp < self.min_matchup_interval:
+            return True
+        return i > 0 and timestamp - self.matchup_times[i - 1] < self.min_matchup_interval
+
+    def _template_bank(self, templates_dir: str) -> Optional[TemplateBank]:
+        """Template bank over templates_dir, None when template_bank is off"""
+        if not self.template_bank_config.get('enabled', False):
+            return None
+        return TemplateBank(templates_dir,
+                            cache_dir=self.template_bank_config.get('cache_dir'),
+                            prefer_assets=self.template_bank_config.get('prefer_assets', True))
+
+    def _decode_frame(self, frame_data: Union[bytes, np.ndarray]) -> Optional[np.ndarray]:
+        """Decode JPEG frame data to numpy array (raw frames pass through untouched)"""
+        if isinstance(frame_data, np.ndarray):
+            return frame_data
         try:
             # Convert bytes to numpy array
             nparr = np.frombuffer(frame_data, np.uint8)
@@ -324,12 +520,44 @@ class FrameProcessor:
             self.logger.error(f"Failed to decode frame: {e}")
             return None
     
-    def _detect_emblem(self, frame: np.ndarray) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
+    def _matchup_prefilter(self, frame: np.ndarray, context: DetectionContext) -> bool:
+        """
+        Does the frame show the matchup nameplate's right edge?
+
+        Matches the matchup template against the grayscale frame scaled to 480p,
+        a few percent of an emblem scan at 480p and less at higher renditions.
+
+        Args:
+            frame: Decoded BGR frame
+            context: Detection context of the frame (gets the prefilter score)
+
+        Returns:
+            True if the frame should go on to emblem detection
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
+        if self.prefilter_scale < 1:
+            gray = cv2.resize(gray, (max(1, round(gray.shape[1] * self.prefilter_scale)),
+                                     max(1, round(gray.shape[0] * self.prefilter_scale))),
+                              interpolation=cv2.INTER_AREA)
+        template = self._prefilter_template
+        if template.shape[0] > gray.shape[0] or template.shape[1] > gray.shape[1]:
+            return True
+        result = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+        context.prefilter_score = float(np.nan_to_num(result, nan=-1.0, posinf=-1.0, neginf=-1.0).max())
+        return context.prefilter_score >= self.threshold
+
+    def _record_reject(self, stage: str):
+        """Count a frame dropped at stage (prefilter, emblem or interval)"""
+        self.stage_rejects[stage] += 1
+        record_counter("frames_rejected", 1, {"stage": stage, "streamer": self.streamer, "quality": self.quality})
+
+    def _detect_emblem(self, frame: np.ndarray, context: Optional[DetectionContext] = None) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
         """
         Detect matchup by looking for rank emblems first (5 template scans)
 
         Args:
             frame: Input frame
+            context: Detection context of the frame (gets the emblem decision and per-rank matches)
 
         Returns:
             (detected_rank, emblem_bbox, confidence) or (None, None, 0.0) if no emblem found
@@ -341,10 +569,12 @@ class FrameProcessor:
         with create_span("emblem_detection") as span:
             try:
                 # Try to detect any of the 5 rank emblems
-                rank, bbox, confidence = self.emblem_detector.detect_emblem(
-                    frame,
-                    threshold=self.emblem_threshold
-                )
+                rank, bbox, confidence = self._search_emblem(frame, context)
+                if context is not None:
+                    context.emblem = EmblemMatch(rank, bbox, confidence)
+                    if context.track is not None:
+                        record_counter("emblem_tracking", 1, {"result": context.track, "streamer": self.streamer,
+                                                              "quality": self.quality})
 
                 if rank is not None:
                     self.logger.info(f"Matchup detected via {rank} emblem at {bbox}, confidence={confidence:.3f}")
@@ -364,6 +594,79 @@ class FrameProcessor:
                 self.logger.error(f"Emblem detection error: {e}")
                 return None, None, 0.0
     
+    def _continue_track(self, frame_time: float):
+        """
+        Keep the emblem track only if frame_time is the next sample after the last tracked frame
+
+        Tracking assumes consecutive samples. Interleaved ingest lanes (out of
+        order), skip-ahead seeks and two-pass windows (gaps) reset it.
+        """
+        if self.emblem_detector is None or self.emblem_detector.track_margin is None:
+            return
+        last, self._track_time = self._track_time, frame_time
+        if last is not None and not 0 < frame_time - last <= self.track_max_gap:
+            self.emblem_detector.reset_track()
+
+    def _search_emblem(self, frame: np.ndarray, context: Optional[DetectionContext] = None) -> Tuple[Optional[str], Optional[Tuple[int, int, int, int]], float]:
+        """
+        Emblem template search, narrowed to the learned ROI once the prior is trusted
+
+        An ROI miss falls back to a full-frame search when the frame shows the
+        nameplate's right edge (roi.fallback_on_edge - the matchup template,
+        a fraction of an emblem scan) and otherwise on every
+        roi.fallback_every-th miss, so an emblem that moved is still found
+        (and learned) while most empty frames pay for the ROI search only.
+
+        Returns:
+            (detected_rank, emblem_bbox, confidence) as EmblemDetector.detect_emblem
+        """
+        metric_attrs = {"streamer": self.streamer, "quality": self.quality}
+        roi = None
+        if self.emblem_prior is not None:
+            roi = self.emblem_prior.roi(frame.shape, self.emblem_detector.max_template_size, self.roi_margin)
+
+        search = 'full' if roi is None else 'roi'
+        rank, bbox, confidence = self.emblem_detector.detect_emblem(frame, threshold=self.emblem_threshold, roi=roi,
+                                                                    context=context)
+        if context is not None and context.track == 'hit':
+            pass  # A tracking hit searched neither the ROI nor the frame - kept out of the ROI stats
+        elif roi is None:
+            self.roi_stats['full_searches'] += 1
+        elif rank is not None:
+            self.roi_stats['roi_hits'] += 1
+            record_counter("emblem_roi_hits", 1, metric_attrs)
+        else:
+            self.roi_stats['roi_misses'] += 1
+            self._roi_misses_since_fallback += 1
+            trigger = 'periodic' if self._roi_misses_since_fallback >= self.roi_fallback_every else None
+            if trigger is None and self._matchup_evidence(frame, context):
+                trigger = 'edge'
+            if trigger is not None:
+                self._roi_misses_since_fallback = 0
+                rank, bbox, confidence = self.emblem_detector.detect_emblem(frame, threshold=self.emblem_threshold,
+                                                                            context=context)
+                search = 'fallback'
+                self.roi_stats['fallbacks'] += 1
+                if rank is not None:
+                    self.roi_stats['fallback_hits'] += 1
+                    self.logger.info(f"Emblem found outside the learned ROI {roi} at {bbox}")
+                record_counter("emblem_roi_fallbacks", 1, {**metric_attrs, "found": str(rank is not None).lower(),
+                                                           "trigger": trigger})
+
+        if context is not None:
+            context.emblem_search = 'track' if context.track == 'hit' else search
+        if rank is not None and bbox is not None and self.emblem_prior is not None:
+            self.emblem_prior.observe(bbox, frame.shape)
+        return rank, bbox, confidence
+
+    def _matchup_evidence(self, frame: np.ndarray, context: Optional[DetectionContext] = None) -> bool:
+        """Does the frame show the nameplate's right edge? (full-frame fallback trigger on an ROI miss)"""
+        if not self.roi_fallback_on_edge:
+            return False
+        if context is not None and context.prefilter_score is not None:
+            return context.prefilter_score >= self.threshold  # Already scored by the prefilter
+        return self._matchup_prefilter(frame, context or DetectionContext(frame.shape))
+
     def _crop(self, frame: np.ndarray, emblem_bbox: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
         """
         Crop frame to remove top/bottom borders and optionally the emblem
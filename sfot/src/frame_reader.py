@@ -0,0 +1,312 @@
+"""
+Frame reader module - Pulls decoded frames out of the FFmpeg stdout pipe
+"""
+
+import collections
+import logging
+import queue
+import re
+import threading
+from typing import BinaryIO, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+
+class FrameEnvelope(NamedTuple):
+    """A sampled frame plus the presentation timestamp FFmpeg decoded it at
+
+    The timestamp travels with the frame, so frames can be dropped, reordered
+    or processed in parallel without shifting anyone else's time.
+    """
+    frame: Union[bytes, np.ndarray]  # JPEG bytes or decoded BGR frame
+    timestamp: float                 # Absolute position in the VOD (seconds)
+    is_keyframe: bool = True
+    captured_at: Optional[float] = None  # Live mode: wall-clock time the frame aired, for latency
+
+
+class RawFrameReader:
+    """Read fixed-size bgr24 frames from an FFmpeg rawvideo pipe
+
+    The crop size is known before FFmpeg starts, so every frame is exactly
+    width * height * 3 bytes. Frames are read straight into a pool of
+    preallocated NumPy buffers and handed out as views - no JPEG encode on
+    the FFmpeg side and no imdecode on ours.
+
+    Buffers are recycled round-robin, so a returned frame is only valid until
+    the reader wraps around the pool. Size the pool to cover every frame that
+    can be alive at once (queued + in processing + being filled).
+    """
+
+    def __init__(self, stream: BinaryIO, width: int, height: int, pool_size: int):
+        """Initialize reader
+
+        Args:
+            stream: FFmpeg stdout (binary, blocking)
+            width: Frame width in pixels (after crop)
+            height: Frame height in pixels (after crop)
+            pool_size: Number of preallocated frame buffers
+        """
+        self.stream = stream
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        self.logger = logging.getLogger('sfot.frame_reader')
+
+        self._pool = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(max(1, pool_size))]
+        self._views = [memoryview(buf).cast('B') for buf in self._pool]
+        self._next = 0
+
+        self.bytes_read = 0
+        self.frames_read = 0
+
+    def read_frame(self) -> Optional[np.ndarray]:
+        """Read the next frame into a pooled buffer
+
+        Returns:
+            HxWx3 BGR frame view, or None at end of stream
+        """
+        view = self._views[self._next]
+        filled = 0
+        while filled < self.frame_size:
+            n = self.stream.readinto(view[filled:])
+            if not n:
+                if filled:
+                    self.logger.warning(f"Discarding partial raw frame ({filled}/{self.frame_size} bytes) at end of stream")
+                return None
+            filled += n
+
+        frame = self._pool[self._next]
+        self._next = (self._next + 1) % len(self._pool)
+        self.bytes_read += filled
+        self.frames_read += 1
+        return frame
+
+
+class JPEGStreamDemuxer:
+    """Split FFmpeg's image2pipe MJPEG stream into individual JPEG frames
+
+    Reads the pipe in large blocks into one reusable bytearray and scans it
+    in place through a memoryview. The scan position is remembered between
+    reads, so bytes already searched for an end-of-image marker are never
+    searched again, and a finished frame is the only thing that gets copied
+    out. Leftover bytes are compacted to the front of the buffer only when
+    the tail runs out of room, which keeps the work linear in stream size.
+    """
+
+    SOI = b'\xff\xd8'
+    EOI = b'\xff\xd9'
+
+    def __init__(self, stream: BinaryIO, block_size: int = 256 * 1024):
+        """Initialize demuxer
+
+        Args:
+            stream: FFmpeg stdout (binary, blocking)
+            block_size: Bytes requested per read; the buffer starts at 4x this
+        """
+        self.stream = stream
+        self.block_size = block_size
+        self.logger = logging.getLogger('sfot.frame_reader')
+
+        # readinto1 returns whatever the pipe has instead of blocking until the
+        # whole block is filled, so frames are handed out as soon as they land
+        self._readinto = getattr(stream, 'readinto1', stream.readinto)
+
+        self._buf = bytearray(block_size * 4)
+        self._view = memoryview(self._buf)
+        self._start = 0   # First unconsumed byte
+        self._end = 0     # One past the last valid byte
+        self._soi = -1    # Start of the frame being assembled, -1 if not found yet
+        self._scan = 0    # Where the next marker search resumes
+
+        self.bytes_read = 0
+        self.frames_read = 0
+
+    def read_frame(self) -> Optional[bytes]:
+        """Return the next complete JPEG frame, or None at end of stream"""
+        while True:
+            frame = self._next_frame()
+            if frame is not None:
+                return frame
+            if not self._fill():
+                if self._end > self._start:
+                    self.logger.debug(f"Discarding {self._end - self._start} trailing bytes without a complete JPEG")
+                return None
+
+    def __iter__(self):
+        while True:
+            frame = self.read_frame()
+            if frame is None:
+                return
+            yield frame
+
+    def _next_frame(self) -> Optional[bytes]:
+        """Look for a complete frame in the bytes already buffered"""
+        buf = self._buf
+
+        if self._soi == -1:
+            soi = buf.find(self.SOI, self._scan, self._end)
+            if soi == -1:
+                # Keep the last byte - it may be the first half of a marker
+                self._start = self._scan = max(self._start, self._end - 1)
+                return None
+            self._soi = self._start = soi
+            self._scan = soi + 2
+
+        eoi = buf.find(self.EOI, self._scan, self._end)
+        if eoi == -1:
+            self._scan = max(self._scan, self._end - 1)
+            return None
+
+        frame = bytes(self._view[self._soi:eoi + 2])
+        self._start = self._scan = eoi + 2
+        self._soi = -1
+        self.frames_read += 1
+        return frame
+
+    def _fill(self) -> bool:
+        """Read the next block from the stream, making room first if needed"""
+        if len(self._buf) - self._end < self.block_size:
+            self._compact()
+
+        n = self._readinto(self._view[self._end:self._end + self.block_size])
+        if not n:
+            return False
+        self._end += n
+        self.bytes_read += n
+        return True
+
+    def _compact(self):
+        """Move the unconsumed tail to the front, growing the buffer if a frame doesn't fit"""
+        pending = self._end - self._start
+        if pending + self.block_size > len(self._buf):
+            # A single frame is larger than the buffer - grow (rare, e.g. 1080p keyframes)
+            grown = bytearray(max(len(self._buf) * 2, pending + self.block_size))
+            grown[:pending] = self._view[self._start:self._end]
+            self._view.release()
+            self._buf = grown
+            self._view = memoryview(self._buf)
+        elif pending:
+            # Copy first - source and destination may overlap
+            self._buf[:pending] = bytes(self._view[self._start:self._end])
+
+        shift = self._start
+        self._start = 0
+        self._end = pending
+        self._scan -= shift
+        if self._soi != -1:
+            self._soi -= shift
+
+
+class ShowinfoPTSReader:
+    """Collect per-frame presentation timestamps from FFmpeg's showinfo filter
+
+    showinfo must be the last filter in the chain so it logs exactly one line
+    per output frame, in output order. FFmpeg has to run with
+    `-loglevel level+info`; this reader drains stderr on its own thread (which
+    also keeps the pipe from filling up), queues one (pts_time, is_keyframe)
+    per frame and forwards genuine warnings/errors to the logger.
+    """
+
+    FRAME_RE = re.compile(r'\bn:\s*\d+\s+pts:\s*\S+\s+pts_time:\s*(\S+)')
+    ISKEY_RE = re.compile(r'\biskey:\s*(\d)')
+    LEVEL_RE = re.compile(r'\[(panic|fatal|error|warning|info|verbose|debug|trace)\]')
+    LEVELS = ['quiet', 'panic', 'fatal', 'error', 'warning', 'info', 'verbose', 'debug', 'trace']
+
+    def __init__(self, stderr: BinaryIO, forward_level: str = 'warning', name: str = 'ffmpeg'):
+        """Initialize reader
+
+        Args:
+            stderr: FFmpeg stderr (binary)
+            forward_level: Least severe FFmpeg log level to forward to our logger
+            name: Label used for the thread and forwarded log lines
+        """
+        self.stderr = stderr
+        self.name = name
+        self.logger = logging.getLogger('sfot.frame_reader')
+        self.forward_rank = self.LEVELS.index(forward_level) if forward_level in self.LEVELS else self.LEVELS.index('warning')
+        self.tail = collections.deque(maxlen=20)  # Last non-frame lines, for error reporting
+
+        self._queue: "queue.Queue[Optional[Tuple[Optional[float], bool]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"{name}-stderr", daemon=True)
+
+    def start(self) -> 'ShowinfoPTSReader':
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for raw in iter(self.stderr.readline, b''):
+                line = raw.decode('utf-8', errors='ignore').rstrip()
+                match = self.FRAME_RE.search(line)
+                if match:
+                    try:
+                        pts_time = float(match.group(1))
+                    except ValueError:
+                        pts_time = None  # NOPTS
+                    iskey = self.ISKEY_RE.search(line)
+                    self._queue.put((pts_time, iskey is None or iskey.group(1) == '1'))
+                    continue
+
+                if not line:
+                    continue
+                self.tail.append(line)
+                level = self.LEVEL_RE.search(line)
+                if level and self.LEVELS.index(level.group(1)) <= self.forward_rank:
+                    self.logger.warning(f"{self.name}: {line}")
+        except Exception as e:
+            self.logger.debug(f"{self.name} stderr reader stopped: {e}")
+        finally:
+            self._queue.put(None)
+
+    def next_pts(self, timeout: float = 5.0) -> Optional[Tuple[Optional[float], bool]]:
+        """Return (pts_time, is_keyframe) for the next output frame, or None if unavailable
+
+        showinfo logs a frame before it is encoded and written to stdout, so the
+        entry is normally waiting by the time the frame itself has been read.
+        """
+        try:
+            entry = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if entry is None:
+            self._queue.put(None)  # Keep reporting EOF to later callers
+        return entry
+
+
+class KeyframeSampler:
+    """Decide which decoded frames to keep, based on their real timestamps
+
+    Replaces FFmpeg's fps= filter. fps= synthesizes a constant-rate stream -
+    with `-skip_frame nokey` it duplicates keyframes to fill gaps and drops
+    them when they bunch up, and its output timestamps no longer say where a
+    frame came from. The sampler instead keeps a frame once at least
+    `interval` seconds (minus a jitter tolerance) have passed since the last
+    kept one, so irregular keyframe spacing never shifts later timestamps.
+    """
+
+    def __init__(self, frame_rate: float, tolerance: float = 0.25):
+        """Initialize sampler
+
+        Args:
+            frame_rate: Target sampled frames per second (processing.frame_rate)
+            tolerance: Fraction of the interval a frame may arrive early and
+                still be kept (absorbs keyframe jitter, e.g. 1.9s vs 2.0s)
+        """
+        self.interval = 1 / frame_rate if frame_rate > 0 else 0.0
+        self.min_gap = self.interval * (1 - tolerance)
+        self._last_kept: Optional[float] = None
+        self.kept = 0
+        self.skipped = 0
+
+    def wants(self, timestamp: float) -> bool:
+        """Would accept() keep a frame at `timestamp`? (no state change)"""
+        return self._last_kept is None or timestamp - self._last_kept >= self.min_gap or timestamp < self._last_kept
+
+    def accept(self, timestamp: float) -> bool:
+        """Return True if the frame at `timestamp` should be processed"""
+        if self.wants(timestamp):
+            self._last_kept = timestamp
+            self.kept += 1
+            return True
+        self.skipped += 1
+        return False
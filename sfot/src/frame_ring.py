@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Frame ring module - Decoder process writing frames into a shared-memory ring
+
+Reading the FFmpeg pipe, demuxing and decoding JPEGs and parsing showinfo all
+compete with template matching and OCR for the GIL. With
+ffmpeg.decoder_process that side runs in a separate Python process (main()
+below) which decodes straight into fixed-size slots of a
+multiprocessing.shared_memory block. Only one short text line per frame
+(slot, timestamp, keyframe flag) crosses the process boundary; the main
+process wraps the slot in a NumPy view, so frames are never pickled or copied.
+
+Each slot has a one-byte state at the front of the block:
+
+    FREE -> WRITING (decoder claimed it) -> QUEUED (line sent to the main process)
+         -> LEASED (handed out as a view) -> FREE (the last view was dropped)
+"""
+
+import argparse
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import BinaryIO, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from frame_reader import JPEGStreamDemuxer, ShowinfoPTSReader
+
+
+FREE, WRITING, QUEUED, LEASED = 0, 1, 2, 3
+HEADER_ALIGN = 64  # Slot states live in the first cache line(s), frames start after
+
+
+class _SlotLease:
+    """Returns a slot to the decoder when the frame holding it is garbage collected
+
+    Holds the ring itself, so the shared memory stays mapped for as long as
+    any frame view of it exists.
+    """
+
+    __slots__ = ('ring', 'slot')
+
+    def __init__(self, ring: 'SharedFrameRing', slot: int):
+        self.ring = ring
+        self.slot = slot
+
+    def __del__(self):
+        # A single byte store: safe from any thread, at any point GC runs
+        self.ring.states[self.slot] = FREE
+
+
+class RingFrame(np.ndarray):
+    """HxWx3 view of a ring slot that keeps the slot leased while it (or any view of it) is alive
+
+    Slices keep their parent alive through .base, so crops taken during
+    detection hold the slot too. Copies don't carry the lease.
+    """
+
+    _lease: Optional[_SlotLease] = None
+
+
+class SharedFrameRing:
+    """Fixed-size BGR frame slots in one shared memory block"""
+
+    def __init__(self, slots: int, width: int, height: int, name: Optional[str] = None):
+        """Create a ring, or attach to an existing one when name is given
+
+        Args:
+            slots: Number of frame slots
+            width: Slot width in pixels
+            height: Slot height in pixels
+            name: Shared memory name of an existing ring (decoder process side)
+        """
+        self.slots = slots
+        self.width = width
+        self.height = height
+        self.frame_size = width * height * 3
+        self.logger = logging.getLogger('sfot.frame_ring')
+
+        header = math.ceil(slots / HEADER_ALIGN) * HEADER_ALIGN
+        size = header + slots * self.frame_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Attaching registers the block with this process's resource tracker,
+            # which would unlink it when we exit - the creating process owns it
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+            self.owner = False
+        self.name = self.shm.name
+
+        self.states = np.ndarray((slots,), dtype=np.uint8, buffer=self.shm.buf[:slots])
+        self.frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=self.shm.buf[header:size])
+        if self.owner:
+            self.states[:] = FREE
+        self._next = 0
+
+    def claim(self, poll_interval: float = 0.002) -> int:
+        """Decoder side: wait for a free slot and mark it WRITING
+
+        Waiting here is the backpressure: when detection falls behind, every
+        slot stays leased and the decoder stops reading FFmpeg's pipe.
+        """
+        while True:
+            for i in range(self.slots):
+                slot = (self._next + i) % self.slots
+                if self.states[slot] == FREE:
+                    self.states[slot] = WRITING
+                    self._next = (slot + 1) % self.slots
+                    return slot
+            time.sleep(poll_interval)
+
+    def lease(self, slot: int, height: int, width: int) -> RingFrame:
+        """Main side: wrap a QUEUED slot as a frame view; the slot is freed with the view"""
+        self.states[slot] = LEASED
+        frame = self.frames[slot, :height, :width].view(RingFrame)
+        frame._lease = _SlotLease(self, slot)
+        return frame
+
+    def reclaim(self):
+        """Main side: free slots a stopped decoder claimed or queued but never handed over"""
+        stale = (self.states == WRITING) | (self.states == QUEUED)
+        self.states[stale] = FREE
+
+    def close(self):
+        """Creating side: unlink the block
+
+        The mapping itself goes away once the ring and the last leased frame
+        are garbage collected - unmapping it now would pull memory out from
+        under frames still in the queue.
+        """
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def detach(self):
+        """Attaching side: drop the arrays and unmap (nothing here is leased)"""
+        del self.states, self.frames
+        self.shm.close()
+
+
+class RingFrameReader:
+    """Main process side of one FFmpeg instance: starts a decoder process on it and hands out its frames
+
+    Stands in for both the frame reader and the ShowinfoPTSReader of
+    SFOTProcessor._read_frames: read_frame() returns the next frame as a view
+    into the ring and next_pts() that frame's (pts_time, is_keyframe).
+    """
+
+    def __init__(self, ring: SharedFrameRing, ffmpeg_proc: subprocess.Popen, output_format: str,
+                 forward_level: str = 'warning', name: str = 'ffmpeg'):
+        """Start the decoder process
+
+        Args:
+            ring: Ring the decoder process fills (created by this process)
+            ffmpeg_proc: FFmpeg with stdout and stderr pipes; both are handed
+                to the decoder process and closed here
+            output_format: FFmpeg output format ("rawvideo" or "mjpeg")
+            forward_level: Least severe FFmpeg log level to forward
+            name: Label for log lines
+        """
+        self.ring = ring
+        self.name = name
+        self.logger = logging.getLogger('sfot.frame_ring')
+        stderr_fd = ffmpeg_proc.stderr.fileno()
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__),
+             '--shm', ring.name, '--slots', str(ring.slots),
+             '--width', str(ring.width), '--height', str(ring.height),
+             '--format', output_format, '--stderr-fd', str(stderr_fd),
+             '--forward-level', forward_level, '--name', name],
+            stdin=ffmpeg_proc.stdout,
+            stdout=subprocess.PIPE,
+            pass_fds=(stderr_fd,)
+        )
+        # The decoder process owns FFmpeg's pipes now
+        ffmpeg_proc.stdout.close()
+        ffmpeg_proc.stderr.close()
+
+        self._entry: Tuple[Optional[float], bool] = (None, True)
+        self.bytes_read = 0
+        self.frames_read = 0
+
+    def read_frame(self) -> Optional[RingFrame]:
+        """Next decoded frame, or None once the decoder process has finished"""
+        line = self.proc.stdout.readline()
+        if not line:
+            return None
+        slot, pts_time, is_keyframe, height, width, nbytes = line.split()
+        pts_time = float(pts_time)
+        self._entry = (None if math.isnan(pts_time) else pts_time, is_keyframe == b'1')
+        self.frames_read += 1
+        self.bytes_read += int(nbytes)
+        return self.ring.lease(int(slot), int(height), int(width))
+
+    def next_pts(self) -> Tuple[Optional[float], bool]:
+        """(pts_time, is_keyframe) of the frame read_frame() returned last"""
+        return self._entry
+
+    def close(self):
+        """Stop the decoder process (closing FFmpeg's stdout reader) and free its unsent slots"""
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.logger.warning(f"Force killing {self.name} decoder process")
+                self.proc.kill()
+                self.proc.wait()
+        self.proc.stdout.close()
+        self.ring.reclaim()
+
+
+def _read_exact(stream: BinaryIO, view: memoryview) -> int:
+    """Fill view from stream; returns the bytes read (short only at end of stream)"""
+    filled = 0
+    while filled < len(view):
+        n = stream.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return filled
+
+
+def decode_into_ring(ring: SharedFrameRing, stream: BinaryIO, pts_reader: ShowinfoPTSReader,
+                     output_format: str, out) -> int:
+    """Decoder process loop: FFmpeg stdout -> ring slots, one line per frame to out
+
+    Returns:
+        Number of frames written
+    """
+    logger = logging.getLogger('sfot.frame_ring')
+    demuxer = JPEGStreamDemuxer(stream) if output_format != 'rawvideo' else None
+    frames = 0
+
+    while True:
+        if demuxer is None:
+            slot = ring.claim()
+            nbytes = _read_exact(stream, memoryview(ring.frames[slot]).cast('B'))
+            if nbytes < ring.frame_size:
+                if nbytes:
+                    logger.warning(f"Discarding partial raw frame ({nbytes}/{ring.frame_size} bytes) at end of stream")
+                ring.states[slot] = FREE
+                break
+            height, width = ring.height, ring.width
+        else:
+            data = demuxer.read_frame()
+            if data is None:
+                break
+            nbytes = len(data)
+            decoded = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            slot = ring.claim()
+            if decoded is None:
+                logger.warning(f"Failed to decode JPEG frame {frames}, passing a blank frame")
+                height, width = ring.height, ring.width
+                ring.frames[slot][:] = 0
+            else:
+                height, width = min(decoded.shape[0], ring.height), min(decoded.shape[1], ring.width)
+                ring.frames[slot, :height, :width] = decoded[:height, :width]
+
+        entry = pts_reader.next_pts()
+        pts_time, is_keyframe = entry if entry is not None else (None, True)
+        ring.states[slot] = QUEUED
+        out.write(f"{slot} {'nan' if pts_time is None else pts_time} {int(is_keyframe)} {height} {width} {nbytes}\n")
+        out.flush()
+        frames += 1
+
+    return frames
+
+
+def main():
+    """Decoder process entry point (started by RingFrameReader)"""
+    parser = argparse.ArgumentParser(description='Decode FFmpeg output on stdin into a shared frame ring')
+    parser.add_argument('--shm', required=True, help='Shared memory name of the ring')
+    parser.add_argument('--slots', type=int, required=True)
+    parser.add_argument('--width', type=int, required=True)
+    parser.add_argument('--height', type=int, required=True)
+    parser.add_argument('--format', default='rawvideo', help='FFmpeg output format ("rawvideo" or "mjpeg")')
+    parser.add_argument('--stderr-fd', type=int, required=True, help='Inherited FFmpeg stderr (showinfo lines)')
+    parser.add_argument('--forward-level', default='warning')
+    parser.add_argument('--name', default='ffmpeg')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(levelname)s: %(message)s')
+    logger = logging.getLogger('sfot.frame_ring')
+
+    ring = SharedFrameRing(args.slots, args.width, args.height, name=args.shm)
+    pts_reader = ShowinfoPTSReader(os.fdopen(args.stderr_fd, 'rb'), args.forward_level, args.name).start()
+    try:
+        frames = decode_into_ring(ring, sys.stdin.buffer, pts_reader, args.format, sys.stdout)
+        logger.debug(f"{args.name} decoder process finished: {frames} frames")
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass  # Main process stopped reading (skip-ahead seek or shutdown)
+    finally:
+        ring.detach()
+
+
+if __name__ == '__main__':
+    main()
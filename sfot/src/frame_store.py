@@ -0,0 +1,183 @@
+"""
+Frame store module - Decoded test-video frames kept on disk as memory-mapped .npy files
+
+Tuning runs decode the same test_data ranges again and again. A store holds
+the frames FFmpeg produced for one range (after crop/scale, before sampling)
+plus their timestamps, so later runs slice them straight out of the page
+cache instead of starting FFmpeg.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+INDEX_DTYPE = np.dtype([('timestamp', '<f8'), ('keyframe', '?')])
+HEADER_BYTES = 128  # Reserved .npy header, rewritten once the frame count is known
+
+
+def source_signature(video_path: str, crop_percent: List[float], crop: List[int], frame_size: Tuple[int, int],
+                     output_size: Tuple[int, int], keyframes_only: bool,
+                     select_interval: Optional[float]) -> Dict[str, Any]:
+    """Everything that determines the decoded frames of a test video
+
+    Args:
+        video_path: Test video file
+        crop_percent: Profile crop region (fractions)
+        crop: The same crop in pixels, [w, h, x, y]
+        frame_size: (w, h) of the video
+        output_size: (w, h) of stored frames (after an optional downscale)
+        keyframes_only: FFmpeg ran with -skip_frame nokey
+        select_interval: Interval of FFmpeg's pre-decimation select= filter (None
+            when every decoded frame is output)
+    """
+    st = os.stat(video_path)
+    return {
+        'video': os.path.realpath(video_path),
+        'video_size': st.st_size,
+        'video_mtime': int(st.st_mtime),
+        'crop_percent': [round(v, 6) for v in crop_percent],
+        'crop': list(crop),
+        'frame_size': list(frame_size),
+        'output_size': list(output_size),
+        'keyframes_only': bool(keyframes_only),
+        'select_interval': round(select_interval, 3) if select_interval else None,
+    }
+
+
+def _signature_key(signature: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def _npy_header(shape: Tuple[int, ...]) -> bytes:
+    """A version 1.0 .npy header for uint8 data, padded to HEADER_BYTES"""
+    header = f"{{'descr': '|u1', 'fortran_order': False, 'shape': {shape}, }}".encode('latin1')
+    prefix = b'\x93NUMPY\x01\x00'
+    pad = HEADER_BYTES - len(prefix) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError(f"Shape {shape} does not fit the reserved .npy header")
+    body = header + b' ' * pad + b'\n'
+    return prefix + len(body).to_bytes(2, 'little') + body
+
+
+class FrameStore:
+    """Read side: one stored range, frames memory-mapped copy-on-write
+
+    Frames are views into the mapping (writable, but writes never reach the
+    file), so slicing a range copies nothing.
+    """
+
+    FRAMES = 'frames.npy'
+    INDEX = 'index.npy'
+    META = 'meta.json'
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / self.META).read_text())
+        self.index = np.load(self.path / self.INDEX)
+        self.frames = np.load(self.path / self.FRAMES, mmap_mode='c')
+        self.start = self.meta['start']
+        self.end = self.meta['end']
+
+    @classmethod
+    def find(cls, root: str, signature: Dict[str, Any], start: float, end: float) -> Optional['FrameStore']:
+        """Return a store with this signature that covers [start, end), or None"""
+        for meta_path in sorted((Path(root) / _signature_key(signature)).glob(f'*/{cls.META}')):
+            try:
+                meta = json.loads(meta_path.read_text())
+                if meta['signature'] == signature and meta['start'] <= start and end <= meta['end']:
+                    return cls(meta_path.parent)
+            except (OSError, ValueError, KeyError) as e:
+                logging.getLogger('sfot.frame_store').warning(f"Ignoring unreadable frame store {meta_path.parent}: {e}")
+        return None
+
+    @classmethod
+    def for_video(cls, root: str, video_path: str) -> List['FrameStore']:
+        """All stores decoded from video_path (any crop or sampling)"""
+        video = os.path.realpath(video_path)
+        stores = []
+        for meta_path in sorted(Path(root).glob(f'*/*/{cls.META}')):
+            try:
+                if json.loads(meta_path.read_text())['signature']['video'] == video:
+                    stores.append(cls(meta_path.parent))
+            except (OSError, ValueError, KeyError):
+                continue
+        return stores
+
+    def iter_range(self, start: float, end: float) -> Iterator[Tuple[np.ndarray, float, bool]]:
+        """Yield (frame, timestamp, is_keyframe) for stored frames in [start, end)"""
+        timestamps = self.index['timestamp']
+        first, last = np.searchsorted(timestamps, [start, end])
+        for i in range(first, last):
+            yield self.frames[i], float(timestamps[i]), bool(self.index['keyframe'][i])
+
+    def frame_at(self, timestamp: float, tolerance: float = 1.0) -> Optional[np.ndarray]:
+        """Stored frame nearest timestamp, or None if none is within tolerance"""
+        timestamps = self.index['timestamp']
+        if not len(timestamps):
+            return None
+        i = int(np.argmin(np.abs(timestamps - timestamp)))
+        return self.frames[i] if abs(timestamps[i] - timestamp) <= tolerance else None
+
+
+class FrameStoreWriter:
+    """Write side: streams frames to disk as they are decoded
+
+    The .npy header is reserved up front and filled in on commit, so frames
+    never have to be held in memory. Nothing is visible to FrameStore.find
+    until commit() renames the finished directory into place.
+    """
+
+    def __init__(self, root: str, signature: Dict[str, Any], start: float, end: float):
+        self.signature = signature
+        self.start = start
+        self.end = end
+        self.width, self.height = signature['output_size']
+        self.logger = logging.getLogger('sfot.frame_store')
+
+        self.final_path = Path(root) / _signature_key(signature) / f"{start:g}-{end:g}"
+        self.tmp_path = self.final_path.with_name(f".{self.final_path.name}.{os.getpid()}.tmp")
+        self.tmp_path.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp_path / FrameStore.FRAMES, 'wb')
+        self._file.write(b'\0' * HEADER_BYTES)
+        self._index: List[Tuple[float, bool]] = []
+
+    def add(self, frame: np.ndarray, timestamp: float, is_keyframe: bool = True):
+        """Append one decoded BGR frame (copied out immediately, so pooled buffers are fine)"""
+        if frame.shape != (self.height, self.width, 3):
+            raise ValueError(f"Frame shape {frame.shape} does not match store {(self.height, self.width, 3)}")
+        self._file.write(np.ascontiguousarray(frame).data)
+        self._index.append((timestamp, is_keyframe))
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        """Timestamp of the last frame added (None before the first)"""
+        return self._index[-1][0] if self._index else None
+
+    def commit(self):
+        """Finish the .npy files and publish the store"""
+        self._file.seek(0)
+        self._file.write(_npy_header((len(self._index), self.height, self.width, 3)))
+        self._file.close()
+        np.save(self.tmp_path / FrameStore.INDEX, np.array(self._index, dtype=INDEX_DTYPE))
+        (self.tmp_path / FrameStore.META).write_text(json.dumps({
+            'signature': self.signature,
+            'start': self.start,
+            'end': self.end,
+            'frames': len(self._index),
+        }, indent=2))
+        if self.final_path.exists():
+            shutil.rmtree(self.final_path, ignore_errors=True)
+        os.replace(self.tmp_path, self.final_path)
+        self.logger.info(f"Stored {len(self._index)} frames for [{self.start:g}-{self.end:g}) in {self.final_path}")
+
+    def abort(self):
+        """Drop a partial store"""
+        self._file.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
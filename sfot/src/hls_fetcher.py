@@ -0,0 +1,691 @@
+#!/usr/bin/env python3
+"""
+Native HLS ingestion - parses VOD and live playlists, fetches segments over a
+pooled HTTP session and decodes only the keyframes we sample
+"""
+
+import logging
+import re
+import subprocess
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from frame_reader import ShowinfoPTSReader
+from segment_cache import SegmentCache
+
+
+class HLSSegment(NamedTuple):
+    """One media segment of a VOD or live playlist"""
+    index: int          # Media sequence number (position in the playlist for VODs)
+    uri: str            # Absolute URL
+    start: float        # Position in the VOD (seconds), summed from EXTINF
+    duration: float
+    init_uri: Optional[str] = None  # EXT-X-MAP initialization section (fMP4), if any
+    program_date_time: Optional[float] = None  # EXT-X-PROGRAM-DATE-TIME (epoch seconds), if any
+
+
+class HLSVariant(NamedTuple):
+    """One rendition listed in a multivariant (master) playlist"""
+    name: str                                # e.g. "480p30", "1080p60", "chunked"
+    uri: str
+    resolution: Optional[Tuple[int, int]]
+    bandwidth: int
+
+
+_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+def _parse_attributes(line: str) -> Dict[str, str]:
+    """Parse an HLS attribute list (KEY=VALUE,KEY="VALUE",...)"""
+    attrs = line.split(':', 1)[1] if ':' in line else ''
+    return {k: v.strip('"') for k, v in _ATTR_RE.findall(attrs)}
+
+
+def parse_media_playlist(text: str, base_url: str) -> Tuple[List[HLSSegment], float, bool]:
+    """Parse a media playlist
+
+    Args:
+        text: Playlist body
+        base_url: URL the playlist was loaded from (segment URIs are relative to it)
+
+    Returns:
+        (segments, target_duration, has_endlist)
+    """
+    segments = []
+    position = 0.0
+    duration = None
+    target_duration = 0.0
+    has_endlist = False
+    init_uri = None
+    media_sequence = 0
+    program_date_time = None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith('#EXTINF:'):
+            duration = float(line[len('#EXTINF:'):].split(',', 1)[0])
+        elif line.startswith('#EXT-X-TARGETDURATION:'):
+            target_duration = float(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-MAP:'):
+            uri = _parse_attributes(line).get('URI')
+            init_uri = urljoin(base_url, uri) if uri else None
+        elif line.startswith('#EXT-X-MEDIA-SEQUENCE:'):
+            media_sequence = int(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-PROGRAM-DATE-TIME:'):
+            try:
+                program_date_time = datetime.fromisoformat(line.split(':', 1)[1].replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                program_date_time = None
+        elif line.startswith('#EXT-X-ENDLIST'):
+            has_endlist = True
+        elif not line.startswith('#') and duration is not None:
+            segments.append(HLSSegment(media_sequence + len(segments), urljoin(base_url, line), position, duration,
+                                       init_uri, program_date_time))
+            position += duration
+            if program_date_time is not None:
+                program_date_time += duration  # Implied for the next segment unless it has its own tag
+            duration = None
+
+    return segments, target_duration, has_endlist
+
+
+def parse_master_playlist(text: str, base_url: str) -> List[HLSVariant]:
+    """Parse a multivariant playlist into its video renditions
+
+    Twitch names renditions through EXT-X-MEDIA NAME (e.g. "720p60"); plain
+    playlists fall back to "<height>p".
+    """
+    media_names = {}
+    for raw in text.splitlines():
+        if raw.startswith('#EXT-X-MEDIA:'):
+            attrs = _parse_attributes(raw)
+            if attrs.get('TYPE') == 'VIDEO' and 'GROUP-ID' in attrs:
+                media_names[attrs['GROUP-ID']] = attrs.get('NAME', attrs['GROUP-ID'])
+
+    variants = []
+    pending = None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            pending = _parse_attributes(line)
+        elif line and not line.startswith('#') and pending is not None:
+            resolution = None
+            if 'RESOLUTION' in pending:
+                w, h = pending['RESOLUTION'].lower().split('x')
+                resolution = (int(w), int(h))
+            name = media_names.get(pending.get('VIDEO', ''))
+            if not name:
+                name = f"{resolution[1]}p" if resolution else f"variant{len(variants)}"
+            variants.append(HLSVariant(name, urljoin(base_url, line), resolution, int(pending.get('BANDWIDTH', 0))))
+            pending = None
+
+    return variants
+
+
+def select_variant(variants: List[HLSVariant], quality: str) -> Optional[HLSVariant]:
+    """Pick the rendition matching a quality name like "480p", "1080p60", "best" or "worst"
+
+    Exact names win, then "480p" matches "480p30"/"480p60", then the closest height.
+    """
+    if not variants:
+        return None
+    by_size = sorted(variants, key=lambda v: (v.resolution[1] if v.resolution else 0, v.bandwidth))
+    if quality == 'best':
+        return by_size[-1]
+    if quality == 'worst':
+        return by_size[0]
+
+    for variant in variants:
+        if variant.name == quality:
+            return variant
+    for variant in variants:
+        if variant.name.startswith(quality):
+            return variant
+
+    match = re.match(r'(\d+)p', quality)
+    if not match:
+        return None
+    height = int(match.group(1))
+    sized = [v for v in variants if v.resolution]
+    return min(sized, key=lambda v: abs(v.resolution[1] - height)) if sized else None
+
+
+def resolve_twitch_vod(vod_id: str, quality: str) -> Tuple[str, Optional[str]]:
+    """Resolve a Twitch VOD to its media and multivariant playlist URLs
+
+    Uses streamlink's Twitch plugin only for the access-token dance; segments
+    are fetched by HLSSegmentFetcher.
+
+    Returns:
+        (media_playlist_url, master_playlist_url)
+    """
+    from streamlink import Streamlink
+
+    streams = Streamlink().streams(f'https://twitch.tv/videos/{vod_id}')
+    stream = streams.get(quality) or streams.get(f'{quality}60') or streams.get(f'{quality}30')
+    if stream is None:
+        raise ValueError(f"Quality {quality} not available for VOD {vod_id} (have: {', '.join(streams)})")
+
+    try:
+        master_url = stream.to_manifest_url()
+    except Exception:
+        master_url = None
+    return stream.url, master_url
+
+
+class HLSSegmentFetcher:
+    """Fetch HLS segments over one pooled HTTP session with bounded concurrency"""
+
+    def __init__(self, playlist_url: str, max_workers: int = 4, timeout: float = 20.0,
+                 retries: int = 3, session: Optional[requests.Session] = None,
+                 cache: Optional[SegmentCache] = None, cache_namespace: Tuple[str, str] = ('', '')):
+        """Initialize fetcher
+
+        Args:
+            playlist_url: Media playlist URL, or a master playlist (see load_playlist)
+            max_workers: Maximum segment downloads in flight
+            timeout: Per-request timeout in seconds
+            retries: Retries per request on connection errors / 5xx
+            session: Optional session to reuse
+            cache: Optional on-disk segment cache
+            cache_namespace: (vod_id, rendition) the cached segments are filed under
+        """
+        self.playlist_url = playlist_url
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        self.logger = logging.getLogger('sfot.hls')
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=2,
+            pool_maxsize=self.max_workers,
+            max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504]),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.segments: List[HLSSegment] = []
+        self.target_duration = 0.0
+        self.has_endlist = False
+
+        self._init_cache: Dict[str, bytes] = {}
+
+        self.bytes_fetched = 0
+        self.segments_fetched = 0
+
+    def load_playlist(self, quality: Optional[str] = None) -> List[HLSSegment]:
+        """Load (or reload) the media playlist
+
+        If playlist_url turns out to be a master playlist, the rendition matching
+        `quality` is selected and playlist_url is updated to point at it.
+        """
+        response = self.session.get(self.playlist_url, timeout=self.timeout)
+        response.raise_for_status()
+        text = response.text
+
+        if '#EXT-X-STREAM-INF' in text:
+            variants = parse_master_playlist(text, response.url)
+            variant = select_variant(variants, quality or 'best')
+            if variant is None:
+                raise ValueError(f"No rendition matching {quality} in {self.playlist_url}")
+            self.logger.info(f"Selected rendition {variant.name} ({variant.resolution}) from master playlist")
+            self.playlist_url = variant.uri
+            return self.load_playlist()
+
+        self.segments, self.target_duration, self.has_endlist = parse_media_playlist(text, response.url)
+        return self.segments
+
+    def segments_between(self, start: float, end: float) -> List[HLSSegment]:
+        """Segments overlapping [start, end)"""
+        return [s for s in self.segments if s.start < end and s.start + s.duration > start]
+
+    def fetch(self, segment: HLSSegment, max_bytes: Optional[int] = None) -> bytes:
+        """Download a segment (optionally only its first max_bytes)
+
+        A prefix is requested with a Range header; servers that ignore Range
+        are read only up to max_bytes and the connection is dropped.
+        """
+        cache_key = None
+        if self.cache is not None:
+            name = urlparse(segment.uri).path.rsplit('/', 1)[-1]
+            full_key = SegmentCache.make_key(*self.cache_namespace, name)
+            # A cached whole segment also serves any prefix of it
+            cached = self.cache.get(full_key, count_miss=not max_bytes)
+            if cached is not None and max_bytes:
+                cached = cached[:max_bytes]
+            elif cached is None and max_bytes:
+                cache_key = SegmentCache.make_key(*self.cache_namespace, name, max_bytes)
+                cached = self.cache.get(cache_key)
+            else:
+                cache_key = full_key
+            if cached is not None:
+                return self._with_init(segment, cached)
+
+        headers = {'Range': f'bytes=0-{max_bytes - 1}'} if max_bytes else None
+        with self.session.get(segment.uri, headers=headers, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            if not max_bytes:
+                data = response.content
+            else:
+                parts = []
+                received = 0
+                for part in response.iter_content(chunk_size=64 * 1024):
+                    parts.append(part)
+                    received += len(part)
+                    if received >= max_bytes:
+                        break
+                data = b''.join(parts)[:max_bytes]
+
+        self.bytes_fetched += len(data)
+        self.segments_fetched += 1
+        if cache_key is not None:
+            self.cache.put(cache_key, data)
+        return self._with_init(segment, data)
+
+    def _with_init(self, segment: HLSSegment, data: bytes) -> bytes:
+        """Prepend the fMP4 initialization section, if the playlist has one"""
+        if segment.init_uri:
+            return self._init_section(segment.init_uri) + data
+        return data
+
+    def _init_section(self, uri: str) -> bytes:
+        """fMP4 initialization section, fetched once per URI"""
+        if uri not in self._init_cache:
+            response = self.session.get(uri, timeout=self.timeout)
+            response.raise_for_status()
+            self._init_cache[uri] = response.content
+        return self._init_cache[uri]
+
+    def iter_fetch(self, segments: List[HLSSegment], max_bytes: Optional[int] = None) -> Iterator[Tuple[HLSSegment, bytes]]:
+        """Download segments concurrently and yield them in playlist order
+
+        At most max_workers downloads are in flight and at most 2x that many
+        finished segments wait in memory for the consumer.
+        """
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hls-fetch') as pool:
+            pending = []
+            upcoming = iter(segments)
+            for segment in upcoming:
+                pending.append((segment, pool.submit(self.fetch, segment, max_bytes)))
+                if len(pending) >= window:
+                    break
+            while pending:
+                segment, future = pending.pop(0)
+                data = future.result()
+                next_segment = next(upcoming, None)
+                if next_segment is not None:
+                    pending.append((next_segment, pool.submit(self.fetch, next_segment, max_bytes)))
+                yield segment, data
+
+    def close(self):
+        self.session.close()
+
+
+class KeyframeDecoder:
+    """Decode the keyframes of one segment with a short-lived FFmpeg process
+
+    FFmpeg runs with -skip_frame nokey, so non-key frames are never decoded,
+    and crops before converting to bgr24. Frame timestamps are taken from
+    showinfo and made relative to the segment's first keyframe.
+    """
+
+    def __init__(self, crop: Tuple[int, int, int, int], scaled_size: Optional[Tuple[int, int]] = None,
+                 loglevel: str = 'warning'):
+        """Initialize decoder
+
+        Args:
+            crop: (w, h, x, y) crop in pixels, as returned by percent_to_pixels
+            scaled_size: Optional (w, h) to downscale the crop to
+            loglevel: FFmpeg log level forwarded to our logger
+        """
+        self.crop_width, self.crop_height, self.x, self.y = crop
+        self.scaled_size = scaled_size
+        self.width, self.height = scaled_size or (self.crop_width, self.crop_height)
+        self.loglevel = loglevel
+        self.logger = logging.getLogger('sfot.hls')
+
+    def decode(self, data: bytes, max_frames: Optional[int] = None) -> List[Tuple[float, np.ndarray]]:
+        """Decode keyframes from segment bytes
+
+        Args:
+            data: Segment bytes (a prefix is fine when only the leading IDR is needed)
+            max_frames: Stop after this many keyframes (1 = leading IDR only)
+
+        Returns:
+            List of (offset_seconds_from_first_keyframe, HxWx3 BGR frame)
+        """
+        return self._run(['-i', 'pipe:0'], data, max_frames)
+
+    def decode_file(self, path: str, start: float, max_frames: Optional[int] = 1) -> List[Tuple[float, np.ndarray]]:
+        """Decode keyframes from a local file, starting at the first keyframe at or after start
+
+        Args:
+            path: Video file path
+            start: Position in seconds
+            max_frames: Stop after this many keyframes
+
+        Returns:
+            List of (position_seconds, HxWx3 BGR frame) - showinfo times are
+            relative to -ss on a seekable file, so start + pts_time
+        """
+        return self._run(['-ss', str(start), '-i', path], None, max_frames, origin=start)
+
+    def _run(self, input_args: List[str], data: Optional[bytes],
+             max_frames: Optional[int], origin: Optional[float] = None) -> List[Tuple[float, np.ndarray]]:
+        """Decode keyframes; times are offsets from the first one, or origin + pts_time when origin is set"""
+        filters = [f'crop={self.crop_width}:{self.crop_height}:{self.x}:{self.y}:exact=1']
+        if self.scaled_size:
+            filters.append(f'scale={self.width}:{self.height}:flags=area')
+        filters.append('showinfo=checksum=0')
+
+        cmd = [
+            'ffmpeg', '-hide_banner',
+            '-skip_frame', 'nokey',
+            *input_args,
+            '-an',
+            '-vf', ','.join(filters),
+            '-fps_mode', 'passthrough',
+        ]
+        if max_frames:
+            cmd += ['-frames:v', str(max_frames)]
+        cmd += ['-f', 'rawvideo', '-pix_fmt', 'bgr24', '-loglevel', 'level+info', 'pipe:1']
+
+        proc = subprocess.run(cmd, input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              stdin=None if data is not None else subprocess.DEVNULL)
+
+        pts_times = []
+        for line in proc.stderr.decode('utf-8', errors='ignore').splitlines():
+            match = ShowinfoPTSReader.FRAME_RE.search(line)
+            if match:
+                try:
+                    pts_times.append(float(match.group(1)))
+                except ValueError:
+                    pts_times.append(None)
+            elif '[error]' in line or '[fatal]' in line:
+                self.logger.debug(f"ffmpeg: {line}")
+
+        frame_size = self.width * self.height * 3
+        count = len(proc.stdout) // frame_size
+        buf = bytearray(proc.stdout)  # Writable, like frames from RawFrameReader
+        frames = []
+        first_pts = None
+        for i in range(count):
+            frame = np.frombuffer(buf, dtype=np.uint8, count=frame_size, offset=i * frame_size)
+            frame = frame.reshape(self.height, self.width, 3)
+            pts = pts_times[i] if i < len(pts_times) else None
+            if origin is not None:
+                frames.append((origin + (pts or 0.0), frame))
+                continue
+            if pts is not None and first_pts is None:
+                first_pts = pts
+            offset = (pts - first_pts) if pts is not None and first_pts is not None else 0.0
+            frames.append((offset, frame))
+        return frames
+
+
+def plan_segments(segments: List[HLSSegment], interval: float, start: float, end: float,
+                  tolerance: float = 0.25) -> Tuple[List[HLSSegment], bool]:
+    """Choose which segments to fetch for a sampling interval
+
+    When the interval is at least one segment long, only segments whose
+    leading keyframe falls on a sample point are needed and only their
+    leading IDR is decoded. Otherwise every segment is fetched and all of its
+    keyframes are decoded (the KeyframeSampler makes the final call).
+
+    Returns:
+        (segments_to_fetch, leading_only)
+    """
+    candidates = [s for s in segments if s.start < end and s.start + s.duration > start]
+    if not candidates:
+        return [], False
+
+    longest = max(s.duration for s in candidates)
+    if interval < longest * (1 - tolerance):
+        return candidates, False
+
+    planned = []
+    next_due = start
+    for segment in candidates:
+        if segment.start >= next_due - interval * tolerance:
+            planned.append(segment)
+            next_due = segment.start + interval
+    return planned, True
+
+
+def iter_keyframes(fetcher: HLSSegmentFetcher, decoder: KeyframeDecoder, segments: List[HLSSegment],
+                   leading_only: bool, leading_bytes: Optional[int] = None,
+                   skip: Optional[Callable[[HLSSegment], bool]] = None) -> Iterator[Tuple[float, np.ndarray, HLSSegment]]:
+    """Fetch and decode the planned segments, yielding (vod_timestamp, frame, segment) in order
+
+    In leading-only mode just the first leading_bytes of each segment are
+    downloaded; if that prefix doesn't contain a whole keyframe the full
+    segment is fetched instead. `skip` is asked about each segment right
+    before it is decoded (downloads already in flight are discarded).
+    """
+    max_bytes = leading_bytes if leading_only and leading_bytes else None
+    logger = logging.getLogger('sfot.hls')
+
+    for segment, data in fetcher.iter_fetch(segments, max_bytes):
+        if skip is not None and skip(segment):
+            continue
+        frames = decoder.decode(data, max_frames=1 if leading_only else None)
+        if not frames and max_bytes:
+            logger.debug(f"Segment {segment.index}: no keyframe in first {max_bytes} bytes, fetching whole segment")
+            frames = decoder.decode(fetcher.fetch(segment), max_frames=1)
+        if not frames:
+            logger.warning(f"Segment {segment.index} ({segment.start:.1f}s) produced no keyframes")
+            continue
+        for offset, frame in frames:
+            yield segment.start + offset, frame, segment
+
+
+
+def keyframe_at(fetcher: HLSSegmentFetcher, decoder: KeyframeDecoder, segments: List[HLSSegment],
+                timestamp: float, leading_bytes: Optional[int] = None) -> Optional[Tuple[float, np.ndarray]]:
+    """Fetch the single keyframe nearest timestamp, e.g. from another rendition
+
+    Renditions of a VOD are cut on the same keyframes, so a keyframe found in
+    one rendition exists at the same time in the others. When timestamp is
+    the segment's leading keyframe only a prefix is downloaded.
+
+    Returns:
+        (vod_timestamp, frame), or None if no segment covers timestamp
+    """
+    segment = next((s for s in segments if s.start <= timestamp < s.start + s.duration), None)
+    if segment is None:
+        return None
+
+    frames = []
+    if leading_bytes and timestamp - segment.start < 1.0:
+        frames = decoder.decode(fetcher.fetch(segment, leading_bytes), max_frames=1)
+    if not frames:
+        frames = decoder.decode(fetcher.fetch(segment))
+    if not frames:
+        return None
+
+    offset, frame = min(frames, key=lambda f: abs(segment.start + f[0] - timestamp))
+    return segment.start + offset, frame
+
+def resolve_twitch_live(channel: str, quality: str) -> str:
+    """Resolve a live Twitch channel to its media playlist URL (streamlink, as resolve_twitch_vod)"""
+    from streamlink import Streamlink
+
+    streams = Streamlink().streams(f'https://twitch.tv/{channel}')
+    if not streams:
+        raise ValueError(f"Channel {channel} is not live")
+    stream = streams.get(quality) or streams.get(f'{quality}60') or streams.get(f'{quality}30')
+    if stream is None:
+        raise ValueError(f"Quality {quality} not available for {channel} (have: {', '.join(streams)})")
+    return stream.url
+
+
+class LivePlaylistFollower:
+    """Poll a live media playlist and yield each new segment once, in order
+
+    Starts at the live edge. Only the newest `buffer_segments` unprocessed
+    segments are kept: when the consumer falls further behind, the oldest are
+    dropped so latency stays bounded instead of growing.
+
+    Segment start times continue one timeline across polls: `origin` at the
+    first segment followed, then the sum of the EXTINF durations since. When
+    segments left the playlist between two polls, the gap is taken from
+    EXT-X-PROGRAM-DATE-TIME (target duration per missed segment without it).
+    These are seconds since following began, not positions in the archived
+    VOD: a live playlist only lists the newest segments, and neither its media
+    sequence nor its durations say how long the stream has been running.
+    """
+
+    def __init__(self, fetcher: HLSSegmentFetcher, buffer_segments: int = 3, poll_interval: Optional[float] = None,
+                 idle_timeout: float = 30.0, stop: Optional[threading.Event] = None, origin: float = 0.0):
+        """Initialize follower
+
+        Args:
+            fetcher: Fetcher whose playlist_url is the live media playlist
+            buffer_segments: Most segments allowed to wait for processing
+            poll_interval: Seconds between reloads (default: half the target duration)
+            idle_timeout: Give up when the playlist hasn't grown for this long
+            stop: Event that ends following
+            origin: Start time given to the first segment followed
+        """
+        self.fetcher = fetcher
+        self.buffer_segments = max(1, buffer_segments)
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.stop = stop or threading.Event()
+        self.origin = origin
+        self.logger = logging.getLogger('sfot.hls')
+
+        self.segments_seen = 0
+        self.segments_dropped = 0
+        self.ended = False                 # EXT-X-ENDLIST seen
+        self.seen_at: Dict[int, float] = {}  # Sequence number -> wall time it appeared in the playlist
+        self._last: Optional[HLSSegment] = None
+
+    def _rebase(self, segment: HLSSegment) -> HLSSegment:
+        """Place a segment on the follower's timeline (see the class docstring)"""
+        last = self._last
+        if last is None:
+            start = self.origin
+        else:
+            start = last.start + last.duration
+            missed = segment.index - last.index - 1
+            if missed > 0:
+                if segment.program_date_time is not None and last.program_date_time is not None:
+                    start = last.start + (segment.program_date_time - last.program_date_time)
+                else:
+                    start += missed * (self.fetcher.target_duration or segment.duration)
+        segment = segment._replace(start=start)
+        self._last = segment
+        return segment
+
+    def follow(self) -> Iterator[HLSSegment]:
+        """Yield new segments until the stream ends, goes idle or stop is set"""
+        last_growth = time.time()
+        pending: List[HLSSegment] = []
+        first_poll = True
+
+        while not self.stop.is_set():
+            poll_start = time.time()
+            try:
+                segments = self.fetcher.load_playlist()
+            except requests.RequestException as e:
+                self.logger.warning(f"Live playlist reload failed: {e}")
+                segments = []
+
+            newest = self._last.index if self._last is not None else None
+            new = [seg for seg in segments if newest is None or seg.index > newest]
+            if first_poll and new:
+                new = new[-self.buffer_segments:]  # Start at the live edge
+                first_poll = False
+            for seg in new:
+                self.seen_at[seg.index] = poll_start
+                pending.append(self._rebase(seg))
+            if new:
+                last_growth = poll_start
+                self.segments_seen += len(new)
+
+            if len(pending) > self.buffer_segments:
+                dropped = len(pending) - self.buffer_segments
+                self.segments_dropped += dropped
+                self.logger.warning(f"Live processing behind, dropping {dropped} oldest segments")
+                pending = pending[dropped:]
+
+            while pending and not self.stop.is_set():
+                yield pending.pop(0)
+
+            if self.fetcher.has_endlist:
+                self.ended = True
+                self.logger.info("Live playlist ended (EXT-X-ENDLIST)")
+                return
+            if time.time() - last_growth > self.idle_timeout:
+                self.logger.info(f"Live playlist idle for {self.idle_timeout:.0f}s, assuming the stream ended")
+                return
+
+            interval = self.poll_interval or max(0.5, (self.fetcher.target_duration or 2.0) / 2)
+            self.stop.wait(max(0.0, interval - (time.time() - poll_start)))
+
+
+def test_hls_fetcher():
+    """Fetch and decode a playlist, e.g. one served by `python -m http.server`"""
+    import sys
+    import time
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    if len(sys.argv) < 2:
+        print("Usage: hls_fetcher.py <playlist_url> [start] [end] [interval] [quality]")
+        return
+
+    url = sys.argv[1]
+    start = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    end = float(sys.argv[3]) if len(sys.argv) > 3 else float('inf')
+    interval = float(sys.argv[4]) if len(sys.argv) > 4 else 2.0
+    quality = sys.argv[5] if len(sys.argv) > 5 else 'best'
+
+    fetcher = HLSSegmentFetcher(url)
+    segments = fetcher.load_playlist(quality)
+    print(f"{len(segments)} segments, target duration {fetcher.target_duration}s, endlist={fetcher.has_endlist}")
+
+    planned, leading_only = plan_segments(segments, interval, start, end)
+    print(f"Fetching {len(planned)} segments ({'leading IDR only' if leading_only else 'all keyframes'})")
+
+    if not planned:
+        return
+
+    # Probe the frame size from the first segment and decode uncropped
+    info = subprocess.run(['ffmpeg', '-hide_banner', '-i', 'pipe:0'], input=fetcher.fetch(planned[0]),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE).stderr.decode(errors='ignore')
+    size = re.search(r'Video:.*?\b(\d{2,5})x(\d{2,5})\b', info)
+    if not size:
+        print("Could not probe first segment")
+        return
+    decoder = KeyframeDecoder((int(size.group(1)), int(size.group(2)), 0, 0))
+    fetcher.bytes_fetched = fetcher.segments_fetched = 0
+
+    started = time.time()
+    frames = 0
+    for timestamp, frame, segment in iter_keyframes(fetcher, decoder, planned, leading_only, 512 * 1024):
+        frames += 1
+        print(f"  {timestamp:8.2f}s  {frame.shape[1]}x{frame.shape[0]}  segment {segment.index}")
+
+    print(f"Decoded {frames} frames from {fetcher.segments_fetched} segments "
+          f"({fetcher.bytes_fetched / 1024:.0f} KB) in {time.time() - started:.2f}s")
+    fetcher.close()
+
+
+if __name__ == "__main__":
+    test_hls_fetcher()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+PyAV ingestion - demuxes and decodes in-process with FFmpeg's libraries
+
+Replaces the streamlink | FFmpeg pipe pair for processing.ingest_backend
+"pyav". Packets are read one by one, so non-key packets and keyframes the
+sampler would discard are dropped before they reach the decoder, skip-ahead
+seeks the open container instead of restarting a process, and decoded frames
+are cropped in NumPy and go straight to the frame queue - no pipes, no
+startup sleeps.
+
+PyAV is optional (pip install av); nothing else imports this module's
+decoder unless the backend is selected.
+"""
+
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import av
+except ImportError:  # Optional dependency, only needed for ingest_backend "pyav"
+    av = None
+
+
+class PyAVDecoder:
+    """One open input (local file or HLS media playlist) with a cropping video decoder"""
+
+    def __init__(self, source: str, crop: Tuple[int, int, int, int], scaled_size: Optional[Tuple[int, int]] = None,
+                 keyframes_only: bool = True, timeout: float = 20.0, options: Optional[Dict[str, str]] = None):
+        """Open the input
+
+        Args:
+            source: File path or URL (an HLS media playlist is demuxed by FFmpeg's hls demuxer)
+            crop: (w, h, x, y) crop in pixels, as returned by percent_to_pixels
+            scaled_size: Optional (w, h) to downscale the crop to
+            keyframes_only: Drop non-key packets before decoding (like -skip_frame nokey)
+            timeout: Network open/read timeout in seconds
+            options: Extra FFmpeg format options
+        """
+        if av is None:
+            raise ImportError("PyAV is not installed (pip install av) - required for ingest_backend 'pyav'")
+
+        self.crop_width, self.crop_height, self.x, self.y = crop
+        self.scaled_size = scaled_size
+        self.keyframes_only = keyframes_only
+        self.logger = logging.getLogger('sfot.pyav')
+
+        self.container = av.open(source, options=options or {}, timeout=timeout)
+        self.stream = self.container.streams.video[0]
+        if keyframes_only:
+            # Belt and braces: we never send it non-key packets anyway
+            self.stream.codec_context.skip_frame = 'NONKEY'
+        self.time_base = float(self.stream.time_base)
+        # Timestamps are reported relative to the start of the input (HLS/TS inputs rarely start at 0)
+        self.start_offset = self.stream.start_time * self.time_base if self.stream.start_time is not None else 0.0
+
+        self.packets_read = 0
+        self.packets_skipped = 0  # Never decoded (non-key, or rejected on their timestamp)
+        self.frames_decoded = 0
+        self.bytes_read = 0
+        self.seeks = 0
+
+    def packets(self) -> Iterator[Tuple[float, 'av.Packet']]:
+        """Yield (timestamp_seconds, packet) for the video stream from the current position"""
+        for packet in self.container.demux(self.stream):
+            if packet.pts is None or packet.size == 0:
+                continue  # Flush packet at end of stream
+            self.packets_read += 1
+            self.bytes_read += packet.size
+            if self.keyframes_only and not packet.is_keyframe:
+                self.packets_skipped += 1
+                continue
+            yield packet.pts * self.time_base - self.start_offset, packet
+
+    def skip(self):
+        """Account for a yielded packet the caller dropped without decoding"""
+        self.packets_skipped += 1
+
+    def decode(self, packet: Optional['av.Packet']) -> List[Tuple[float, 'av.VideoFrame']]:
+        """Decode a packet (None flushes the decoder)
+
+        Returns:
+            List of (timestamp_seconds, frame), usually one per packet. Frames
+            are still in the codec's pixel format - crop() the ones you keep.
+        """
+        frames = []
+        for frame in self.stream.codec_context.decode(packet):
+            if frame.pts is None:
+                continue
+            self.frames_decoded += 1
+            frames.append((frame.pts * self.time_base - self.start_offset, frame))
+        return frames
+
+    def flush(self) -> List[Tuple[float, 'av.VideoFrame']]:
+        """Drain the frames the decoder still holds and reset it for more packets
+
+        With B-frames the decoder runs a few packets behind (a keyframe comes out
+        when a later one goes in), so call this at the end of a range and before
+        every seek, or those frames are lost.
+        """
+        frames = self.decode(None)
+        self.stream.codec_context.flush_buffers()
+        return frames
+
+    def crop(self, frame: 'av.VideoFrame') -> np.ndarray:
+        """Convert a decoded frame to a BGR crop (scaled to scaled_size if set)"""
+        image = frame.to_ndarray(format='bgr24')
+        crop = image[self.y:self.y + self.crop_height, self.x:self.x + self.crop_width]
+        if self.scaled_size:
+            return cv2.resize(crop, self.scaled_size, interpolation=cv2.INTER_AREA)
+        return np.ascontiguousarray(crop)
+
+    def seek(self, position: float):
+        """Jump to the keyframe at or before position (seconds); flush() first, pending decoder output is dropped"""
+        self.container.seek(int((position + self.start_offset) / self.time_base),
+                            stream=self.stream, backward=True, any_frame=False)
+        self.seeks += 1
+
+    def close(self):
+        self.container.close()
@@ -10,18 +10,30 @@ from pathlib import Path
 from typing import Tuple, Optional
 import logging
 
+from detection_context import CHANNEL_MODES, DetectionContext, RightEdgeMatch, ScoreMap, to_channels
+from template_bank import TemplateBank, resolution_height
+
 class RightEdgeDetector:
     """Detect right edge boundaries in nameplate frames"""
 
-    def __init__(self, templates_dir: str = "/home/kaio/Dev/bazaar-ghost/sfot/templates", resolution: str = "480p"):
+    def __init__(self, templates_dir: str = "/home/kaio/Dev/bazaar-ghost/sfot/templates", resolution: str = "480p",
+                 channels: str = 'bgr', template_bank: Optional[TemplateBank] = None):
         """Initialize with right edge template for specified resolution
 
         Args:
             templates_dir: Directory containing right edge templates
-            resolution: Resolution to use for template (360p, 480p, 720p, 1080p)
+            resolution: Resolution to use for template (360p, 480p, 720p, 1080p;
+                any other height, e.g. 936p, needs template_bank)
+            channels: Match on "bgr", "luma" or one colour channel ("b", "g", "r")
+            template_bank: Take the template from this bank (hand-cut or derived
+                for the resolution's height) instead of right_edge_{resolution}.png only
         """
+        if channels not in CHANNEL_MODES:
+            raise ValueError(f"Unknown right edge matching channels: {channels}")
         self.templates_dir = Path(templates_dir)
         self.resolution = resolution
+        self.channels = channels
+        self.template_bank = template_bank
         self.template = None
         self.mask = None  # Store alpha mask for template
         self.logger = logging.getLogger(__name__)
@@ -31,6 +43,17 @@ class RightEdgeDetector:
 
     def _load_template(self):
         """Load the right edge template for the specified resolution"""
+        frame_height = resolution_height(self.resolution)
+        if self.template_bank is not None and frame_height:
+            loaded = self.template_bank.get('right_edge', frame_height)
+            if loaded is None:
+                self.logger.warning(f"No right edge template for {self.resolution}")
+                return
+            self.template = to_channels(loaded.image, self.channels)
+            self.mask = loaded.mask
+            self.logger.info(f"Loaded right edge template from {loaded.source}")
+            return
+
         template_path = self.templates_dir / f"right_edge_{self.resolution}.png"
 
         if template_path.exists():
@@ -40,14 +63,14 @@ class RightEdgeDetector:
                 # If template has alpha channel, extract BGR and create mask
                 if len(template_bgra.shape) == 3 and template_bgra.shape[2] == 4:
                     # Has alpha channel - extract BGR and alpha mask
-                    self.template = template_bgra[:,:,:3]  # BGR channels only
+                    self.template = to_channels(template_bgra[:,:,:3], self.channels)  # BGR channels only (or converted)
                     alpha = template_bgra[:,:,3]           # Alpha channel
                     # Create binary mask: pixels with alpha > 0 are valid
                     self.mask = (alpha > 0).astype(np.uint8)
                     self.logger.info(f"Loaded right edge template from {template_path.name} with mask")
                 else:
                     # No alpha channel, use as-is with no mask
-                    self.template = template_bgra
+                    self.template = to_channels(template_bgra, self.channels)
                     self.mask = None
                     self.logger.info(f"Loaded right edge template from {template_path.name} without mask")
 
@@ -58,13 +81,19 @@ class RightEdgeDetector:
         else:
             self.logger.warning(f"Right edge template not found: {template_path}")
 
-    def detect_right_edge(self, frame: np.ndarray, threshold: float = 0.7) -> Tuple[Optional[int], float]:
+    def detect_right_edge(self, frame: np.ndarray, threshold: float = 0.7,
+                          context: Optional[DetectionContext] = None,
+                          roi: Optional[Tuple[int, int, int, int]] = None) -> Tuple[Optional[int], float]:
         """
         Detect the right edge boundary in the frame
 
         Args:
-            frame: Input frame (color)
+            frame: Input frame (color, converted to the matching channels here)
             threshold: Matching threshold (0-1)
+            context: Optional per-frame context; gets the best match location
+                and the score map, even below threshold
+            roi: Optional (x0, y0, x1, y1) window to search instead of the whole
+                frame; right_edge_x and locations are still in frame pixels
 
         Returns:
             (right_edge_x, confidence) or (None, 0.0) if no match
@@ -74,6 +103,13 @@ class RightEdgeDetector:
             self.logger.warning("No template loaded for right edge detection")
             return None, 0.0
 
+        frame = context.plane(frame, self.channels) if context is not None else to_channels(frame, self.channels)
+        origin = (0, 0)
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            frame = frame[y0:y1, x0:x1]
+            origin = (x0, y0)
+
         # Ensure template fits in frame
         if self.template.shape[0] > frame.shape[0] or self.template.shape[1] > frame.shape[1]:
             self.logger.debug("Template larger than frame, skipping detection")
@@ -88,18 +124,22 @@ class RightEdgeDetector:
                 result = cv2.matchTemplate(frame, self.template, cv2.TM_SQDIFF)
 
             min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
+            min_loc = (min_loc[0] + origin[0], min_loc[1] + origin[1])
 
-            template_pixels = self.template.shape[0] * self.template.shape[1] * self.template.shape[2]
+            template_pixels = self.template.size
             max_possible_diff = template_pixels * 255 * 255 
             normalized_score = min_val / max_possible_diff
             confidence = 1.0 - min(normalized_score, 1.0)  # Clamp to [0, 1]
 
-            # Check if match exceeds threshold
-            if confidence >= threshold:
-                # Calculate right edge x-coordinate
-                template_width = self.template.shape[1]
-                right_edge_x = min_loc[0] + template_width  # Use min_loc for TM_SQDIFF
+            # Right edge x-coordinate if the match exceeds threshold (min_loc for TM_SQDIFF)
+            template_h, template_w = self.template.shape[:2]
+            right_edge_x = min_loc[0] + template_w if confidence >= threshold else None
+
+            if context is not None:
+                context.right_edge = RightEdgeMatch(right_edge_x, min_loc, (template_w, template_h), confidence)
+                context.right_edge_map = ScoreMap(origin, result)
 
+            if right_edge_x is not None:
                 self.logger.debug(
                     f"Right edge detected at x={right_edge_x} "
                     f"(template at {min_loc[0]}), confidence={confidence:.3f}"
@@ -113,13 +153,61 @@ class RightEdgeDetector:
             self.logger.error(f"Right edge detection error: {e}")
             return None, 0.0
 
-    def create_debug_visualization(self, frame: np.ndarray, threshold: float = 0.7) -> np.ndarray:
+    def emblem_band(self, frame_shape: Tuple[int, ...], emblem_bbox: Tuple[int, int, int, int],
+                    margin: float = 0.25) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Search window for the edge of the nameplate an emblem sits on
+
+        The right edge is on the emblem's row, to its right: the window spans
+        from the emblem's right side to the frame's, over the emblem's rows
+        padded by margin x its height.
+
+        Args:
+            frame_shape: Shape of the frame the emblem was found in
+            emblem_bbox: (x, y, w, h) from EmblemDetector.detect_emblem
+            margin: Vertical padding, in emblem heights
+
+        Returns:
+            (x0, y0, x1, y1), or None if the template does not fit in it
+        """
+        if self.template is None:
+            return None
+        frame_h, frame_w = frame_shape[:2]
+        x, y, w, h = emblem_bbox
+        pad = round(h * margin)
+        x0, y0 = min(frame_w, max(0, x + w)), max(0, y - pad)
+        y1 = min(frame_h, y + h + pad)
+        template_h, template_w = self.template.shape[:2]
+        if frame_w - x0 < template_w or y1 - y0 < template_h:
+            return None
+        return x0, y0, frame_w, y1
+
+    def detect_right_edge_beside(self, frame: np.ndarray, emblem_bbox: Tuple[int, int, int, int],
+                                 threshold: float = 0.7, context: Optional[DetectionContext] = None,
+                                 margin: float = 0.25) -> Tuple[Optional[int], float]:
+        """
+        detect_right_edge within the emblem's row band (see emblem_band)
+
+        Falls back to the whole frame when the band is too small for the template.
+
+        Returns:
+            (right_edge_x, confidence) as detect_right_edge
+        """
+        roi = self.emblem_band(frame.shape, emblem_bbox, margin)
+        if roi is None:
+            self.logger.debug(f"Emblem band around {emblem_bbox} too small for the template, searching the whole frame")
+        return self.detect_right_edge(frame, threshold, context, roi)
+
+    def create_debug_visualization(self, frame: np.ndarray, threshold: float = 0.7,
+                                   context: Optional[DetectionContext] = None) -> np.ndarray:
         """
         Create a visualization showing detected right edge
 
         Args:
             frame: Input frame
             threshold: Detection threshold
+            context: Detection context of this frame; its right-edge match is
+                drawn instead of matching again
 
         Returns:
             Visualization frame with overlay
@@ -130,8 +218,12 @@ class RightEdgeDetector:
         else:
             vis = frame.copy()
 
-        # Detect right edge
-        right_edge_x, confidence = self.detect_right_edge(frame, threshold)
+        # Detect right edge (or take the frame's earlier match)
+        if context is None or context.right_edge is None:
+            context = DetectionContext(frame.shape)
+            self.detect_right_edge(frame, threshold, context)
+        match = context.right_edge
+        right_edge_x = match.x if match is not None else None
 
         if right_edge_x is not None and self.template is not None:
             # # Draw vertical line at right edge
@@ -140,13 +232,8 @@ class RightEdgeDetector:
             # Draw template bounding box
             template_h, template_w = self.template.shape[:2]
             template_x = right_edge_x - template_w
-
-            # Find the y position (from the match location)
-            if self.mask is not None:
-                result = cv2.matchTemplate(frame, self.template, cv2.TM_SQDIFF, mask=self.mask)
-            else:
-                result = cv2.matchTemplate(frame, self.template, cv2.TM_SQDIFF)
-            _, _, min_loc, _ = cv2.minMaxLoc(result)
+            min_loc = match.location
+            confidence = match.confidence
 
             cv2.rectangle(vis,
                          (template_x, min_loc[1]),
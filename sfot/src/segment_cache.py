@@ -0,0 +1,167 @@
+"""
+Segment cache module - Content-addressed on-disk cache for HLS segments with LRU eviction
+"""
+
+import collections
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class SegmentCache:
+    """Keep downloaded HLS segments on local disk so reruns skip the network
+
+    Entries are keyed by (VOD, rendition, segment name[, byte limit]) and
+    stored under the SHA-256 of that key. Recency is kept in file mtimes, so
+    the LRU order survives across runs; when the total size goes over the
+    budget the least recently used entries are deleted.
+
+    Safe to share between the fetch threads of every ingest range.
+    """
+
+    SUFFIX = '.seg'
+
+    def __init__(self, directory: str, max_bytes: int):
+        """Initialize cache
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Size budget; older entries are evicted past it
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger('sfot.segment_cache')
+
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[Path, int]" = collections.OrderedDict()  # path -> size, LRU first
+        self.total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def make_key(namespace: str, rendition: str, segment_name: str, max_bytes: Optional[int] = None) -> str:
+        """Cache key for a segment (or for its first max_bytes bytes)"""
+        key = f"{namespace}/{rendition}/{segment_name}"
+        return f"{key}#0-{max_bytes}" if max_bytes else key
+
+    def get(self, key: str, count_miss: bool = True) -> Optional[bytes]:
+        """Return the cached bytes for key, or None
+
+        Args:
+            key: Key from make_key
+            count_miss: Count a lookup that finds nothing as a miss (off for
+                lookups that fall through to another key)
+        """
+        path = self._path(key)
+        with self._lock:
+            known = path in self._entries
+            if known:
+                self._entries.move_to_end(path)
+
+        data = None
+        if known:
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # Persist recency for the next run's scan
+            except OSError:
+                self._forget(path)
+
+        with self._lock:
+            if data is None:
+                self.misses += int(count_miss)
+            else:
+                self.hits += 1
+                self.bytes_served += len(data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store data under key, evicting least recently used entries past the budget"""
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+
+        # Write to a temp file and rename, so readers never see a partial segment
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f"Could not cache segment: {e}")
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self.total_bytes -= self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self.total_bytes += len(data)
+            evict = []
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_path, size = self._entries.popitem(last=False)
+                self.total_bytes -= size
+                self.evictions += 1
+                evict.append(old_path)
+
+        for old_path in evict:
+            try:
+                old_path.unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """Counters for logging / chunk_finished"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'bytes_served': self.bytes_served,
+                'size_bytes': self.total_bytes,
+            }
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.directory / digest[:2] / f"{digest}{self.SUFFIX}"
+
+    def _forget(self, path: Path):
+        with self._lock:
+            self.total_bytes -= self._entries.pop(path, 0)
+
+    def _scan(self):
+        """Rebuild the LRU index from disk (oldest mtime first) and enforce the budget"""
+        found = []
+        for path in self.directory.glob(f'*/*{self.SUFFIX}'):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            found.append((st.st_mtime, path, st.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self.total_bytes += size
+
+        while self.total_bytes > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+        self.logger.info(f"Segment cache at {self.directory}: {len(self._entries)} entries, "
+                         f"{self.total_bytes / 1024 / 1024:.1f}/{self.max_bytes / 1024 / 1024:.0f} MB")
@@ -15,7 +15,7 @@ import json
 import logging
 import math
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List, Callable
 import yaml
 import numpy as np
 from dotenv import load_dotenv
@@ -26,6 +26,18 @@ load_dotenv(".env.local")
 
 # Import worker modules
 from frame_processor import FrameProcessor
+from frame_reader import (
+    RawFrameReader, JPEGStreamDemuxer, FrameEnvelope, ShowinfoPTSReader, KeyframeSampler
+)
+from hls_fetcher import (
+    HLSSegmentFetcher, KeyframeDecoder, LivePlaylistFollower, resolve_twitch_vod, resolve_twitch_live,
+    plan_segments, iter_keyframes, keyframe_at
+)
+from segment_cache import SegmentCache
+from frame_store import FrameStore, FrameStoreWriter, source_signature
+from frame_ring import SharedFrameRing, RingFrameReader
+from pyav_decoder import PyAVDecoder
+from template_bank import resolution_height
 from supabase_client import SupabaseClient
 from json_logger import JSONFormatter
 from telemetry import (
@@ -42,6 +54,58 @@ QUALITY_CONFIGS = {
     '1080p60': {'resolution': (1920, 1080), 'file_suffix': '1080p.mp4'}
 }
 
+# Frame size of each Twitch rendition (streamlink / native HLS)
+STREAM_RESOLUTIONS = {
+    '360p': (640, 360),
+    '480p': (854, 480),
+    '720p': (1280, 720),
+    '720p60': (1280, 720),
+    '1080p': (1920, 1080),
+    '1080p60': (1920, 1080)
+}
+
+
+def stream_resolution(quality: str) -> Tuple[int, int]:
+    """Frame size of a rendition: STREAM_RESOLUTIONS, else 16:9 at the height in its name (936p -> 1664x936)"""
+    if quality in STREAM_RESOLUTIONS:
+        return STREAM_RESOLUTIONS[quality]
+    height = resolution_height(quality)
+    if height is None:
+        return 854, 480
+    return round(height * 16 / 9 / 2) * 2, height
+
+
+# Twitch VOD HLS segment length. Sub-range boundaries are aligned to it because
+# --hls-start-offset always starts at the beginning of the containing segment.
+HLS_SEGMENT_SECONDS = 10
+# Twitch encodes a keyframe every 2 seconds (used to estimate skipped keyframe decodes)
+KEYFRAME_INTERVAL_SECONDS = 2
+
+
+class IngestRange:
+    """One [start, end) slice of the chunk with its own streamlink/FFmpeg pair"""
+
+    def __init__(self, index: int, count: int, start: int, end: int, frame_rate: Optional[float] = None,
+                 scale: float = 1.0, keyframes_only: Optional[bool] = None):
+        self.index = index
+        self.count = count
+        self.start = start
+        self.end = end
+        self.frame_rate = frame_rate          # Sampling rate override (None = processing.frame_rate)
+        self.scale = scale                    # Downscale factor applied after the crop
+        self.keyframes_only = keyframes_only  # Decode keyframes only (None = ffmpeg / test_mode keyframes_only)
+        self.streamlink_proc: Optional[subprocess.Popen] = None
+        self.ffmpeg_proc: Optional[subprocess.Popen] = None
+        self.decoder_proc: Optional[subprocess.Popen] = None  # ffmpeg.decoder_process reading ffmpeg_proc
+
+    @property
+    def duration(self) -> int:
+        return self.end - self.start
+
+    @property
+    def label(self) -> str:
+        return f"range {self.index + 1}/{self.count} [{self.start}-{self.end}]"
+
 class SFOTProcessor:
     """Main SFOT processor orchestrator"""
 
@@ -52,12 +116,54 @@ class SFOTProcessor:
         self.quality = config.get('quality', '480p')
         self.old_templates = config.get('old_templates', False)
         self.video_fps = config.get('video_fps', 30)  # Actual video FPS
+        self.ingest_workers = config.get('ingest_workers')  # Parallel sub-ranges (None = config.yaml)
+        self.ingest_backend = config.get('ingest_backend')  # "streamlink", "hls" or "pyav" (None = config.yaml)
+        self.hls_playlist_url = config.get('hls_playlist_url')  # Playlist override (None = config.yaml / Twitch)
+        self.two_pass = config.get('two_pass')  # Coarse/fine sampling (None = config.yaml)
+        self.hls_cache_dir = config.get('hls_cache_dir')  # Segment cache directory (None = config.yaml)
+        self.dual_rendition = config.get('dual_rendition')  # Detect low-res, OCR high-res (None = config.yaml)
+        self.sparse_probe = config.get('sparse_probe')  # Probe before sampling, skip non-Bazaar stretches (None = config.yaml)
+        self.frame_store_dir = config.get('frame_store_dir')  # Test mode decoded-frame store (None = config.yaml)
+        self.emblem_prior_dir = config.get('emblem_prior_dir')  # Learned emblem locations (None = config.yaml)
+        self.decoder_process = config.get('decoder_process')  # Read/decode FFmpeg output in a separate process (None = config.yaml)
+        self.live = config.get('live')  # Follow a live stream instead of a VOD (None = config.yaml)
+        self.live_channel = config.get('live_channel')  # Channel to follow (None = config.yaml / chunk streamer)
 
         self.formatted_quality = f"{self.quality}60" if self.video_fps == 60 else self.quality
 
         # Load configuration
         self.config = self._load_config()
 
+        hls_config = self.config.get('hls', {})
+        self.ingest_backend = self.ingest_backend or self.config['processing'].get('ingest_backend', 'streamlink')
+        self.hls_playlist_url = self.hls_playlist_url or hls_config.get('playlist_url')
+        self.hls_cache_dir = self.hls_cache_dir or hls_config.get('cache_dir')
+        # Test mode reads local files unless a playlist (e.g. a local HLS server) is given
+        self.native_hls = self.ingest_backend == 'hls' and (not self.test_mode or bool(self.hls_playlist_url))
+        self.pyav_ingest = self.ingest_backend == 'pyav'
+        if self.two_pass is None:
+            self.two_pass = self.config.get('two_pass', {}).get('enabled', False)
+        if self.decoder_process is None:
+            self.decoder_process = self.config['ffmpeg'].get('decoder_process', False)
+        if self.sparse_probe is None:
+            self.sparse_probe = self.config.get('sparse_probe', {}).get('enabled', False)
+        if self.live is None:
+            self.live = self.config.get('live', {}).get('enabled', False)
+        if self.live and (self.two_pass or self.sparse_probe):
+            # Both look ahead over the whole chunk, which a live stream doesn't have yet
+            self.two_pass = self.sparse_probe = False
+
+        # Dual-rendition mode: detection runs on the cheap rendition, and only confirmed
+        # matchups fetch their keyframe from the OCR rendition
+        dual_config = self.config.get('dual_rendition', {})
+        if self.dual_rendition is None:
+            self.dual_rendition = dual_config.get('enabled', False)
+        self.ocr_quality = None
+        if self.dual_rendition:
+            self.quality = dual_config.get('detect_quality', '360p')
+            self.ocr_quality = dual_config.get('ocr_quality', '1080p')
+            self.formatted_quality = f"{self.quality}60" if self.video_fps == 60 else self.quality
+
         # Parse SFOT profile from environment variable
         self.profile = self._parse_sfot_profile()
 
@@ -83,21 +189,62 @@ class SFOTProcessor:
         self.frame_queue = queue.Queue(maxsize=self.config['processing']['queue_size'])
         self.result_queue = queue.Queue()
         self.shutdown = threading.Event()
+        self.ingest_done = threading.Event()     # All ingest workers finished
+        self.detection_done = threading.Event()  # opencv_worker drained the frame queue
 
         # Process state
-        self.streamlink_proc: Optional[subprocess.Popen] = None
-        self.ffmpeg_proc: Optional[subprocess.Popen] = None
+        test_mode_config = self.config.get('test_mode', {})
+        self.frame_store_dir = self.frame_store_dir or test_mode_config.get('frame_store_dir')
+        self.ingest_lanes = max(1, self.ingest_workers
+                                or (self.test_mode and test_mode_config.get('ingest_workers'))
+                                or self.config['processing'].get('ingest_workers', 1))
+        if self.live:
+            # Every lane would follow the same playlist and fetch and enqueue each segment again
+            self.ingest_lanes = 1
+        self.ingest_ranges = self._split_ingest_ranges(self.ingest_lanes)
+        self._active_ingest = len(self.ingest_ranges)
+        self._ingest_lock = threading.Lock()
+        self.failed_ranges: List[str] = []  # "<range>: <reason>" for ranges that could not be ingested
+        self._hls_playlist: Optional[Tuple[str, list]] = None  # (media playlist URL, segments), shared by all ranges
+        self._hls_lock = threading.Lock()
+        self.segment_cache: Optional[SegmentCache] = None  # Created with the first native HLS fetcher
+        self._ocr_source = None  # Dual-rendition keyframe lookup, created on the first matchup
+        self._ocr_source_failed = False  # Creating it failed once - OCR detection frames for the rest of the chunk
+        self.dual_stats = {'hires_frames': 0, 'fallbacks': 0, 'bytes_fetched': 0}
+        self.live_stats = None
+        self.live_latencies: Dict[str, List[float]] = {'detected': [], 'pushed': []}  # Seconds since the frame aired
         self.frames_processed = 0
         self.matchups_found = 0
         self.result_batch = []  # Current batch being accumulated
         self.all_detections = []  # All detections for summary export
+        self.coarse_hits = []  # Two-pass mode: timestamps the coarse pass flagged
+        self.coarse_frames = 0
+        self.two_pass_stats = None
+        self.probe_results: Dict[int, bool] = {}  # Sparse probing: group start -> Bazaar UI seen
+        self.probe_stats = None
+        self._ingest_cutoff: Optional[int] = None  # Ranges starting at or after this are not ingested
+        # Skip-ahead gate: drop frames inside a confirmed matchup's interval before decoding them
+        skip_ahead = self.config.get('skip_ahead', {})
+        self.skip_ahead = skip_ahead.get('enabled', True)
+        self.min_seek_seconds = skip_ahead.get('min_seek_seconds', 4)
+        self.skip_stats = {'frames_gated': 0, 'seeks': 0, 'seconds_skipped': 0.0, 'decodes_avoided': 0}
+        self._skip_lock = threading.Lock()
+
+        if self.emblem_prior_dir:
+            self.config.setdefault('emblem_detection', {}).setdefault('roi', {})['prior_dir'] = self.emblem_prior_dir
 
         # Initialize frame processor with quality information and template selection
         self.frame_processor = FrameProcessor(self.config, quality=self.quality, old_templates=self.old_templates, profile=self.profile, streamer=self.streamer)
+        if self.dual_rendition:
+            self.frame_processor.ocr_frame_source = self._ocr_frame_at
 
         # Setup logging
         self._setup_logging()
 
+        if self.sparse_probe and self.frame_processor.ui_detector is None:
+            self.logger.warning("Sparse probing needs sparse_probe.reference_dir - sampling every segment")
+            self.sparse_probe = False
+
         # Initialize OpenTelemetry
         self._init_telemetry()
 
@@ -133,6 +280,56 @@ class SFOTProcessor:
         # Return in FFmpeg format [width, height, x, y]
         return [w, h, x, y]
 
+    @staticmethod
+    def _scaled_size(width: int, height: int, scale: float) -> Tuple[int, int]:
+        """Frame size after downscaling by `scale` (at least 1x1)"""
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _split_ingest_ranges(self, workers: int) -> List[IngestRange]:
+        """Split [start_time, end_time) into sub-ranges ingested in parallel
+
+        Boundaries are aligned to HLS segments and no sub-range is shorter than
+        processing.min_ingest_range_seconds, so short chunks stay serial. Live
+        mode always gets one range: every lane would follow the same playlist.
+
+        Args:
+            workers: Requested number of parallel streamlink/FFmpeg pairs
+
+        Returns:
+            Ordered list of IngestRange covering the chunk
+        """
+        if self.live:
+            return [IngestRange(0, 1, self.start_time, self.end_time)]
+
+        duration = self.end_time - self.start_time
+        min_range = self.config['processing'].get('min_ingest_range_seconds', 300)
+        workers = max(1, min(int(workers), duration // max(min_range, 1) or 1))
+
+        bounds = [self.start_time]
+        for i in range(1, workers):
+            split = self.start_time + duration * i // workers
+            split -= split % HLS_SEGMENT_SECONDS
+            if bounds[-1] < split < self.end_time:
+                bounds.append(split)
+        bounds.append(self.end_time)
+
+        count = len(bounds) - 1
+        return [IngestRange(i, count, bounds[i], bounds[i + 1]) for i in range(count)]
+
+    def _test_file_path(self, quality: str) -> str:
+        """Path of the local test video for a quality (test mode)"""
+        quality_config = QUALITY_CONFIGS.get(quality, QUALITY_CONFIGS['480p'])
+        test_data_dir = self.config.get('test_mode', {}).get('data_directory', 'test_data')
+
+        # Check if running in Docker container (test_data mounted at /app/test_data)
+        docker_test_path = f'/app/{test_data_dir}'
+        if os.path.exists(docker_test_path):
+            self.logger.info(f"Running in Docker container - test data path: {docker_test_path}")
+            return os.path.join(docker_test_path, self.vod_id, quality_config['file_suffix'])
+        self.logger.info(f"Running locally - test data path: {test_data_dir}")
+        return os.path.join(os.path.dirname(__file__), '..', '..', test_data_dir,
+                            self.vod_id, quality_config['file_suffix'])
+
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from YAML file"""
         config_path = os.path.join(os.path.dirname(__file__), '..', 'config.yaml')
@@ -245,6 +442,13 @@ class SFOTProcessor:
         self.logger.info(f"Starting VOD processing: {self.vod_id} [{self.start_time}-{self.end_time}]")
         self.logger.info(f"Using SFOT profile: {self.profile.get('profile_name', 'unknown')}")
         self.logger.info(f"Crop region: {self.profile['crop_region']}")
+        if len(self.ingest_ranges) > 1:
+            self.logger.info(f"Parallel ingestion over {len(self.ingest_ranges)} sub-ranges: "
+                             f"{', '.join(r.label for r in self.ingest_ranges)}")
+        if self.native_hls:
+            self.logger.info("Ingest backend: native HLS segment fetcher")
+        elif self.pyav_ingest:
+            self.logger.info("Ingest backend: in-process PyAV decoder")
         if self.old_templates:
             self.logger.info("Using small templates (underscore-prefixed) for older VOD processing")
 
@@ -270,24 +474,48 @@ class SFOTProcessor:
                     quality=self.formatted_quality
                 )
 
-                # Start worker threads
-                threads = [
-                    threading.Thread(target=self.streamlink_worker, name="streamlink"),
-                    threading.Thread(target=self.ffmpeg_worker, name="ffmpeg"),
+                # Sparse probing: one keyframe per group of segments decides which
+                # stretches show the game at all; the rest is never fetched
+                ranges = self.ingest_ranges
+                if self.sparse_probe:
+                    ranges = self._run_probe_pass()
+
+                # Two-pass mode: a cheap low-rate scan picks the windows worth
+                # full detection, and only those are ingested below
+                if self.two_pass:
+                    ranges = self._run_coarse_pass(ranges)
+
+                # Start worker threads: ingest lanes (streamlink/FFmpeg pairs or the
+                # native HLS fetcher) feeding the shared detection and result stages
+                threads = self._create_ingest_threads(ranges)
+                threads += [
                     threading.Thread(target=self.opencv_worker, name="opencv"),
                     threading.Thread(target=self.result_worker, name="results"),
                 ]
 
+                sampling_start = time.time()
                 for thread in threads:
                     thread.start()
 
-                # Wait for completion or shutdown
+                # Wait for completion or shutdown (a live stream runs until it ends)
                 for thread in threads:
-                    thread.join(timeout=self.config['processing']['timeout'])
+                    thread.join(timeout=None if self.live else self.config['processing']['timeout'])
+
+                sampled_seconds = sum(rng.duration for rng in ranges)
+                if self.probe_stats and sampled_seconds:
+                    # Time saved: skipped seconds at this run's sampling speed, minus the probing itself
+                    seconds_per_second = (time.time() - sampling_start) / sampled_seconds
+                    self.probe_stats['time_saved_ms'] = round(
+                        self.probe_stats['seconds_skipped'] * seconds_per_second * 1000
+                        - self.probe_stats['probe_duration_ms'], 2
+                    )
 
                 # Final status update - check if we completed successfully
-                # If shutdown was set but we processed frames successfully, it's completion
-                if self.frames_processed > 0 and self.shutdown.is_set():
+                # A range that was never ingested fails the chunk, whatever the others found;
+                # otherwise, if shutdown was set but we processed frames successfully, it's completion
+                if self.failed_ranges:
+                    status = 'failed'
+                elif self.frames_processed > 0 and self.shutdown.is_set():
                     status = 'completed'
                 elif not self.shutdown.is_set():
                     status = 'completed'
@@ -302,16 +530,35 @@ class SFOTProcessor:
                 self.logger.info(json.dumps({
                     'event': 'chunk_finished',
                     'status': status,
+                    **({'failed_ranges': self.failed_ranges} if self.failed_ranges else {}),
                     'frames_processed': self.frames_processed,
                     'matchups_found': self.matchups_found,
                     'duration_ms': round(duration_ms, 2),
                     'fps': round(self.frames_processed / (duration_ms / 1000), 2) if duration_ms > 0 else 0,
+                    **({'two_pass': self.two_pass_stats} if self.two_pass_stats else {}),
+                    **({'sparse_probe': self.probe_stats} if self.probe_stats else {}),
+                    **({'skip_ahead': self.skip_stats} if self.skip_ahead else {}),
+                    **({'emblem_roi': self.frame_processor.roi_stats} if self.frame_processor.emblem_prior else {}),
+                    'stage_rejects': self.frame_processor.stage_rejects,
+                    **({'emblem_tracking': self.frame_processor.emblem_detector.track_stats}
+                       if self.frame_processor.emblem_detector and self.frame_processor.emblem_detector.track_margin
+                       else {}),
+                    **({'segment_cache': self.segment_cache.stats()} if self.segment_cache else {}),
+                    **({'dual_rendition': {'ocr_quality': self.ocr_quality, **self.dual_stats}}
+                       if self.dual_rendition else {}),
+                    **({'live': {**(self.live_stats or {}), 'latency_seconds': self._latency_summary()}}
+                       if self.live else {}),
                 }))
                 metric_attrs = {
                     "streamer": self.streamer or "unknown",
                     "quality": self.formatted_quality,
                 }
 
+                if self.segment_cache:
+                    cache_stats = self.segment_cache.stats()
+                    record_counter("hls_cache_hits", cache_stats['hits'], metric_attrs)
+                    record_counter("hls_cache_misses", cache_stats['misses'], metric_attrs)
+
                 if status == 'completed':
                     record_counter("chunks_completed", 1, metric_attrs)
                 else:
@@ -339,6 +586,15 @@ class SFOTProcessor:
                         detections_count=self.matchups_found,
                         quality=self.formatted_quality
                     )
+                elif status == 'failed':
+                    self.supabase.update_chunk(
+                        self.chunk_id,
+                        'failed',
+                        error=f"Ingest failed: {'; '.join(self.failed_ranges)}",
+                        frames_processed=self.frames_processed,
+                        detections_count=self.matchups_found,
+                        quality=self.formatted_quality
+                    )
                 else:
                     # Set back to pending if interrupted
                     self.supabase.update_chunk(
@@ -385,12 +641,225 @@ class SFOTProcessor:
             finally:
                 self.cleanup()
     
-    def streamlink_worker(self):
-        """Worker to run streamlink and pipe HLS stream to FFmpeg"""
+    def _create_ingest_threads(self, ranges: List[IngestRange]) -> List[threading.Thread]:
+        """Create (unstarted) ingest threads for `ranges` and reset the completion tracking
+
+        At most ingest_lanes ranges are ingested at once; extra ranges (two-pass
+        windows) queue up round-robin behind them in the same lane.
+        """
+        self.ingest_ranges = ranges
+        self._active_ingest = len(ranges)
+        self.ingest_done.clear()
+        self.detection_done.clear()
+        if not ranges:
+            self.ingest_done.set()
+            return []
+
+        if len(ranges) <= self.ingest_lanes:
+            # One range per lane - run its workers directly
+            threads = []
+            for rng in ranges:
+                threads += self._range_threads(rng)
+            return threads
+
+        lanes = min(self.ingest_lanes, len(ranges))
+        return [
+            threading.Thread(target=self.ingest_lane, args=(ranges[i::lanes],), name=f"ingest-lane-{i}")
+            for i in range(lanes)
+        ]
+
+    def _range_threads(self, rng: IngestRange) -> List[threading.Thread]:
+        """The worker threads that ingest one range"""
+        if self.live:
+            return [threading.Thread(target=self.live_worker, args=(rng,), name="live")]
+        if self.native_hls:
+            return [threading.Thread(target=self.hls_worker, args=(rng,), name=f"hls-{rng.index}")]
+        if self.pyav_ingest:
+            return [threading.Thread(target=self.pyav_worker, args=(rng,), name=f"pyav-{rng.index}")]
+        return [
+            threading.Thread(target=self.streamlink_worker, args=(rng,), name=f"streamlink-{rng.index}"),
+            threading.Thread(target=self.ffmpeg_worker, args=(rng,), name=f"ffmpeg-{rng.index}"),
+        ]
+
+    def ingest_lane(self, ranges: List[IngestRange]):
+        """Ingest several ranges one after another"""
+        for rng in ranges:
+            if self.shutdown.is_set() or (self._ingest_cutoff is not None and rng.start >= self._ingest_cutoff):
+                self._finish_ingest_range(rng)
+                continue
+            threads = self._range_threads(rng)
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+    def _run_coarse_pass(self, ranges: List[IngestRange]) -> List[IngestRange]:
+        """First pass of two-pass mode: scan the ranges at a low rate on downscaled frames
+
+        Args:
+            ranges: Ranges to scan (the whole chunk, or what sparse probing kept)
+
+        Returns:
+            Fine-pass ranges: a window around every coarse hit, merged and aligned
+            to HLS segments (empty if nothing was flagged)
+        """
+        two_pass = self.config.get('two_pass', {})
+        coarse_rate = two_pass.get('coarse_frame_rate', 0.25)
+        scale = two_pass.get('coarse_scale', 0.5)
+        window = two_pass.get('window_seconds', 6)
+
+        coarse_ranges = [
+            IngestRange(r.index, r.count, r.start, r.end, frame_rate=coarse_rate, scale=scale, keyframes_only=True)
+            for r in ranges
+        ]
+        self.logger.info(f"Two-pass mode: coarse scan at {coarse_rate} fps, {scale}x scale")
+        pass_start = time.time()
+
+        threads = self._create_ingest_threads(coarse_ranges)
+        threads.append(threading.Thread(target=self.coarse_worker, name="coarse"))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=self.config['processing']['timeout'])
+
+        windows = self._merge_windows(self.coarse_hits, window)
+        fine_seconds = sum(end - start for start, end in windows)
+        self.two_pass_stats = {
+            'coarse_frames': self.coarse_frames,
+            'coarse_candidates': len(self.coarse_hits),
+            'coarse_duration_ms': round((time.time() - pass_start) * 1000, 2),
+            'fine_windows': len(windows),
+            'fine_seconds': fine_seconds,
+        }
+        self.logger.info(f"Coarse pass flagged {len(self.coarse_hits)} of {self.coarse_frames} frames; "
+                         f"fine pass covers {fine_seconds}s of {self.end_time - self.start_time}s "
+                         f"in {len(windows)} windows")
+
+        if self.shutdown.is_set():
+            return []
+        return [IngestRange(i, len(windows), start, end) for i, (start, end) in enumerate(windows)]
+
+    def _run_probe_pass(self) -> List[IngestRange]:
+        """Sparse probing: check one keyframe per group of segments for the Bazaar UI
+
+        A group is sampled in full if its probe saw the game, or if the next
+        group's did (the game came back somewhere inside it). Once the game
+        has been absent for absent_end_seconds the chunk ends there.
+
+        Returns:
+            The chunk's ingest ranges clipped to the groups worth sampling
+        """
+        probe = self.config.get('sparse_probe', {})
+        group = max(1, int(probe.get('group_segments', 6))) * HLS_SEGMENT_SECONDS
+        scale = probe.get('probe_scale', 0.5)
+        groups = list(range(self.start_time, self.end_time, group))
+        chunk_ranges = self.ingest_ranges
+
+        probe_ranges = [
+            IngestRange(i, len(groups), start, min(start + HLS_SEGMENT_SECONDS, self.end_time),
+                        frame_rate=1.0 / group, scale=scale, keyframes_only=True)
+            for i, start in enumerate(groups)
+        ]
+        self.logger.info(f"Sparse probing: {len(groups)} probes, one per {group}s")
+        pass_start = time.time()
+
+        threads = self._create_ingest_threads(probe_ranges)
+        threads.append(threading.Thread(target=self.probe_worker, args=(groups, group), name="probe"))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=self.config['processing']['timeout'])
+
+        cutoff = self._ingest_cutoff
+        self._ingest_cutoff = None
+        kept = []
+        for i, start in enumerate(groups):
+            if cutoff is not None and start >= cutoff:
+                break
+            # Unprobed groups (no frame decoded) count as present - never skip what we couldn't judge
+            next_present = i + 1 < len(groups) and (cutoff is None or groups[i + 1] < cutoff) \
+                and self.probe_results.get(groups[i + 1], True)
+            if self.probe_results.get(start, True) or next_present:
+                kept.append((start, min(start + group, self.end_time)))
+
+        windows = []
+        for start, end in kept:
+            if windows and windows[-1][1] == start:
+                windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+
+        sampled_seconds = sum(end - start for start, end in windows)
+        self.probe_stats = {
+            'probes': len(self.probe_results),
+            'groups': len(groups),
+            'groups_present': sum(self.probe_results.values()),
+            'groups_sampled': len(kept),
+            'seconds_skipped': (self.end_time - self.start_time) - sampled_seconds,
+            'ended_early_at': cutoff,
+            'probe_duration_ms': round((time.time() - pass_start) * 1000, 2),
+        }
+        self.logger.info(f"Sparse probing kept {len(kept)}/{len(groups)} groups, "
+                         f"skipping {self.probe_stats['seconds_skipped']}s"
+                         + (f", chunk ends early at {cutoff}s" if cutoff is not None else ""))
+
+        if self.shutdown.is_set():
+            return []
+
+        # Keep the parallel split of the chunk: intersect its ranges with the windows
+        pieces = [
+            (max(rng.start, start), min(rng.end, end))
+            for rng in chunk_ranges for start, end in windows
+            if max(rng.start, start) < min(rng.end, end)
+        ]
+        return [IngestRange(i, len(pieces), start, end) for i, (start, end) in enumerate(pieces)]
+
+    def _update_probe_cutoff(self, groups: List[int], group: int):
+        """End the chunk at the first absent stretch of absent_end_seconds (probes in order)"""
+        absent_end = self.config.get('sparse_probe', {}).get('absent_end_seconds', 900)
+        if not absent_end:
+            return
+        run_start = None
+        for start in groups:
+            present = self.probe_results.get(start)
+            if present is None:
+                return  # Not probed yet - can't tell how long the stretch is
+            if present:
+                run_start = None
+                continue
+            if run_start is None:
+                run_start = start
+            if start + group - run_start >= absent_end:
+                if self._ingest_cutoff is None:
+                    self.logger.info(f"Game absent since {run_start}s for {start + group - run_start}s, ending chunk there")
+                self._ingest_cutoff = run_start
+                return
+
+    def _merge_windows(self, hits: List[float], window: float) -> List[Tuple[int, int]]:
+        """Turn hit timestamps into sorted, non-overlapping [start, end) windows
+
+        Windows are padded by `window` seconds each side and widened to HLS
+        segment boundaries (streamlink always starts at a segment boundary),
+        then clipped to the chunk.
+        """
+        merged = []
+        for hit in sorted(hits):
+            start = max(self.start_time, int(hit - window) // HLS_SEGMENT_SECONDS * HLS_SEGMENT_SECONDS)
+            end = min(self.end_time, -(-int(math.ceil(hit + window)) // HLS_SEGMENT_SECONDS) * HLS_SEGMENT_SECONDS)
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def streamlink_worker(self, rng: IngestRange):
+        """Worker to run streamlink and pipe one sub-range's HLS stream to FFmpeg"""
         metric_attrs = {"streamer": self.streamer or "unknown", "quality": self.formatted_quality}
 
         # Span for tracing - runs in parallel with ffmpeg/opencv workers
-        with create_span("streamlink_stream", attributes=self.span_attributes) as span:
+        with create_span("streamlink_stream", attributes={**self.span_attributes, "range.index": rng.index}) as span:
             try:
                 # Skip streamlink in test mode - FFmpeg will read directly from file
                 if self.test_mode:
@@ -398,7 +867,8 @@ class SFOTProcessor:
                     return
 
                 # Calculate duration
-                duration = self.end_time - self.start_time
+                start = rng.start
+                duration = rng.duration
 
                 # Build streamlink command with quality preference
                 quality_stream = self.quality if self.quality in ['360p', '360p60', '480p', '480p60', '720p', '720p60', '1080p', '1080p60', 'worst', 'best'] else '480p'
@@ -406,17 +876,17 @@ class SFOTProcessor:
                     'streamlink',
                     '--stream-segment-threads', '1',  # Consistent delivery
                     '--hls-segment-stream-data',      # Immediate segment write
-                    '--hls-start-offset', f"{self.start_time // 3600}:{(self.start_time % 3600) // 60:02d}:{self.start_time % 60:02d}",
+                    '--hls-start-offset', f"{start // 3600}:{(start % 3600) // 60:02d}:{start % 60:02d}",
                     '--stream-segmented-duration', str(duration),  # Use segmented duration
                     f'https://twitch.tv/videos/{self.vod_id}',
                     quality_stream + ',360p60,480p60,720p60,1080p60',
                     '-O'  # Output to stdout
                 ]
 
-                self.logger.info(f"Starting streamlink: {' '.join(cmd)}")
+                self.logger.info(f"Starting streamlink ({rng.label}): {' '.join(cmd)}")
 
                 # Start streamlink process
-                self.streamlink_proc = subprocess.Popen(
+                rng.streamlink_proc = subprocess.Popen(
                     cmd,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
@@ -426,55 +896,46 @@ class SFOTProcessor:
                 # Monitor streamlink process (runs in parallel with ffmpeg consuming stdout)
                 self.logger.info("Streamlink process started, piping to FFmpeg...")
                 while not self.shutdown.is_set():
-                    if self.streamlink_proc.poll() is not None:
+                    if rng.streamlink_proc.poll() is not None:
                         # Process ended
-                        stderr = self.streamlink_proc.stderr.read().decode('utf-8', errors='ignore')
-                        if self.streamlink_proc.returncode != 0:
-                            self.logger.error(f"Streamlink failed with code {self.streamlink_proc.returncode}: {stderr}")
-                            self.shutdown.set()  # Signal shutdown on streamlink failure
+                        stderr = rng.streamlink_proc.stderr.read().decode('utf-8', errors='ignore')
+                        if rng.streamlink_proc.returncode != 0:
+                            self.logger.error(f"Streamlink ({rng.label}) failed with code {rng.streamlink_proc.returncode}: {stderr}")
+                            self._fail_ingest_range(rng, f"streamlink exit code {rng.streamlink_proc.returncode}")
                             record_counter("errors", 1, {**metric_attrs, "component": "streamlink", "error_type": "exit_code"})
                         else:
-                            self.logger.info(f"Streamlink completed successfully.")
+                            self.logger.info(f"Streamlink ({rng.label}) completed successfully.")
                         break
                     time.sleep(1)
 
             except Exception as e:
                 self.logger.error(f"Streamlink worker failed: {e}")
                 record_counter("errors", 1, {**metric_attrs, "component": "streamlink", "error_type": type(e).__name__})
-                self.shutdown.set()
+                self._fail_ingest_range(rng, f"streamlink: {e}")
     
-    def ffmpeg_worker(self):
-        """Worker to decode frames from streamlink stream (runs in parallel with opencv_worker)"""
+    def ffmpeg_worker(self, rng: IngestRange):
+        """Worker to decode one sub-range's frames from streamlink (runs in parallel with opencv_worker)"""
         metric_attrs = {"streamer": self.streamer or "unknown", "quality": self.formatted_quality}
 
-        with create_span("ffmpeg_decode", attributes=self.span_attributes) as span:
+        with create_span("ffmpeg_decode", attributes={**self.span_attributes, "range.index": rng.index}) as span:
+            store_writer = None
+            ring = None
             try:
                 # In test mode, read directly from file
                 if self.test_mode:
                     # Determine input file path
                     quality_config = QUALITY_CONFIGS.get(self.quality, QUALITY_CONFIGS['480p'])
-                    test_data_dir = self.config.get('test_mode', {}).get('data_directory', 'test_data')
                     video_filename = quality_config['file_suffix']
 
                     # Log which quality file we're using
                     self.logger.info(f"Test mode enabled - using video file: {video_filename} for quality: {self.quality}")
 
-                    # Check if running in Docker container (test_data mounted at /app/test_data)
-                    docker_test_path = f'/app/{test_data_dir}'
-                    if os.path.exists(docker_test_path):
-                        # Running in Docker container
-                        input_file = os.path.join(docker_test_path, self.vod_id, video_filename)
-                        self.logger.info(f"Running in Docker container - test data path: {docker_test_path}")
-                    else:
-                        # Running locally
-                        input_file = os.path.join(os.path.dirname(__file__), '..', '..', test_data_dir,
-                                                 self.vod_id, video_filename)
-                        self.logger.info(f"Running locally - test data path: {test_data_dir}")
+                    input_file = self._test_file_path(self.quality)
 
                     if not os.path.exists(input_file):
                         self.logger.error(f"Test file not found: {input_file}")
                         self.logger.error(f"Expected video file '{video_filename}' in directory: {os.path.dirname(input_file)}")
-                        self.shutdown.set()
+                        self._fail_ingest_range(rng, f"test file not found: {input_file}")
                         return
 
                     self.logger.info(f"Test video file located: {input_file}")
@@ -485,22 +946,24 @@ class SFOTProcessor:
                 else:
                     # Wait for streamlink to start
                     time.sleep(2)
-                    if not self.streamlink_proc or self.streamlink_proc.poll() is not None:
+                    if not rng.streamlink_proc or rng.streamlink_proc.poll() is not None:
                         self.logger.error("Streamlink not running when FFmpeg tried to start")
+                        self._fail_ingest_range(rng, "streamlink not running")
                         return
 
                     self.logger.info("Streamlink confirmed running, starting FFmpeg...")
                     # Determine resolution based on quality for streamlink mode
-                    quality_resolutions = {
-                        '360p': (640, 360),
-                        '480p': (854, 480),
-                        '720p': (1280, 720),
-                        '1080p': (1920, 1080)
-                    }
-                    frame_width, frame_height = quality_resolutions.get(self.quality, (854, 480))
-
-                # Build video filter chain
-                vf_filters = [f'fps={self.config["processing"]["frame_rate"]}']
+                    frame_width, frame_height = stream_resolution(self.quality)
+
+                # Build video filter chain. Sampling is decided by KeyframeSampler on real
+                # presentation timestamps, not by fps= (which resynthesizes timestamps).
+                keyframe_input = self._keyframes_only(rng)
+                sampler = KeyframeSampler(rng.frame_rate or self.config['processing']['frame_rate'])
+                vf_filters = []
+                if not keyframe_input:
+                    # Every frame gets decoded here - pre-decimate on real timestamps in FFmpeg
+                    # so we don't ship the full frame rate across the pipe
+                    vf_filters.append(f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{sampler.interval - 0.001:.3f})'")
 
                 # Use crop region from SFOT profile
                 crop_pixels = self.percent_to_pixels(
@@ -509,137 +972,893 @@ class SFOTProcessor:
                     frame_height
                 )
                 w, h, x, y = crop_pixels
-                vf_filters.append(f'crop={w}:{h}:{x}:{y}')
+                output_format = self.config['ffmpeg'].get('output_format', 'mjpeg')
+                frame_store_dir = self.frame_store_dir if self.test_mode else None
+                if frame_store_dir:
+                    output_format = 'rawvideo'  # Frame stores hold decoded frames
+                if output_format == 'rawvideo' or self.decoder_process:
+                    # exact=1: don't round odd sizes down to the chroma grid, the raw
+                    # reader (and the decoder process's ring slots) rely on frames
+                    # being exactly w*h*3 bytes
+                    vf_filters.append(f'crop={w}:{h}:{x}:{y}:exact=1')
+                else:
+                    vf_filters.append(f'crop={w}:{h}:{x}:{y}')
                 self.logger.info(f"Applied profile crop: [x={x}, y={y}, w={w}, h={h}] for {frame_width}x{frame_height} video")
+                if rng.scale != 1.0:
+                    w, h = self._scaled_size(w, h, rng.scale)
+                    vf_filters.append(f'scale={w}:{h}:flags=area')
                 self.logger.info(f"Cropped frame dimensions will be: {w}x{h} pixels")
 
+                # showinfo must stay last: it logs one line (with pts_time) per output frame
+                vf_filters.append('showinfo=checksum=0')
+
                 vf_chain = ','.join(vf_filters)
 
-                # Build FFmpeg command
-                if self.test_mode:
-                    # Read from file with seeking support
-                    ffmpeg_cmd = [
-                        'ffmpeg',
-                        '-ss', str(self.start_time),  # Seek to start time
-                        '-i', input_file,  # Input from file
-                        '-t', str(self.end_time - self.start_time),  # Duration
-                        '-vf', vf_chain,
-                        '-f', 'image2pipe',
-                        '-vcodec', 'mjpeg',
-                        '-loglevel', self.config['ffmpeg']['loglevel'],
-                        'pipe:1'  # Output to stdout
-                    ]
+                # Output format: MJPEG frames (decoded in FrameProcessor) or raw bgr24
+                # frames read straight into NumPy buffers (no encode/decode round trip)
+                if output_format == 'rawvideo':
+                    output_args = ['-f', 'rawvideo', '-pix_fmt', 'bgr24']
+                    self.logger.info(f"FFmpeg output: rawvideo bgr24 ({w}x{h}, {w * h * 3} bytes/frame)")
                 else:
-                    # Read from pipe (streamlink)
-                    ffmpeg_cmd = [
-                        'ffmpeg',
-                        '-i', 'pipe:0',  # Input from stdin
-                        '-vf', vf_chain,
-                        '-f', 'image2pipe',
-                        '-vcodec', 'mjpeg',
-                        '-loglevel', self.config['ffmpeg']['loglevel'],
-                        'pipe:1'  # Output to stdout
-                    ]
-
-                if self.config['ffmpeg']['keyframes_only'] and not self.test_mode:
-                    # Insert input options before -i (only for pipe input)
-                    ffmpeg_cmd.insert(1, '-skip_frame')
-                    ffmpeg_cmd.insert(2, 'nokey')
-
-                self.logger.info("Starting FFmpeg pipeline")
-
-                # Start FFmpeg process
-                if self.test_mode:
-                    # No stdin needed when reading from file
-                    self.ffmpeg_proc = subprocess.Popen(
-                        ffmpeg_cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        bufsize=65536
+                    output_args = ['-f', 'image2pipe', '-vcodec', 'mjpeg']
+
+                # Frame store: replay an earlier decode of this range, or record this one.
+                # Recording decodes the whole range (no skip-ahead seeks) so the store is complete.
+                if frame_store_dir:
+                    signature = source_signature(
+                        input_file, self.profile['crop_region'], crop_pixels, (frame_width, frame_height),
+                        (w, h), keyframe_input, None if keyframe_input else sampler.interval
                     )
-                else:
-                    # Connect to streamlink's stdout
-                    self.ffmpeg_proc = subprocess.Popen(
-                        ffmpeg_cmd,
-                        stdin=self.streamlink_proc.stdout,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        bufsize=65536
+                    store = FrameStore.find(frame_store_dir, signature, rng.start, rng.end)
+                    if store is not None:
+                        self.logger.info(f"Frame store hit ({rng.label}): reading {store.path}, FFmpeg not started")
+                        frames_extracted = self._replay_frames(store, rng, sampler, metric_attrs)
+                        self.logger.info(f"Sampler kept {sampler.kept} frames, skipped {sampler.skipped}")
+                        self.logger.info(f"FFmpeg worker ({rng.label}) finished from frame store: {frames_extracted} frames")
+                        if span:
+                            span.set_attribute("frames.extracted", frames_extracted)
+                            span.set_attribute("frame_store.hit", True)
+                        return
+                    store_writer = FrameStoreWriter(frame_store_dir, signature, rng.start, rng.end)
+
+                if self.decoder_process:
+                    # Slots cover a full queue, the frame in detection, and some decode-ahead
+                    slots = self.frame_queue.maxsize + 2 + self.config['ffmpeg'].get('ring_slots', 8)
+                    ring = SharedFrameRing(slots, w, h)
+                    self.logger.info(f"Decoder process ring ({rng.label}): {slots} slots of {w}x{h}, "
+                                     f"{slots * w * h * 3 / 1e6:.1f} MB shared memory")
+
+                # Test mode reads a file and can seek: after a confirmed matchup FFmpeg
+                # is restarted past the min_matchup_interval instead of decoding through it
+                position = rng.start
+                frames_extracted = bytes_read = 0
+                while True:
+                    # Build FFmpeg command
+                    if self.test_mode:
+                        # Read from file with seeking support
+                        ffmpeg_cmd = [
+                            'ffmpeg',
+                            '-ss', str(position),  # Seek to start time
+                            '-i', input_file,  # Input from file
+                            '-t', str(rng.end - position),  # Duration
+                            '-vf', vf_chain,
+                            '-fps_mode', 'passthrough',  # One output frame per selected frame, no dup/drop
+                            *output_args,
+                            '-loglevel', 'level+info',  # showinfo logs at info level
+                            'pipe:1'  # Output to stdout
+                        ]
+                    else:
+                        # Read from pipe (streamlink)
+                        ffmpeg_cmd = [
+                            'ffmpeg',
+                            '-i', 'pipe:0',  # Input from stdin
+                            '-vf', vf_chain,
+                            '-fps_mode', 'passthrough',  # One output frame per decoded keyframe, no dup/drop
+                            *output_args,
+                            '-loglevel', 'level+info',  # showinfo logs at info level
+                            'pipe:1'  # Output to stdout
+                        ]
+
+                    if keyframe_input:
+                        # Insert input options before -i
+                        ffmpeg_cmd.insert(1, '-skip_frame')
+                        ffmpeg_cmd.insert(2, 'nokey')
+
+                    self.logger.info(f"Starting FFmpeg pipeline ({rng.label})")
+
+                    # Start FFmpeg process
+                    if self.test_mode:
+                        # No stdin needed when reading from file
+                        rng.ffmpeg_proc = subprocess.Popen(
+                            ffmpeg_cmd,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            bufsize=65536
+                        )
+                    else:
+                        # Connect to streamlink's stdout
+                        rng.ffmpeg_proc = subprocess.Popen(
+                            ffmpeg_cmd,
+                            stdin=rng.streamlink_proc.stdout,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE,
+                            bufsize=65536
+                        )
+
+                    # Check if FFmpeg started successfully
+                    time.sleep(0.5)  # Give FFmpeg a moment to start
+                    if rng.ffmpeg_proc.poll() is not None and rng.ffmpeg_proc.returncode != 0:
+                        stderr = rng.ffmpeg_proc.stderr.read().decode('utf-8', errors='ignore')
+                        self.logger.error(f"FFmpeg ({rng.label}) failed to start. Exit code: {rng.ffmpeg_proc.returncode}, stderr: {stderr}")
+                        record_counter("errors", 1, {**metric_attrs, "component": "ffmpeg", "error_type": "start_failed"})
+                        self._fail_ingest_range(rng, f"FFmpeg failed to start (exit code {rng.ffmpeg_proc.returncode})")
+                        return
+                    else:
+                        self.logger.info("FFmpeg process started successfully")
+
+                    # Read frames from FFmpeg
+                    self.logger.info("Starting to read frames from FFmpeg...")
+                    if ring is not None:
+                        # A separate process reads both pipes and decodes into the ring;
+                        # frames arrive here as views of its slots, timestamps alongside
+                        reader = pts_reader = RingFrameReader(
+                            ring, rng.ffmpeg_proc, output_format,
+                            forward_level=self.config['ffmpeg']['loglevel'],
+                            name=f"ffmpeg-{rng.index}"
+                        )
+                        rng.decoder_proc = reader.proc
+                    else:
+                        # Presentation timestamps arrive on stderr via showinfo
+                        pts_reader = ShowinfoPTSReader(
+                            rng.ffmpeg_proc.stderr,
+                            forward_level=self.config['ffmpeg']['loglevel'],
+                            name=f"ffmpeg-{rng.index}"
+                        ).start()
+                        if output_format == 'rawvideo':
+                            # Pool covers every frame that can be alive at once: a full queue,
+                            # the frame opencv_worker is processing, and the one being filled
+                            reader = RawFrameReader(rng.ffmpeg_proc.stdout, w, h, pool_size=self.frame_queue.maxsize + 2)
+                        else:
+                            reader = JPEGStreamDemuxer(rng.ffmpeg_proc.stdout)
+                    extracted, read, seek = self._read_frames(
+                        reader, pts_reader, sampler, position, metric_attrs,
+                        can_seek=self.test_mode and store_writer is None, recorder=store_writer,
+                        seeked_input=self.test_mode
                     )
+                    frames_extracted += extracted
+                    bytes_read += read
+                    if seek is None or self.shutdown.is_set():
+                        if ring is not None:
+                            reader.close()
+                        break
 
-                # Check if FFmpeg started successfully
-                time.sleep(0.5)  # Give FFmpeg a moment to start
-                if self.ffmpeg_proc.poll() is not None:
-                    stderr = self.ffmpeg_proc.stderr.read().decode('utf-8', errors='ignore')
-                    self.logger.error(f"FFmpeg failed to start. Exit code: {self.ffmpeg_proc.returncode}, stderr: {stderr}")
-                    record_counter("errors", 1, {**metric_attrs, "component": "ffmpeg", "error_type": "start_failed"})
-                    return
+                    # Drop this FFmpeg and start a new one past the blocked interval
+                    seek_from, position = seek
+                    # Close our end first: FFmpeg blocked on a full stdout pipe won't act on SIGTERM
+                    if ring is not None:
+                        reader.close()  # The decoder process holds the read end
+                    else:
+                        rng.ffmpeg_proc.stdout.close()
+                    self._stop_process(rng.ffmpeg_proc, f'ffmpeg-{rng.index}')
+                    decode_rate = 1 / KEYFRAME_INTERVAL_SECONDS if keyframe_input else self.video_fps
+                    self._record_skip("ffmpeg_seek", int((position - seek_from) * decode_rate), metric_attrs,
+                                      seconds=position - seek_from)
+                    self.logger.info(f"Skip-ahead ({rng.label}): seeking from {seek_from:.1f}s to {position}s")
+                    if position >= rng.end:
+                        break
+
+                self.logger.info(f"Sampler kept {sampler.kept} frames, skipped {sampler.skipped}")
+
+                if store_writer is not None and not self.shutdown.is_set():
+                    # Publish only a complete range: later runs replay a store instead of decoding
+                    try:
+                        returncode = rng.ffmpeg_proc.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        returncode = None
+                    last = store_writer.last_timestamp
+                    slack = max(sampler.interval, KEYFRAME_INTERVAL_SECONDS) + 0.5  # Gap before rng.end with no frame
+                    if returncode == 0 and last is not None and last >= rng.end - slack:
+                        store_writer.commit()
+                        store_writer = None
+                    else:
+                        self.logger.warning(f"Frame store for {rng.label} not saved: FFmpeg exit code {returncode}, "
+                                            f"last frame at {last}s of [{rng.start}, {rng.end})")
+
+                self.logger.info(f"FFmpeg worker ({rng.label}) finished. Final stats: {bytes_read} bytes read, {frames_extracted} frames extracted")
+
+                # Set span attributes for frames extracted
+                if span:
+                    span.set_attribute("frames.extracted", frames_extracted)
+                    span.set_attribute("bytes.read", bytes_read)
+
+            except Exception as e:
+                self.logger.error(f"FFmpeg worker ({rng.label}) failed: {e}")
+                record_counter("errors", 1, {**metric_attrs, "component": "ffmpeg", "error_type": type(e).__name__})
+                self._fail_ingest_range(rng, f"FFmpeg: {e}")
+            finally:
+                if store_writer is not None:
+                    store_writer.abort()  # Not committed: failed start, error, shutdown or incomplete range
+                if ring is not None:
+                    self._stop_process(rng.decoder_proc, f'decoder-{rng.index}')
+                    ring.close()
+                self._finish_ingest_range(rng)
+
+    def _keyframes_only(self, rng: IngestRange) -> bool:
+        """Whether a range decodes keyframes only (range override, then ffmpeg / test_mode config)"""
+        if rng.keyframes_only is not None:
+            return rng.keyframes_only
+        if self.test_mode:
+            return self.config['ffmpeg']['keyframes_only'] and \
+                self.config.get('test_mode', {}).get('keyframes_only', False)
+        return self.config['ffmpeg']['keyframes_only']
+
+    def pyav_worker(self, rng: IngestRange):
+        """Worker to demux and decode one sub-range in-process with PyAV
+
+        Replaces the streamlink/FFmpeg pair: no subprocesses, pipes or startup
+        sleeps. With keyframes only, packets are inspected before decoding, so
+        only the keyframes the sampler keeps are ever decoded; skip-ahead seeks
+        the open input instead of restarting anything.
+        """
+        metric_attrs = {"streamer": self.streamer or "unknown", "quality": self.formatted_quality}
+
+        with create_span("pyav_decode", attributes={**self.span_attributes, "range.index": rng.index}) as span:
+            decoder = None
+            try:
+                if self.test_mode and not self.hls_playlist_url:
+                    source = self._test_file_path(self.quality)
+                    if not os.path.exists(source):
+                        self.logger.error(f"Test file not found: {source}")
+                        self._fail_ingest_range(rng, f"test file not found: {source}")
+                        return
                 else:
-                    self.logger.info("FFmpeg process started successfully")
+                    # FFmpeg's hls demuxer reads the media playlist itself
+                    fetcher = self._create_hls_fetcher()
+                    source = fetcher.playlist_url
+                    fetcher.close()
+                if self.test_mode:
+                    frame_width, frame_height = QUALITY_CONFIGS.get(self.quality, QUALITY_CONFIGS['480p'])['resolution']
+                else:
+                    frame_width, frame_height = stream_resolution(self.quality)
+                crop = self.percent_to_pixels(self.profile['crop_region'], frame_width, frame_height)
+                keyframe_input = self._keyframes_only(rng)
+                decoder = PyAVDecoder(
+                    source, tuple(crop),
+                    scaled_size=self._scaled_size(crop[0], crop[1], rng.scale) if rng.scale != 1.0 else None,
+                    keyframes_only=keyframe_input,
+                    timeout=self.config.get('hls', {}).get('timeout', 20)
+                )
+                frame_rate = rng.frame_rate or self.config['processing']['frame_rate']
+                # Keyframes arrive with jitter; every decoded frame sits on the exact frame grid,
+                # so sample those on exact spacing like the FFmpeg path's select= pre-decimation
+                sampler = KeyframeSampler(frame_rate) if keyframe_input else \
+                    KeyframeSampler(frame_rate, tolerance=0.001 * frame_rate)
+                self.logger.info(f"PyAV {rng.label}: {source} ({'keyframes only' if keyframe_input else 'all frames'})")
+
+                def admit(timestamp: float) -> Tuple[bool, Optional[float]]:
+                    """(keep, seek_to) for a frame at timestamp - seek_to is set when a
+                    confirmed matchup's interval is long enough to seek past"""
+                    if timestamp < rng.start:
+                        return False, None  # Seeking lands on the keyframe before the range
+                    if not sampler.accept(timestamp):
+                        record_counter("frames_skipped", 1, {**metric_attrs, "reason": "sampler"})
+                        return False, None
+                    if self.skip_ahead:
+                        gate_end = self.frame_processor.matchup_gate_end(timestamp)
+                        if gate_end is not None:
+                            self._record_skip("reader", 1, metric_attrs)
+                            return False, gate_end if gate_end - timestamp >= self.min_seek_seconds else None
+                    return True, None
+
+                def flush():
+                    """Enqueue the frames the decoder still holds (it lags behind on streams with B-frames)"""
+                    for frame_time, frame in decoder.flush():
+                        # Keyframe packets were admitted before decoding; decoded frames are admitted here
+                        if frame_time < rng.end and (keyframe_input or admit(frame_time)[0]):
+                            self._enqueue_frame(FrameEnvelope(decoder.crop(frame), frame_time, frame.key_frame), metric_attrs)
+
+                decoder.seek(rng.start)
+                finished = False
+                while not finished and not self.shutdown.is_set():
+                    finished = True
+                    for timestamp, packet in decoder.packets():
+                        if self.shutdown.is_set() or timestamp >= rng.end:
+                            break
+                        if keyframe_input:
+                            # A keyframe packet carries its frame's timestamp: decide before decoding
+                            seek_from = timestamp
+                            keep, seek_to = admit(timestamp)
+                            if not keep:
+                                decoder.skip()
+                            frames = decoder.decode(packet) if keep else []
+                        else:
+                            frames, seek_to = [], None
+                            for frame_time, frame in decoder.decode(packet):
+                                seek_from = frame_time
+                                keep, seek_to = admit(frame_time)
+                                if keep:
+                                    frames.append((frame_time, frame))
+                                if seek_to is not None:
+                                    break
+
+                        for frame_time, frame in frames:
+                            self._enqueue_frame(FrameEnvelope(decoder.crop(frame), frame_time, frame.key_frame), metric_attrs)
+
+                        if seek_to is not None:
+                            decode_rate = 1 / KEYFRAME_INTERVAL_SECONDS if keyframe_input else self.video_fps
+                            self._record_skip("pyav_seek", int((seek_to - seek_from) * decode_rate), metric_attrs,
+                                              seconds=seek_to - seek_from)
+                            self.logger.info(f"Skip-ahead ({rng.label}): seeking from {seek_from:.1f}s to {seek_to:.1f}s")
+                            if seek_to < rng.end:
+                                flush()
+                                decoder.seek(seek_to)
+                                finished = False
+                            break
+                    if finished and not self.shutdown.is_set():
+                        flush()  # End of the range or of the input
+
+                record_counter("pyav_packets_skipped", decoder.packets_skipped, metric_attrs)
+                self.logger.info(f"PyAV worker ({rng.label}) finished: {decoder.packets_read} packets "
+                                 f"({decoder.bytes_read} bytes) read, {decoder.packets_skipped} dropped undecoded, "
+                                 f"{decoder.frames_decoded} frames decoded, {decoder.seeks} seeks, "
+                                 f"sampler kept {sampler.kept}, skipped {sampler.skipped}")
+                if span:
+                    span.set_attribute("frames.extracted", decoder.frames_decoded)
+                    span.set_attribute("bytes.read", decoder.bytes_read)
 
-                # Read frames from FFmpeg
-                frame_buffer = b''
-                frames_extracted = 0
-                bytes_read = 0
-                self.logger.info("Starting to read frames from FFmpeg...")
+            except Exception as e:
+                self.logger.error(f"PyAV worker ({rng.label}) failed: {e}")
+                record_counter("errors", 1, {**metric_attrs, "component": "pyav", "error_type": type(e).__name__})
+                self._fail_ingest_range(rng, f"PyAV: {e}")
+            finally:
+                if decoder is not None:
+                    decoder.close()
+                self._finish_ingest_range(rng)
 
-                while not self.shutdown.is_set():
-                    chunk = self.ffmpeg_proc.stdout.read(4096)
-                    if not chunk:
-                        # Check FFmpeg stderr for any error messages
-                        stderr_data = b''
-                        try:
-                            stderr_data = self.ffmpeg_proc.stderr.read()
-                            stderr_text = stderr_data.decode('utf-8', errors='ignore') if stderr_data else "No stderr output"
-                        except:
-                            stderr_text = "Could not read stderr"
-
-                        self.logger.info(f"FFmpeg stream ended. Total bytes read: {bytes_read}, frames extracted: {frames_extracted}")
+    def _create_hls_fetcher(self) -> HLSSegmentFetcher:
+        """Create a segment fetcher for one sub-range
+
+        The playlist is resolved and loaded once and shared, as is the segment
+        cache; each range gets its own connection pool and byte counters.
+        """
+        hls_config = self.config.get('hls', {})
+        with self._hls_lock:
+            if self._hls_playlist is None:
+                playlist_url = self.hls_playlist_url
+                if not playlist_url:
+                    playlist_url, _ = resolve_twitch_vod(self.vod_id, self.quality)
+                    self.logger.info(f"Resolved VOD {self.vod_id} ({self.quality}) playlist")
+
+                loader = HLSSegmentFetcher(playlist_url, timeout=hls_config.get('timeout', 20))
+                segments = loader.load_playlist(self.quality)
+                loader.close()
+                self.logger.info(f"Loaded HLS playlist: {len(segments)} segments, "
+                                 f"target duration {loader.target_duration}s")
+                self._hls_playlist = (loader.playlist_url, segments)
+                self._ensure_segment_cache()
+            playlist_url, segments = self._hls_playlist
+
+        fetcher = HLSSegmentFetcher(
+            playlist_url,
+            max_workers=hls_config.get('max_workers', 4),
+            timeout=hls_config.get('timeout', 20),
+            retries=hls_config.get('retry_attempts', 3),
+            cache=self.segment_cache,
+            cache_namespace=(str(self.vod_id), self.quality),
+        )
+        fetcher.segments = segments
+        return fetcher
+
+    def _ensure_segment_cache(self):
+        """Create the shared segment cache if one is configured (call with _hls_lock held)"""
+        if self.hls_cache_dir and self.segment_cache is None:
+            max_mb = int(self.config.get('hls', {}).get('cache_max_mb', 2048))
+            self.segment_cache = SegmentCache(self.hls_cache_dir, max_mb * 1024 * 1024)
+
+    def _create_ocr_source(self) -> Callable[[float], Optional[Tuple[float, np.ndarray]]]:
+        """Build the dual-rendition keyframe lookup for the OCR rendition
+
+        Returns a function mapping a frame time to (keyframe_time, frame), cropped
+        like the detection frames. Reads the local test file of that quality in
+        test mode, otherwise fetches the one segment from the rendition's playlist.
+        """
+        dual_config = self.config.get('dual_rendition', {})
+        hls_config = self.config.get('hls', {})
+        sizes = QUALITY_CONFIGS if self.test_mode else STREAM_RESOLUTIONS
+        size = sizes.get(self.ocr_quality, (1920, 1080))
+        frame_width, frame_height = size['resolution'] if isinstance(size, dict) else size
+        crop = self.percent_to_pixels(self.profile['crop_region'], frame_width, frame_height)
+        decoder = KeyframeDecoder(tuple(crop))
+
+        playlist_url = dual_config.get('playlist_url')
+        if self.test_mode and not playlist_url:
+            input_file = self._test_file_path(self.ocr_quality)
+            if not os.path.exists(input_file):
+                raise FileNotFoundError(f"OCR rendition test file not found: {input_file}")
+            self.logger.info(f"Dual-rendition OCR frames from {input_file}")
+
+            def file_frame_at(frame_time: float) -> Optional[Tuple[float, np.ndarray]]:
+                frames = decoder.decode_file(input_file, max(0.0, frame_time - 0.5))
+                return frames[0] if frames else None  # (time of the decoded keyframe, frame)
+            return file_frame_at
+
+        if not playlist_url:
+            playlist_url, _ = resolve_twitch_vod(self.vod_id, self.ocr_quality)
+        fetcher = HLSSegmentFetcher(
+            playlist_url,
+            max_workers=1,
+            timeout=hls_config.get('timeout', 20),
+            retries=hls_config.get('retry_attempts', 3),
+            cache=self.segment_cache,
+            cache_namespace=(str(self.vod_id), self.ocr_quality),
+        )
+        segments = fetcher.load_playlist(self.ocr_quality)
+        self.logger.info(f"Dual-rendition OCR frames from {self.ocr_quality} playlist ({len(segments)} segments)")
+
+        def hls_frame_at(frame_time: float) -> Optional[Tuple[float, np.ndarray]]:
+            before = fetcher.bytes_fetched
+            found = keyframe_at(fetcher, decoder, segments, frame_time, hls_config.get('leading_bytes'))
+            self.dual_stats['bytes_fetched'] += fetcher.bytes_fetched - before
+            return found
+        return hls_frame_at
+
+    def _ocr_frame_at(self, frame_time: float) -> Optional[np.ndarray]:
+        """FrameProcessor.ocr_frame_source: the OCR-rendition keyframe at frame_time, or None to OCR the detection frame"""
+        metric_attrs = {"streamer": self.streamer or "unknown", "quality": self.formatted_quality}
+        if self._ocr_source is None and not self._ocr_source_failed:
+            try:
+                with self._hls_lock:
+                    self._ensure_segment_cache()
+                self._ocr_source = self._create_ocr_source()
+            except Exception as e:
+                self._ocr_source_failed = True
+                self.logger.warning(f"Dual-rendition {self.ocr_quality} source unavailable, "
+                                    f"OCR on {self.quality} frames for the rest of the chunk: {e}")
+        found = None
+        if self._ocr_source is not None:
+            try:
+                found = self._ocr_source(frame_time)
+            except Exception as e:
+                self.logger.warning(f"Dual-rendition fetch at {frame_time:.1f}s failed: {e}")
+
+        if found is None or abs(found[0] - frame_time) > 1.0:
+            self.dual_stats['fallbacks'] += 1
+            record_counter("dual_rendition_fallbacks", 1, metric_attrs)
+            self.logger.info(f"No {self.ocr_quality} keyframe at {frame_time:.1f}s, using {self.quality} frame for OCR")
+            return None
+
+        self.dual_stats['hires_frames'] += 1
+        record_counter("dual_rendition_frames", 1, metric_attrs)
+        return found[1]
+
+    def hls_worker(self, rng: IngestRange):
+        """Worker to fetch one sub-range's HLS segments and decode only the sampled keyframes
+
+        Replaces the streamlink/FFmpeg pair: segments are downloaded over a pooled
+        HTTP session and each one is decoded with -skip_frame nokey. When the sample
+        interval spans whole segments, only the segments a sample falls in are
+        fetched, and only their leading bytes (enough for the first IDR frame).
+        """
+        metric_attrs = {"streamer": self.streamer or "unknown", "quality": self.formatted_quality}
+
+        with create_span("hls_fetch", attributes={**self.span_attributes, "range.index": rng.index}) as span:
+            try:
+                fetcher = self._create_hls_fetcher()
+                hls_config = self.config.get('hls', {})
+
+                if self.test_mode:
+                    frame_width, frame_height = QUALITY_CONFIGS.get(self.quality, QUALITY_CONFIGS['480p'])['resolution']
+                else:
+                    frame_width, frame_height = stream_resolution(self.quality)
+                crop = self.percent_to_pixels(self.profile['crop_region'], frame_width, frame_height)
+                decoder = KeyframeDecoder(tuple(crop), scaled_size=self._scaled_size(crop[0], crop[1], rng.scale)
+                                          if rng.scale != 1.0 else None)
+
+                sampler = KeyframeSampler(rng.frame_rate or self.config['processing']['frame_rate'])
+                segments, leading_only = plan_segments(fetcher.segments, sampler.interval, rng.start, rng.end)
+                self.logger.info(f"HLS {rng.label}: fetching {len(segments)} segments "
+                                 f"({'leading keyframe only' if leading_only else 'all keyframes'})")
+
+                def gated(segment) -> bool:
+                    """Segment lies entirely inside a confirmed matchup's interval"""
+                    if not self.skip_ahead:
+                        return False
+                    gate_end = self.frame_processor.matchup_gate_end(segment.start)
+                    if gate_end is None or (not leading_only and gate_end < segment.start + segment.duration):
+                        return False
+                    decodes = 1 if leading_only else max(1, int(segment.duration / KEYFRAME_INTERVAL_SECONDS))
+                    self._record_skip("hls_segment", decodes, metric_attrs, seconds=segment.duration)
+                    return True
+
+                frames_extracted = 0
+                for timestamp, frame, segment in iter_keyframes(
+                    fetcher, decoder, segments, leading_only, hls_config.get('leading_bytes'), skip=gated
+                ):
+                    if self.shutdown.is_set():
                         break
+                    if timestamp < rng.start or timestamp >= rng.end:
+                        continue  # Edge segments overlap the neighbouring range
+                    frames_extracted += 1
+                    if not sampler.accept(timestamp):
+                        record_counter("frames_skipped", 1, {**metric_attrs, "reason": "sampler"})
+                        continue
+                    self._enqueue_frame(FrameEnvelope(frame, timestamp, True), metric_attrs)
+
+                record_counter("hls_segments_fetched", fetcher.segments_fetched, metric_attrs)
+                record_counter("hls_bytes_fetched", fetcher.bytes_fetched, metric_attrs)
+                fetcher.close()
+                self.logger.info(f"HLS worker ({rng.label}) finished: {frames_extracted} keyframes decoded, "
+                                 f"{fetcher.bytes_fetched} bytes fetched, sampler kept {sampler.kept}, skipped {sampler.skipped}")
+
+                if span:
+                    span.set_attribute("frames.extracted", frames_extracted)
+                    span.set_attribute("segments.fetched", len(segments))
 
-                    bytes_read += len(chunk)
-                    frame_buffer += chunk
+            except Exception as e:
+                self.logger.error(f"HLS worker ({rng.label}) failed: {e}")
+                record_counter("errors", 1, {**metric_attrs, "component": "hls", "error_type": type(e).__name__})
+                self._fail_ingest_range(rng, f"HLS: {e}")
+            finally:
+                self._finish_ingest_range(rng)
 
-                    # Look for JPEG markers
-                    while True:
-                        start = frame_buffer.find(b'\xff\xd8')  # JPEG start
-                        if start == -1:
-                            break
+    def live_worker(self, rng: IngestRange):
+        """Worker to follow a live stream: decode the sampled keyframes of each new segment as it appears
 
-                        end = frame_buffer.find(b'\xff\xd9', start)  # JPEG end
-                        if end == -1:
-                            break
+        Polls the channel's live media playlist (or hls.playlist_url) with a
+        bounded backlog, so detection stays within a few segments of the live
+        edge. Frames carry the time they aired - EXT-X-PROGRAM-DATE-TIME when
+        the playlist has it, else when their segment showed up - for the
+        end-to-end latency metrics.
+        """
+        metric_attrs = {"streamer": self.streamer or "unknown", "quality": self.formatted_quality}
+        live_config = self.config.get('live', {})
+        hls_config = self.config.get('hls', {})
 
-                        # Extract complete frame
-                        frame_data = frame_buffer[start:end+2]
-                        frame_buffer = frame_buffer[end+2:]
+        with create_span("live_ingest", attributes=self.span_attributes) as span:
+            follower = None
+            try:
+                playlist_url = self.hls_playlist_url
+                if not playlist_url:
+                    channel = self.live_channel or live_config.get('channel') or self.streamer
+                    playlist_url = resolve_twitch_live(channel, self.quality)
+                    self.logger.info(f"Resolved live stream of {channel} ({self.quality})")
+
+                fetcher = HLSSegmentFetcher(
+                    playlist_url,
+                    max_workers=1,
+                    timeout=hls_config.get('timeout', 20),
+                    retries=hls_config.get('retry_attempts', 3),
+                )
+                fetcher.load_playlist(self.quality)
+
+                if self.test_mode:
+                    frame_width, frame_height = QUALITY_CONFIGS.get(self.quality, QUALITY_CONFIGS['480p'])['resolution']
+                else:
+                    frame_width, frame_height = stream_resolution(self.quality)
+                crop = self.percent_to_pixels(self.profile['crop_region'], frame_width, frame_height)
+                decoder = KeyframeDecoder(tuple(crop))
+                sampler = KeyframeSampler(self.config['processing']['frame_rate'])
+
+                follower = LivePlaylistFollower(
+                    fetcher,
+                    buffer_segments=live_config.get('buffer_segments', 3),
+                    poll_interval=live_config.get('poll_interval'),
+                    idle_timeout=live_config.get('idle_timeout', 30),
+                    stop=self.shutdown,
+                    origin=rng.start,  # Timestamps count from the chunk's start_seconds at the first segment
+                )
+                deadline = time.time() + live_config.get('max_duration_seconds', 43200)
+                frames_extracted = 0
+                latency_reference = None
+
+                for segment in follower.follow():
+                    if time.time() > deadline:
+                        self.logger.info("Live mode reached max_duration_seconds, stopping")
+                        break
+                    if latency_reference is None:
+                        latency_reference = 'program_date_time' if segment.program_date_time else 'playlist'
+                        self.logger.info(f"Live latency measured from {latency_reference}")
+
+                    # One keyframe per segment is enough when the sample interval spans it
+                    leading_only = sampler.interval >= segment.duration * 0.75
+                    if leading_only and not sampler.wants(segment.start):
+                        continue
+                    if self.skip_ahead and leading_only and self.frame_processor.matchup_gate_end(segment.start) is not None:
+                        # Inside a confirmed matchup's interval - don't even fetch it
+                        self._record_skip("hls_segment", 1, metric_attrs, seconds=segment.duration)
+                        continue
+
+                    for timestamp, frame, _ in iter_keyframes(
+                        fetcher, decoder, [segment], leading_only, hls_config.get('leading_bytes')
+                    ):
                         frames_extracted += 1
-                        # Add to queue if not full
-                        try:
-                            self.frame_queue.put(frame_data, timeout=0.1)
-                            record_gauge("queue_depth", 1, metric_attrs)
-                        except queue.Full:
-                            self.logger.warning("Frame queue full, dropping frame")
-                            record_counter("frames_skipped", 1, {**metric_attrs, "reason": "queue_full"})
-                            record_counter("queue_overflow", 1, metric_attrs)
-
-                self.logger.info(f"FFmpeg worker finished. Final stats: {bytes_read} bytes read, {frames_extracted} frames extracted")
-
-                # Signal shutdown when FFmpeg finishes normally (not due to error)
-                if not self.shutdown.is_set():
-                    self.logger.info("FFmpeg completed successfully, signaling shutdown")
-                    self.shutdown.set()
+                        if not sampler.accept(timestamp):
+                            record_counter("frames_skipped", 1, {**metric_attrs, "reason": "sampler"})
+                            continue
+                        if self.skip_ahead and self.frame_processor.matchup_gate_end(timestamp) is not None:
+                            self._record_skip("reader", 1, metric_attrs)
+                            continue
+                        if segment.program_date_time:
+                            aired_at = segment.program_date_time + (timestamp - segment.start)
+                        else:
+                            aired_at = follower.seen_at.get(segment.index, time.time())
+                        self._enqueue_frame(FrameEnvelope(frame, timestamp, True, aired_at), metric_attrs)
 
-                # Set span attributes for frames extracted
+                fetcher.close()
+                self.logger.info(f"Live worker finished: {follower.segments_seen} segments seen, "
+                                 f"{follower.segments_dropped} dropped, {frames_extracted} keyframes decoded")
                 if span:
                     span.set_attribute("frames.extracted", frames_extracted)
-                    span.set_attribute("bytes.read", bytes_read)
+                    span.set_attribute("segments.dropped", follower.segments_dropped)
 
             except Exception as e:
-                self.logger.error(f"FFmpeg worker failed: {e}")
-                record_counter("errors", 1, {**metric_attrs, "component": "ffmpeg", "error_type": type(e).__name__})
-                self.shutdown.set()
+                self.logger.error(f"Live worker failed: {e}")
+                record_counter("errors", 1, {**metric_attrs, "component": "live", "error_type": type(e).__name__})
+                self._fail_ingest_range(rng, f"live: {e}")
+            finally:
+                if follower is not None:
+                    self.live_stats = {
+                        'segments_seen': follower.segments_seen,
+                        'segments_dropped': follower.segments_dropped,
+                        'stream_ended': follower.ended,
+                    }
+                    record_counter("live_segments_dropped", follower.segments_dropped, metric_attrs)
+                self._finish_ingest_range(rng)
+
+    def _record_live_latency(self, stage: str, result: Dict[str, Any], now: float):
+        """Record how long after airing a live matchup reached `stage` (detected / pushed)"""
+        latency = now - result['captured_at']
+        self.live_latencies[stage].append(latency)
+        record_histogram("live_latency", latency * 1000, {
+            "streamer": self.streamer or "unknown",
+            "quality": self.formatted_quality,
+            "stage": stage,
+        })
+
+    def _latency_summary(self) -> Dict[str, Dict[str, float]]:
+        """Median and max live latency per stage, for chunk_finished"""
+        summary = {}
+        for stage, values in self.live_latencies.items():
+            if values:
+                ordered = sorted(values)
+                summary[stage] = {'p50': round(ordered[len(ordered) // 2], 2), 'max': round(ordered[-1], 2)}
+        return summary
+
+    def _fail_ingest_range(self, rng: IngestRange, reason: str):
+        """Record that a sub-range could not be ingested and stop the chunk
+
+        The chunk is then marked failed rather than completed. A range that errors
+        after shutdown was already set (a signal, or another range failing first)
+        is not recorded: it was stopped, not broken.
+        """
+        if self.shutdown.is_set():
+            return
+        with self._ingest_lock:
+            self.failed_ranges.append(f"{rng.label}: {reason}")
+        self.shutdown.set()
+
+    def _finish_ingest_range(self, rng: IngestRange):
+        """Mark a sub-range as done; the last one lets the detection stage drain and finish"""
+        with self._ingest_lock:
+            self._active_ingest -= 1
+            remaining = self._active_ingest
+        if remaining == 0 and not self.ingest_done.is_set():
+            self.logger.info("All ingest workers finished, draining frame queue")
+            self.ingest_done.set()
     
+    def _enqueue_frame(self, frame_data, metric_attrs: Dict[str, str], block: bool = False) -> bool:
+        """Put a frame on the processing queue, dropping it if the queue stays full
+
+        With parallel sub-ranges the decoders easily outrun detection, so there
+        the put blocks instead (backpressure into FFmpeg/streamlink) - dropping
+        would throw away exactly the frames the extra decoders were started for.
+        `block` forces the same for sources that can wait (frame store replays).
+        """
+        try:
+            if block or len(self.ingest_ranges) > 1:
+                while not self.shutdown.is_set():
+                    try:
+                        self.frame_queue.put(frame_data, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                else:
+                    return False
+            else:
+                self.frame_queue.put(frame_data, timeout=0.1)
+            record_gauge("queue_depth", 1, metric_attrs)
+            return True
+        except queue.Full:
+            self.logger.warning("Frame queue full, dropping frame")
+            record_counter("frames_skipped", 1, {**metric_attrs, "reason": "queue_full"})
+            record_counter("queue_overflow", 1, metric_attrs)
+            return False
+
+    def _read_frames(self, reader, pts_reader: ShowinfoPTSReader, sampler: KeyframeSampler,
+                     base_time: float, metric_attrs: Dict[str, str], can_seek: bool = False,
+                     recorder: Optional[FrameStoreWriter] = None,
+                     seeked_input: bool = False) -> Tuple[int, int, Optional[Tuple[float, int]]]:
+        """Pair frames from FFmpeg with their showinfo timestamps and queue the sampled ones
+
+        Args:
+            reader: RawFrameReader or JPEGStreamDemuxer over FFmpeg stdout, or a
+                RingFrameReader (ffmpeg.decoder_process)
+            pts_reader: Timestamp source for the same FFmpeg process
+            sampler: Decides which frames are kept
+            base_time: VOD position (seconds) of the first frame FFmpeg outputs
+            metric_attrs: Metric labels
+            can_seek: Input is seekable - stop early when a matchup interval has
+                at least skip_ahead.min_seek_seconds left to run
+            recorder: Frame store receiving every decoded frame (before sampling)
+            seeked_input: FFmpeg opened a file with -ss base_time, so PTS already
+                count from base_time - the first frame out is the first keyframe
+                at or after it, up to a GOP later. Otherwise (streamlink pipe) the
+                first frame's PTS is taken as base_time
+
+        Returns:
+            (frames_extracted, bytes_read, seek) where seek is (from, to) seconds
+            if reading stopped to skip ahead, else None
+        """
+        first_pts = None
+        last_timestamp = None
+
+        while not self.shutdown.is_set():
+            frame_data = reader.read_frame()
+            if frame_data is None:
+                self.logger.info(f"FFmpeg stream ended. Total bytes read: {reader.bytes_read}, frames extracted: {reader.frames_read}")
+                break
+
+            entry = pts_reader.next_pts()
+            pts_time, is_keyframe = entry if entry is not None else (None, True)
+            if pts_time is not None:
+                if first_pts is None:
+                    first_pts = 0.0 if seeked_input else pts_time
+                timestamp = base_time + (pts_time - first_pts)
+            else:
+                # Missing showinfo line - extrapolate from the previous frame rather than stall
+                timestamp = base_time if last_timestamp is None else last_timestamp + sampler.interval
+                self.logger.debug(f"No PTS for frame {reader.frames_read}, estimating {timestamp:.2f}s")
+            last_timestamp = timestamp
+            if recorder is not None:
+                recorder.add(frame_data, timestamp, is_keyframe)
+
+            if not sampler.accept(timestamp):
+                record_counter("frames_skipped", 1, {**metric_attrs, "reason": "sampler"})
+                continue
+
+            if self.skip_ahead:
+                gate_end = self.frame_processor.matchup_gate_end(timestamp)
+                if gate_end is not None:
+                    self._record_skip("reader", 1, metric_attrs)
+                    if can_seek and gate_end - timestamp >= self.min_seek_seconds:
+                        return reader.frames_read, reader.bytes_read, (timestamp, gate_end)
+                    continue
+
+            self._enqueue_frame(FrameEnvelope(frame_data, timestamp, is_keyframe), metric_attrs)
+
+        return reader.frames_read, reader.bytes_read, None
+
+    def _replay_frames(self, store: FrameStore, rng: IngestRange, sampler: KeyframeSampler,
+                       metric_attrs: Dict[str, str]) -> int:
+        """Queue a range's frames from a frame store the way _read_frames queues FFmpeg's
+
+        Returns:
+            Number of stored frames read
+        """
+        frames_read = 0
+        for frame, timestamp, is_keyframe in store.iter_range(rng.start, rng.end):
+            if self.shutdown.is_set():
+                break
+            frames_read += 1
+            if not sampler.accept(timestamp):
+                record_counter("frames_skipped", 1, {**metric_attrs, "reason": "sampler"})
+                continue
+            if self.skip_ahead and self.frame_processor.matchup_gate_end(timestamp) is not None:
+                self._record_skip("reader", 1, metric_attrs)
+                continue
+            # Nothing upstream is live, so wait for detection rather than drop
+            self._enqueue_frame(FrameEnvelope(frame, timestamp, is_keyframe), metric_attrs, block=True)
+        return frames_read
+
+    def _record_skip(self, stage: str, decodes: int, metric_attrs: Dict[str, str], seconds: float = 0.0):
+        """Account for work the skip-ahead gate avoided
+
+        Args:
+            stage: Where the gate fired ("reader", "detection", "ffmpeg_seek", "hls_segment", "pyav_seek")
+            decodes: Frame decodes avoided (estimated for seeks and skipped segments)
+            metric_attrs: Metric labels
+            seconds: VOD seconds skipped by seeking
+        """
+        with self._skip_lock:
+            if stage in ("reader", "detection"):
+                self.skip_stats['frames_gated'] += 1
+            else:
+                self.skip_stats['seeks'] += 1
+                self.skip_stats['seconds_skipped'] = round(self.skip_stats['seconds_skipped'] + seconds, 2)
+            self.skip_stats['decodes_avoided'] += decodes
+        if stage in ("reader", "detection"):
+            record_counter("frames_skipped", 1, {**metric_attrs, "reason": "matchup_interval"})
+        record_counter("decodes_avoided", decodes, {**metric_attrs, "stage": stage})
+
+    def _stop_process(self, proc: Optional[subprocess.Popen], proc_name: str):
+        """Terminate a subprocess, killing it if it doesn't exit within 5 seconds"""
+        if proc and proc.poll() is None:
+            self.logger.info(f"Terminating {proc_name}")
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.logger.warning(f"Force killing {proc_name}")
+                proc.kill()
+
+    def coarse_worker(self):
+        """First-pass consumer: cheap emblem check on downscaled frames, collecting candidate timestamps"""
+        two_pass = self.config.get('two_pass', {})
+        scale = two_pass.get('coarse_scale', 0.5)
+        threshold = two_pass.get('coarse_threshold', 0.35)
+        metric_attrs = {
+            "streamer": self.streamer or "unknown",
+            "quality": self.formatted_quality,
+        }
+        try:
+            while not self.shutdown.is_set():
+                try:
+                    envelope = self.frame_queue.get(timeout=1)
+                except queue.Empty:
+                    if self.ingest_done.is_set():
+                        break
+                    continue
+
+                try:
+                    record_gauge("queue_depth", -1, metric_attrs)
+                    is_candidate, confidence = self.frame_processor.detect_candidate(envelope.frame, scale, threshold)
+                    self.coarse_frames += 1
+                    if is_candidate:
+                        self.logger.debug(f"Coarse candidate at {envelope.timestamp:.1f}s (confidence={confidence:.3f})")
+                        self.coarse_hits.append(envelope.timestamp)
+                except Exception as e:
+                    self.logger.error(f"Coarse frame processing error: {e}")
+
+        except Exception as e:
+            self.logger.error(f"Coarse worker failed: {e}")
+            self.shutdown.set()
+        finally:
+            self.detection_done.set()
+
+    def probe_worker(self, groups: List[int], group: int):
+        """Sparse-probe consumer: Bazaar UI check on each group's probe keyframe"""
+        probe = self.config.get('sparse_probe', {})
+        threshold = probe.get('ui_threshold', 0.5)
+        metric_attrs = {
+            "streamer": self.streamer or "unknown",
+            "quality": self.formatted_quality,
+        }
+        try:
+            while not self.shutdown.is_set():
+                try:
+                    envelope = self.frame_queue.get(timeout=1)
+                except queue.Empty:
+                    if self.ingest_done.is_set():
+                        break
+                    continue
+
+                try:
+                    record_gauge("queue_depth", -1, metric_attrs)
+                    start = groups[min(len(groups) - 1, int(envelope.timestamp - self.start_time) // group)]
+                    present, score = self.frame_processor.detect_bazaar_ui(envelope.frame, threshold)
+                    self.logger.debug(f"Probe at {envelope.timestamp:.1f}s: {'present' if present else 'absent'} (score={score:.3f})")
+                    self.probe_results[start] = self.probe_results.get(start, False) or present
+                    record_counter("probe_groups", 1, {**metric_attrs, "result": "present" if present else "absent"})
+                    self._update_probe_cutoff(groups, group)
+                except Exception as e:
+                    self.logger.error(f"Probe frame processing error: {e}")
+
+        except Exception as e:
+            self.logger.error(f"Probe worker failed: {e}")
+            self.shutdown.set()
+        finally:
+            self.detection_done.set()
+
     def opencv_worker(self):
         """Worker to process frames with OpenCV (runs in parallel, consumes from frame queue)"""
         self.logger.info("OpenCV worker starting...")
@@ -649,20 +1868,31 @@ class SFOTProcessor:
         }
         try:
             while not self.shutdown.is_set():
+                # Get frame from queue; stop once ingestion is over and the queue is drained
+                try:
+                    envelope = self.frame_queue.get(timeout=1)
+                except queue.Empty:
+                    if self.ingest_done.is_set():
+                        break
+                    continue
+
                 try:
-                    # Get frame from queue
-                    frame_data = self.frame_queue.get(timeout=1)
                     record_gauge("queue_depth", -1, metric_attrs)
 
-                    # Calculate timestamp based on frame rate
-                    sampling_rate = self.config["processing"]["frame_rate"]
-                    seconds_per_sampled_frame = 1 / sampling_rate if sampling_rate > 0 else 0
-                    timestamp = self.start_time + int(self.frames_processed * seconds_per_sampled_frame)
+                    # Timestamp comes from the frame's own PTS, so dropped or
+                    # reordered frames don't shift anything
+                    timestamp = int(envelope.timestamp)
+
+                    # Queued before the matchup was confirmed - drop it undecoded
+                    if self.skip_ahead and self.frame_processor.matchup_gate_end(timestamp) is not None:
+                        self._record_skip("detection", 1, metric_attrs)
+                        continue
                     result = self.frame_processor.process_frame(
-                        frame_data,
+                        envelope.frame,
                         timestamp,
                         self.vod_id,
-                        self.chunk_id
+                        self.chunk_id,
+                        frame_time=envelope.timestamp
                     )
 
                     self.frames_processed += 1
@@ -670,6 +1900,9 @@ class SFOTProcessor:
 
                     # If matchup detected, add to result queue
                     if result and result.get('is_matchup'):
+                        if envelope.captured_at is not None:
+                            result['captured_at'] = envelope.captured_at
+                            self._record_live_latency('detected', result, time.time())
                         self.result_queue.put(result)
                         self.matchups_found += 1
                         # Structured JSON event for Loki queryability
@@ -690,41 +1923,40 @@ class SFOTProcessor:
                         if result.get('confidence'):
                             record_histogram("ocr_confidence", result['confidence'], metric_attrs)
 
-                except queue.Empty:
-                    continue
                 except Exception as e:
                     self.logger.error(f"Frame processing error: {e}")
 
         except Exception as e:
             self.logger.error(f"OpenCV worker failed: {e}")
             self.shutdown.set()
+        finally:
+            self.detection_done.set()
     
     def result_worker(self):
         """Worker to handle results and update Supabase in batches"""
         try:
             while not self.shutdown.is_set():
+                # Get result from queue; stop once detection is over and the queue is drained
                 try:
-                    # Get result from queue
                     result = self.result_queue.get(timeout=1)
-                    self.result_batch.append(result)
-
-                    # Track all detections for summary export
-                    self.all_detections.append({
-                        'timestamp': result['timestamp'],
-                        'username': result['username'],
-                        'confidence': result.get('confidence', 0),
-                        'rank': result.get('detected_rank'),
-                        'frame_base64': result.get('frame_base64')  # For workflow summary images
-                    })
-
-                    # Send batch when it reaches configured size
-                    if len(self.result_batch) >= self.config['supabase']['batch_size']:
-                        self.supabase.upload_batch(self.result_batch)
-                        self.result_batch = []
-
                 except queue.Empty:
-                    # Continue waiting for more results
+                    if self.detection_done.is_set():
+                        break
                     continue
+                self.result_batch.append(result)
+
+                # Track all detections for summary export
+                self.all_detections.append({
+                    'timestamp': result['timestamp'],
+                    'username': result['username'],
+                    'confidence': result.get('confidence', 0),
+                    'rank': result.get('detected_rank'),
+                    'frame_base64': result.get('frame_base64')  # For workflow summary images
+                })
+
+                # Send batch when it reaches configured size (live mode pushes each detection right away)
+                if self.live or len(self.result_batch) >= self.config['supabase']['batch_size']:
+                    self._upload_result_batch()
 
         except Exception as e:
             self.logger.error(f"Result worker failed: {e}")
@@ -732,8 +1964,23 @@ class SFOTProcessor:
             # Send remaining batch at shutdown
             if self.result_batch:
                 self.logger.info(f"Flushing final batch of {len(self.result_batch)} detections")
-                self.supabase.upload_batch(self.result_batch)
-                self.result_batch = []
+                self._upload_result_batch()
+
+    def _upload_result_batch(self):
+        """Upload the accumulated batch in timestamp order (sub-ranges finish out of order)"""
+        self.result_batch.sort(key=lambda r: r['timestamp'])
+        self.supabase.upload_batch(self.result_batch)
+        pushed_at = time.time()
+        for result in self.result_batch:
+            if result.get('captured_at') is not None:
+                self._record_live_latency('pushed', result, pushed_at)
+                self.logger.info(json.dumps({
+                    'event': 'matchup_pushed',
+                    'timestamp_seconds': result['timestamp'],
+                    'username': result.get('username'),
+                    'latency_seconds': round(pushed_at - result['captured_at'], 2),
+                }))
+        self.result_batch = []
 
     def export_detection_summary(self, output_dir: str = "/app/output"):
         """Export detection summary for GitHub Actions workflow summary
@@ -758,8 +2005,9 @@ class SFOTProcessor:
                 'detections': []
             }
 
-            # Add ALL detection details (images are in Supabase storage)
-            for detection in self.all_detections:
+            # Add ALL detection details (images are in Supabase storage), merged
+            # back into timestamp order across parallel sub-ranges
+            for detection in sorted(self.all_detections, key=lambda d: d['timestamp']):
                 summary['detections'].append({
                     'timestamp': detection['timestamp'],
                     'username': detection['username'],
@@ -800,15 +2048,12 @@ class SFOTProcessor:
         self.shutdown.set()
 
         # Terminate subprocesses
-        for proc_name, proc in [('ffmpeg', self.ffmpeg_proc), ('streamlink', self.streamlink_proc)]:
-            if proc and proc.poll() is None:
-                self.logger.info(f"Terminating {proc_name}")
-                proc.terminate()
-                try:
-                    proc.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    self.logger.warning(f"Force killing {proc_name}")
-                    proc.kill()
+        procs = []
+        for rng in self.ingest_ranges:
+            procs += [(f'decoder-{rng.index}', rng.decoder_proc), (f'ffmpeg-{rng.index}', rng.ffmpeg_proc),
+                      (f'streamlink-{rng.index}', rng.streamlink_proc)]
+        for proc_name, proc in procs:
+            self._stop_process(proc, proc_name)
 
         # Clear queues
         while not self.frame_queue.empty():
@@ -833,6 +2078,18 @@ def main():
         'quality': os.getenv('QUALITY', '480p'),  # Can be single or comma-separated list
         'old_templates': os.getenv('OLD_TEMPLATES', 'false').lower() == 'true',
         'video_fps': int(os.getenv('VIDEO_FPS', '30')),  # Actual video FPS (30 or 60)
+        'ingest_workers': int(os.getenv('INGEST_WORKERS', '0')) or None,  # Parallel sub-ranges (0 = config.yaml)
+        'ingest_backend': os.getenv('INGEST_BACKEND'),  # "streamlink", "hls" or "pyav" (unset = config.yaml)
+        'hls_playlist_url': os.getenv('HLS_PLAYLIST_URL'),  # Fetch this playlist instead of resolving the VOD
+        'two_pass': {'true': True, 'false': False}.get(os.getenv('TWO_PASS', '').lower()),  # Unset = config.yaml
+        'hls_cache_dir': os.getenv('HLS_CACHE_DIR'),  # On-disk segment cache for the native HLS backend
+        'dual_rendition': {'true': True, 'false': False}.get(os.getenv('DUAL_RENDITION', '').lower()),  # Unset = config.yaml
+        'sparse_probe': {'true': True, 'false': False}.get(os.getenv('SPARSE_PROBE', '').lower()),  # Unset = config.yaml
+        'frame_store_dir': os.getenv('FRAME_STORE_DIR'),  # Test mode: replay/record decoded frames here
+        'emblem_prior_dir': os.getenv('EMBLEM_PRIOR_DIR'),  # Persist learned emblem locations here
+        'decoder_process': {'true': True, 'false': False}.get(os.getenv('DECODER_PROCESS', '').lower()),  # Unset = config.yaml
+        'live': {'true': True, 'false': False}.get(os.getenv('LIVE_MODE', '').lower()),  # Unset = config.yaml
+        'live_channel': os.getenv('LIVE_CHANNEL'),  # Channel to follow in live mode (default: chunk's streamer)
     }
 
     if not config['chunk_id']:
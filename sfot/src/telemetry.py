@@ -168,6 +168,12 @@ def _create_metrics():
         unit="1"
     )
 
+    _metrics["frames_rejected"] = _meter.create_counter(
+        "sfot.frames.rejected",
+        description="Frames dropped before OCR, by stage (prefilter, emblem, interval)",
+        unit="1"
+    )
+
     _metrics["right_edge_failed"] = _meter.create_counter(
         "sfot.right_edge.failed",
         description="Frames where right edge detection failed",
@@ -192,12 +198,90 @@ def _create_metrics():
         unit="1"
     )
 
+    _metrics["decodes_avoided"] = _meter.create_counter(
+        "sfot.frames.decodes_avoided",
+        description="Frame decodes avoided by the skip-ahead gate after a matchup",
+        unit="1"
+    )
+
     _metrics["queue_overflow"] = _meter.create_counter(
         "sfot.queue.overflow",
         description="Frame queue overflow events",
         unit="1"
     )
 
+    _metrics["hls_segments_fetched"] = _meter.create_counter(
+        "sfot.hls.segments_fetched",
+        description="HLS segments downloaded by the native fetcher",
+        unit="1"
+    )
+
+    _metrics["hls_bytes_fetched"] = _meter.create_counter(
+        "sfot.hls.bytes_fetched",
+        description="Bytes downloaded by the native HLS fetcher",
+        unit="By"
+    )
+
+    _metrics["emblem_roi_hits"] = _meter.create_counter(
+        "sfot.emblem.roi_hits",
+        description="Emblems found inside the learned per-profile ROI",
+        unit="1"
+    )
+
+    _metrics["emblem_roi_fallbacks"] = _meter.create_counter(
+        "sfot.emblem.roi_fallbacks",
+        description="Full-frame emblem searches after an ROI miss (found=true when the emblem had moved; trigger=edge|periodic)",
+        unit="1"
+    )
+
+    _metrics["emblem_tracking"] = _meter.create_counter(
+        "sfot.emblem.tracking",
+        description="Tracked-emblem window checks (result=hit, or lost and searched again)",
+        unit="1"
+    )
+
+    _metrics["pyav_packets_skipped"] = _meter.create_counter(
+        "sfot.pyav.packets_skipped",
+        description="Video packets the PyAV backend dropped without decoding (non-key or not sampled)",
+        unit="1"
+    )
+
+    _metrics["hls_cache_hits"] = _meter.create_counter(
+        "sfot.hls.cache_hits",
+        description="HLS segments served from the on-disk segment cache",
+        unit="1"
+    )
+
+    _metrics["hls_cache_misses"] = _meter.create_counter(
+        "sfot.hls.cache_misses",
+        description="HLS segments not in the on-disk segment cache",
+        unit="1"
+    )
+
+    _metrics["dual_rendition_frames"] = _meter.create_counter(
+        "sfot.dual_rendition.frames",
+        description="Matchups OCR'd on a keyframe fetched from the higher rendition",
+        unit="1"
+    )
+
+    _metrics["dual_rendition_fallbacks"] = _meter.create_counter(
+        "sfot.dual_rendition.fallbacks",
+        description="Matchups OCR'd on the detection frame because the higher rendition keyframe was unavailable",
+        unit="1"
+    )
+
+    _metrics["probe_groups"] = _meter.create_counter(
+        "sfot.sparse_probe.groups",
+        description="Sparse-probe keyframes checked for the Bazaar UI, by result",
+        unit="1"
+    )
+
+    _metrics["live_segments_dropped"] = _meter.create_counter(
+        "sfot.live.segments_dropped",
+        description="Live segments skipped because processing fell behind the buffer",
+        unit="1"
+    )
+
     _metrics["errors"] = _meter.create_counter(
         "sfot.errors",
         description="Categorized errors by component and type",
@@ -223,6 +307,12 @@ def _create_metrics():
         unit="1"
     )
 
+    _metrics["live_latency"] = _meter.create_histogram(
+        "sfot.live.latency",
+        description="Live mode: time from a matchup frame airing to its detection / Supabase push",
+        unit="ms"
+    )
+
     _metrics["processing_duration"] = _meter.create_histogram(
         "sfot.chunk.duration",
         description="Chunk processing duration",
@@ -0,0 +1,199 @@
+"""
+Template bank - Emblem and right-edge templates for any frame height, derived
+from the master images and cached on disk as arrays
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Frame height the template sizes below are given at
+REFERENCE_HEIGHT = 1080
+
+
+class TemplateSpec(NamedTuple):
+    """How to cut one template out of its master image"""
+    master: str  # File in the templates directory
+    size: Tuple[int, int]  # (w, h) at REFERENCE_HEIGHT
+    crop: Tuple[float, float, float, float]  # (x0, y0, x1, y1) of the master's opaque area kept
+    alpha_threshold: int  # Mask = resized alpha above this...
+    erode: int  # ...pulled in this many pixels
+
+
+# The in-game emblems are the masters with the top ~10% (and a sliver of the
+# bottom) cut off by the nameplate. Crops were registered against the hand-cut
+# 1080p templates; masks keep only fully opaque pixels, one pixel in, since the
+# emblem's soft edge is blended with the nameplate on screen.
+TEMPLATE_SPECS = {
+    'bronze': TemplateSpec('bronze_fullres.png', (114, 122), (0.0172, 0.0949, 1.0, 0.9854), 250, 1),
+    'silver': TemplateSpec('silver_fullres.png', (112, 121), (0.0, 0.1087, 1.0, 0.9855), 250, 1),
+    'gold': TemplateSpec('gold_fullres.png', (114, 121), (0.0, 0.1087, 1.0, 0.9855), 250, 1),
+    'diamond': TemplateSpec('diamond_fullres.png', (126, 122), (0.0, 0.0949, 1.0, 0.9854), 250, 1),
+    'legend': TemplateSpec('legend_fullres.png', (140, 122), (0.0, 0.0949, 1.0, 0.9854), 250, 1),
+    # No larger master exists for the nameplate edge - shrink the 1080p cut
+    'right_edge': TemplateSpec('right_edge_1080p.png', (21, 78), (0.0, 0.0, 1.0, 1.0), 0, 0),
+}
+
+
+class BankTemplate(NamedTuple):
+    """Template image (BGR), its mask (None = match every pixel) and where it came from"""
+    image: np.ndarray
+    mask: Optional[np.ndarray]
+    source: str
+
+
+def resolution_height(resolution: str) -> Optional[int]:
+    """Frame height of a rendition name ("936p" -> 936, "720p60" -> 720), None if it has none"""
+    match = re.match(r'^(\d+)p', str(resolution))
+    return int(match.group(1)) if match and int(match.group(1)) > 0 else None
+
+
+class TemplateBank:
+    """Templates for any frame height, hand-cut where one exists, derived otherwise
+
+    Hand-cut templates ({name}_{height}p.png) only exist for 360p, 480p, 720p
+    and 1080p. Any other height (936p, 160p, a scaled game window) gets one
+    derived from the master in TEMPLATE_SPECS: crop, INTER_AREA resize to the
+    reference size scaled by height / 1080, mask from the resized alpha.
+
+    Derived templates are written to cache_dir as .npz arrays, keyed by the
+    master's size and mtime plus the spec, so a changed master or spec is
+    derived again instead of served stale.
+    """
+
+    CACHE_VERSION = 1
+
+    def __init__(self, templates_dir: str = "templates", cache_dir: Optional[str] = None,
+                 prefer_assets: bool = True):
+        """Initialize template bank
+
+        Args:
+            templates_dir: Directory with the masters and hand-cut templates
+            cache_dir: Keep derived templates here (created if missing; None = derive
+                on every start)
+            prefer_assets: Use a hand-cut template when one exists for the height
+                (they score higher than derived ones on real frames)
+        """
+        self.templates_dir = Path(templates_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.prefer_assets = prefer_assets
+        self.logger = logging.getLogger('sfot.template_bank')
+        self.stats = {'assets': 0, 'derived': 0, 'cache_hits': 0}
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, name: str, frame_height: int) -> Optional[BankTemplate]:
+        """Template for name ("bronze" ... "legend", "right_edge") at a frame height
+
+        Returns:
+            BankTemplate, or None when neither a hand-cut template nor the master exists
+        """
+        asset_path = self.templates_dir / f"{name}_{frame_height}p.png"
+        if self.prefer_assets and asset_path.exists():
+            template = self._read_asset(asset_path)
+            if template is not None:
+                self.stats['assets'] += 1
+                return template
+
+        spec = TEMPLATE_SPECS.get(name)
+        if spec is None:
+            self.logger.warning(f"No master for template {name} at {frame_height}p")
+            return None
+        return self._derive(name, spec, frame_height)
+
+    def template_size(self, name: str, frame_height: int) -> Tuple[int, int]:
+        """(w, h) a template derived for frame_height gets"""
+        w, h = TEMPLATE_SPECS[name].size
+        scale = frame_height / REFERENCE_HEIGHT
+        return max(1, int(w * scale)), max(1, int(h * scale))
+
+    def _read_asset(self, path: Path) -> Optional[BankTemplate]:
+        """Hand-cut template; mask from alpha > 0 like the detectors always did"""
+        image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+        if image is None:
+            self.logger.warning(f"Failed to load template {path}")
+            return None
+        if image.ndim == 3 and image.shape[2] == 4:
+            return BankTemplate(image[:, :, :3].copy(), (image[:, :, 3] > 0).astype(np.uint8), path.name)
+        return BankTemplate(image, None, path.name)
+
+    def _derive(self, name: str, spec: TemplateSpec, frame_height: int) -> Optional[BankTemplate]:
+        master_path = self.templates_dir / spec.master
+        try:
+            st = master_path.stat()
+        except OSError:
+            self.logger.warning(f"Template master not found: {master_path}")
+            return None
+
+        size = self.template_size(name, frame_height)
+        source = f"{spec.master} at {size[0]}x{size[1]}"
+        key = f"{self.CACHE_VERSION}|{spec}|{size}|{st.st_size}|{st.st_mtime_ns}"
+        cache_path = None
+        if self.cache_dir is not None:
+            digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+            cache_path = self.cache_dir / f"{name}_{size[0]}x{size[1]}_{digest}.npz"
+            cached = self._read_cache(cache_path)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return BankTemplate(*cached, f"{source} (cached)")
+
+        master = cv2.imread(str(master_path), cv2.IMREAD_UNCHANGED)
+        if master is None or master.ndim != 3 or master.shape[2] != 4:
+            self.logger.warning(f"Template master {master_path} is not a BGRA image")
+            return None
+        image, mask = self._cut(master, spec, size)
+        self.stats['derived'] += 1
+        self.logger.info(f"Derived {name} template from {source}")
+
+        if cache_path is not None:
+            self._write_cache(cache_path, image, mask)
+        return BankTemplate(image, mask, source)
+
+    @staticmethod
+    def _cut(master: np.ndarray, spec: TemplateSpec, size: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Crop the master's opaque area to spec.crop, resize, and build the mask"""
+        ys, xs = np.nonzero(master[:, :, 3])
+        if len(xs):
+            master = master[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+        h, w = master.shape[:2]
+        x0, y0, x1, y1 = spec.crop
+        master = master[round(y0 * h):max(round(y1 * h), round(y0 * h) + 1),
+                        round(x0 * w):max(round(x1 * w), round(x0 * w) + 1)]
+
+        resized = cv2.resize(master, size, interpolation=cv2.INTER_AREA)
+        mask = (resized[:, :, 3] > spec.alpha_threshold).astype(np.uint8)
+        if spec.erode:
+            mask = cv2.erode(mask, np.ones((2 * spec.erode + 1, 2 * spec.erode + 1), np.uint8))
+        return np.ascontiguousarray(resized[:, :, :3]), mask
+
+    def _read_cache(self, path: Path) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return data['image'], data['mask']
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable template cache entry {path.name}: {e}")
+            return None
+
+    def _write_cache(self, path: Path, image: np.ndarray, mask: np.ndarray):
+        # Write to a temp file and rename, so a worker starting alongside never reads half an entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, image=image, mask=mask)
+            os.replace(tmp, path)
+        except OSError as e:
+            self.logger.warning(f"Could not cache derived template: {e}")
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Bazaar UI presence detection for sparse probing
+Compares the color distribution of the crop region against reference crops of Bazaar gameplay
+"""
+
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import List, Tuple
+import logging
+
+class UIPresenceDetector:
+    """Decide whether a (cropped) frame shows the Bazaar UI
+
+    Each reference image is a crop of the same region taken during Bazaar
+    gameplay. A frame matches when its hue/saturation histogram correlates
+    with any reference above the threshold. Histograms ignore frame size,
+    so references work at every rendition and probe scale.
+    """
+
+    HIST_BINS = [30, 32]            # Hue, saturation
+    HIST_RANGES = [0, 180, 0, 256]
+
+    def __init__(self, references_dir: str):
+        """Load reference crops
+
+        Args:
+            references_dir: Directory of reference images (png/jpg)
+        """
+        self.references_dir = Path(references_dir)
+        self.logger = logging.getLogger(__name__)
+        self.references: List[np.ndarray] = []
+
+        if not self.references_dir.is_dir():
+            self.logger.warning(f"UI reference directory not found: {self.references_dir}")
+            return
+
+        for path in sorted(self.references_dir.iterdir()):
+            if path.suffix.lower() not in ('.png', '.jpg', '.jpeg'):
+                continue
+            image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+            if image is None:
+                self.logger.warning(f"Failed to load UI reference {path.name}")
+                continue
+            self.references.append(self._histogram(image))
+        self.logger.info(f"Loaded {len(self.references)} UI references from {self.references_dir}")
+
+    def _histogram(self, frame: np.ndarray) -> np.ndarray:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, self.HIST_BINS, self.HIST_RANGES)
+        return cv2.normalize(hist, hist).flatten()
+
+    def detect(self, frame: np.ndarray, threshold: float = 0.5) -> Tuple[bool, float]:
+        """
+        Check a BGR frame against the references
+
+        Args:
+            frame: BGR frame (any size)
+            threshold: Minimum histogram correlation (-1 to 1)
+
+        Returns:
+            (is_present, best_correlation); (True, 1.0) without references so
+            that callers never skip footage they can't judge
+        """
+        if not self.references:
+            return True, 1.0
+
+        hist = self._histogram(frame)
+        best = max(cv2.compareHist(ref, hist, cv2.HISTCMP_CORREL) for ref in self.references)
+        return best >= threshold, float(best)
+
+
+def test_ui_detector():
+    """Score images against a reference directory"""
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) < 3:
+        print("Usage: ui_detector.py <references_dir> <image> [image ...]")
+        return
+
+    detector = UIPresenceDetector(sys.argv[1])
+    for image_path in sys.argv[2:]:
+        image = cv2.imread(image_path, cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"{image_path}: could not load")
+            continue
+        present, score = detector.detect(image)
+        print(f"{image_path}: {'present' if present else 'absent'} (correlation={score:.3f})")
+
+
+if __name__ == "__main__":
+    test_ui_detector()
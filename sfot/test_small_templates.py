@@ -15,6 +15,7 @@ import json
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from emblem_detector import EmblemDetector
+from frame_store import FrameStore
 
 def extract_frame(video_path: str, timestamp: int):
     """Extract a single frame from video at given timestamp"""
@@ -24,6 +25,21 @@ def extract_frame(video_path: str, timestamp: int):
     cap.release()
     return frame if ret else None
 
+def load_frame(video_path: str, timestamp: int, crop_percent, stores=None):
+    """Cropped frame at timestamp, from a frame store when one has it (already cropped) or the video"""
+    for store in stores or []:
+        signature = store.meta['signature']
+        if signature['crop_percent'] == [round(v, 6) for v in crop_percent] and \
+                signature['output_size'] == signature['crop'][:2]:
+            frame = store.frame_at(timestamp)
+            if frame is not None:
+                return frame
+
+    frame = extract_frame(video_path, timestamp)
+    if frame is None:
+        return None
+    return apply_crop(frame, crop_percent)
+
 def apply_crop(frame, crop_percent):
     """Apply percentage-based crop to frame"""
     h, w = frame.shape[:2]
@@ -153,17 +169,17 @@ def compare_templates(frame, timestamp, method='template', show_visual=True):
         'small': {'rank': small_rank, 'confidence': small_conf, 'bbox': small_bbox}
     }
 
-def test_multiple_frames(video_path, timestamps, method='template', crop_percent=None):
+def test_multiple_frames(video_path, timestamps, method='template', crop_percent=None, stores=None):
     """Test multiple timestamps and summarize results"""
 
     results = []
 
     for ts in timestamps:
-        frame = extract_frame(video_path, ts)
+        if crop_percent:
+            frame = load_frame(video_path, ts, crop_percent, stores)
+        else:
+            frame = extract_frame(video_path, ts)
         if frame is not None:
-            if crop_percent:
-                frame = apply_crop(frame, crop_percent)
-
             result = compare_templates(frame, ts, method, show_visual=False)
             results.append(result)
 
@@ -230,6 +246,8 @@ def main():
                        help='Test batch of timestamps')
     parser.add_argument('--visual', action='store_true',
                        help='Show visual comparison for single timestamp')
+    parser.add_argument('--frame-store', default=os.getenv('FRAME_STORE_DIR'),
+                       help='Read frames from SFOT test-mode frame stores in this directory')
 
     args = parser.parse_args()
 
@@ -248,6 +266,11 @@ def main():
     # Crop region from config
     crop_percent = [0.005859375, 0.5208333333333334, 0.2802734375, 0.20833333333333334]
 
+    # Frames decoded by earlier SFOT test-mode runs, if any
+    stores = FrameStore.for_video(args.frame_store, video_path) if args.frame_store else []
+    if stores:
+        print(f"Frame stores: {len(stores)} ranges from {args.frame_store}")
+
     if args.batch:
         # Test multiple timestamps
         # These are timestamps where we expect to find matchup screens
@@ -263,21 +286,18 @@ def main():
         test_timestamps = [ts for ts in test_timestamps if ts < 12000]
 
         print(f"Testing {len(test_timestamps)} timestamps...")
-        results = test_multiple_frames(video_path, test_timestamps, args.method, crop_percent)
+        results = test_multiple_frames(video_path, test_timestamps, args.method, crop_percent, stores)
 
     else:
         # Test single timestamp
         timestamp = args.timestamp if args.timestamp else 1969  # Default to problematic EdsonCarteiro
 
         print(f"Extracting frame at {timestamp}s...")
-        frame = extract_frame(video_path, timestamp)
+        cropped = load_frame(video_path, timestamp, crop_percent, stores)
 
-        if frame is None:
+        if cropped is None:
             print("Error: Could not extract frame")
             return
-
-        # Apply crop
-        cropped = apply_crop(frame, crop_percent)
         print(f"Frame size after crop: {cropped.shape[1]}x{cropped.shape[0]}")
 
         # Compare templates